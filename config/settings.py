@@ -12,11 +12,19 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 from dotenv import dotenv_values
+from django.core.exceptions import ImproperlyConfigured
+import importlib.util
 import os
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
-ENV = dotenv_values(os.path.join(BASE_DIR, ".env"))
+# .env qiymatlari; muhit o'zgaruvchilari (docker, systemd, benchmark) ularni ustidan yozadi
+ENV = {**dotenv_values(os.path.join(BASE_DIR, ".env")), **os.environ}
+
+
+def env_flag(name, default):
+    return str(ENV.get(name, default)).lower() in ('1', 'true', 'yes', 'on')
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -25,8 +33,10 @@ ENV = dotenv_values(os.path.join(BASE_DIR, ".env"))
 SECRET_KEY = ENV.get('SECRET_KEY')
 TELEGRAM_BOT_TOKEN = ENV.get("BOT_TOKEN")
 ADMIN_TELEGRAM_ID = ENV.get("ADMIN_TELEGRAM_ID")
+TELEGRAM_API_URL = ENV.get("TELEGRAM_API_URL", "https://api.telegram.org")
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# Ishlab chiqarishda DEBUG=0 bering (keshga qo'yiladigan talablar pastda)
+DEBUG = env_flag('DEBUG', True)
 
 ALLOWED_HOSTS = ['*']
 
@@ -83,12 +93,109 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# DB_ENGINE=postgresql — ishlab chiqarish profili; berilmasa kichik o'rnatishlar uchun SQLite
+
+if ENV.get('DB_ENGINE', 'sqlite') in ('postgres', 'postgresql'):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': ENV.get('DB_NAME', 'savdo'),
+            'USER': ENV.get('DB_USER', 'postgres'),
+            'PASSWORD': ENV.get('DB_PASSWORD', ''),
+            'HOST': ENV.get('DB_HOST', 'localhost'),
+            'PORT': ENV.get('DB_PORT', '5432'),
+            # Ulanishni so'rovlar orasida qayta ishlatish; health check uzilgan ulanishni almashtiradi
+            'CONN_MAX_AGE': int(ENV.get('DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
+    }
+    if env_flag('DB_POOL', False):
+        # psycopg (3) ulanishlar puli; doimiy ulanishlar bilan birga ishlamaydi (CONN_MAX_AGE=0)
+        if not (importlib.util.find_spec('psycopg') and importlib.util.find_spec('psycopg_pool')):
+            raise ImproperlyConfigured(
+                "DB_POOL=1 uchun psycopg 3 kerak: pip install 'psycopg[binary,pool]' "
+                "(requirements.txt dagi psycopg2-binary pulni qo'llamaydi)"
+            )
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(ENV.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(ENV.get('DB_POOL_MAX_SIZE', 10)),
+            'timeout': int(ENV.get('DB_POOL_TIMEOUT', 10)),
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ENV.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {},
+        }
+    }
+    if env_flag('DB_SQLITE_TUNED', True):
+        DATABASES['default']['OPTIONS'] = {
+            # WAL: o'quvchilar yozuvchini kutmaydi; NORMAL — WAL rejimida xavfsiz va tezroq fsync
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                f"PRAGMA busy_timeout={int(ENV.get('DB_SQLITE_BUSY_TIMEOUT', 5000))};"
+            ),
+            # Yozuvchi qulfi tranzaksiya boshida olinadi — o'qishdan yozishga o'tishdagi
+            # "database is locked" xatolari o'rniga navbat kutiladi
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': int(ENV.get('DB_SQLITE_BUSY_TIMEOUT', 5000)) / 1000,
+        }
+
+# O'qish replikasi: DB_REPLICA_NAME (SQLite fayli yoki PostgreSQL bazasi) va/yoki DB_REPLICA_HOST
+# berilsa buyurtma va statistika o'qishlari "replica" ga yuboriladi (savdo.routers). Versiya bo'yicha
+# keshlanadigan katalog endpointlari asosiy bazadan o'qiydi. Mahalliy sinov:
+# db.sqlite3 ni nusxalab DB_REPLICA_NAME=replica.sqlite3 bering.
+
+REPLICA_DATABASE = None
+if ENV.get('DB_REPLICA_NAME') or ENV.get('DB_REPLICA_HOST'):
+    REPLICA_DATABASE = 'replica'
+    DATABASES[REPLICA_DATABASE] = {
+        **DATABASES['default'],
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        'NAME': ENV.get('DB_REPLICA_NAME') or DATABASES['default']['NAME'],
+        # Testlarda alohida baza yaratilmaydi — replika default'ning ko'zgusi
+        'TEST': {'MIRROR': 'default'},
+    }
+    if ENV.get('DB_REPLICA_HOST'):
+        DATABASES[REPLICA_DATABASE]['HOST'] = ENV.get('DB_REPLICA_HOST')
+        DATABASES[REPLICA_DATABASE]['PORT'] = ENV.get('DB_REPLICA_PORT', DATABASES['default'].get('PORT', ''))
+
+DATABASE_ROUTERS = ['savdo.routers.PrimaryReplicaRouter']
+# Buyurtma yozgan foydalanuvchi shuncha soniya asosiy bazadan o'qiydi (replikatsiya kechikishidan uzunroq)
+REPLICA_PIN_SECONDS = int(ENV.get('DB_REPLICA_PIN_SECONDS', 5))
+
+# Cache
+# REDIS_URL berilsa Redis, aks holda jarayon ichidagi LocMem kesh ishlatiladi.
+# Bir nechta worker (gunicorn/uvicorn --workers, bir nechta server) bilan ishlaganda REDIS_URL majburiy:
+# katalog versiyasi (savdo.catalog) barcha jarayonlarda umumiy bo'lmasa, bir worker'dagi o'zgarish
+# boshqalarining keshlangan javoblarini eskirtirmaydi; users/upsert/ ning Idempotency-Key yozuvlari ham
+# boshqa worker'ga tushgan takroriy so'rovda topilmaydi, replikadan o'qishdagi foydalanuvchi "pin"lari ham.
+# DEBUG=0 yoki WEB_CONCURRENCY>1 (gunicorn worker'lari soni) bo'lsa REDIS_URL'siz ishga tushmaydi.
+WEB_CONCURRENCY = int(ENV.get('WEB_CONCURRENCY') or 1)
+
+if ENV.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': ENV.get('REDIS_URL'),
+        }
+    }
+else:
+    if not DEBUG or WEB_CONCURRENCY > 1:
+        raise ImproperlyConfigured(
+            "DEBUG=0 yoki WEB_CONCURRENCY>1 bo'lsa REDIS_URL berilishi kerak: LocMem kesh har bir worker'da "
+            "alohida, katalog versiyasi, replika pin'lari va Idempotency-Key yozuvlari jarayonlar orasida bo'linmaydi"
+        )
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'savdo-cache',
+        }
     }
-}
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -140,6 +247,24 @@ STATIC_ROOT = BASE_DIR.joinpath('static')
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR.joinpath('media')
 
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+# STATIC_MANIFEST=1: collectstatic fayllarni tarkib xeshi bilan nomlaydi (base.3f1c2a9b8e7d.css) va
+# staticfiles.json manifestini yozadi. Natija git'dagi static/ ga emas, alohida build papkasiga
+# (STATIC_ROOT, standart — staticfiles/) yoziladi; DEBUG=0 bo'lsa deploy'da collectstatic talab qilinadi
+if env_flag('STATIC_MANIFEST', False):
+    STATIC_ROOT = Path(ENV.get('STATIC_ROOT') or BASE_DIR.joinpath('staticfiles'))
+    STORAGES["staticfiles"] = {"BACKEND": "django.contrib.staticfiles.storage.ManifestStaticFilesStorage"}
+
+# media/ va static/ fayllarini yuborish: '' — Django o'zi (FileResponse),
+# 'x-sendfile' — Apache/lighttpd, 'x-accel-redirect' — nginx (internal location kerak)
+SENDFILE_BACKEND = ENV.get("SENDFILE_BACKEND", "")
+SENDFILE_ACCEL_ROOT = ENV.get("SENDFILE_ACCEL_ROOT", "/_protected/")
+# Xeshlanmagan nomli fayllar uchun brauzer/CDN keshi (soniya); xeshlanganlar immutable
+MEDIA_CACHE_MAX_AGE = int(ENV.get("MEDIA_CACHE_MAX_AGE", 3600))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
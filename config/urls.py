@@ -4,7 +4,7 @@ from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 from rest_framework import permissions
 from django.conf.urls.i18n import i18n_patterns
-from django.views.static import serve
+from savdo.media import serve
 from django.conf import settings
 
 schema_view = get_schema_view(
@@ -25,8 +25,12 @@ urlpatterns = [
     re_path('swagger<format>/', schema_view.without_ui(cache_timeout=0), name='schema-json'),
     re_path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
     re_path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
-    re_path(r'^media/(?P<path>.*)$', serve, {'document_root': settings.MEDIA_ROOT}),
-    re_path(r'^static/(?P<path>.*)$', serve, {'document_root': settings.STATIC_ROOT}),
+    re_path(r'^media/(?P<path>.*)$', serve, {
+        'document_root': settings.MEDIA_ROOT, 'sendfile_location': settings.SENDFILE_ACCEL_ROOT + 'media/',
+    }),
+    re_path(r'^static/(?P<path>.*)$', serve, {
+        'document_root': settings.STATIC_ROOT, 'sendfile_location': settings.SENDFILE_ACCEL_ROOT + 'static/',
+    }),
 ]
 
 urlpatterns += i18n_patterns(
@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import User, Category, Product, Order, OrderItem, ProductNameCategory
+from django.core.files.storage import default_storage
+from .models import User, Category, Product, Order, OrderItem, ProductNameCategory, TelegramNotification
 from modeltranslation.admin import TranslationAdmin
 
 
@@ -54,6 +55,7 @@ class CategoryAdmin(TranslationAdmin, TaskAdmin):
 class ProductNameCategoryAdmin(admin.ModelAdmin):
     list_display = ('id', 'name', 'category',)
     list_display_links = ('id', 'name', 'category',)
+    list_select_related = ('category',)
     search_fields = ('name',)
     list_filter = ('category',)
     ordering = ('name',)
@@ -76,12 +78,16 @@ class ProductAdmin(TranslationAdmin, TaskAdmin):
     ordering = ('-id',)
     autocomplete_fields = ('name_category',)
     list_editable = ('price', 'available', 'quantity',)
+    list_select_related = ('name_category__category',)
     readonly_fields = ('image_preview',)
     list_per_page = 25
 
     def image_preview(self, obj):
         if obj.image:
-            return format_html(f'<img src="{obj.image.url}" width="50" height="50" style="border-radius:6px;" />')
+            # To'liq o'lchamli rasm o'rniga oldindan tayyorlangan kichik WebP
+            thumb = (obj.image_variants or {}).get('sizes', {}).get('thumb', {}).get('webp')
+            url = default_storage.url(thumb['name']) if thumb else obj.image.url
+            return format_html('<img src="{}" width="50" height="50" style="border-radius:6px;" />', url)
         return "—"
 
     image_preview.short_description = "Rasm"
@@ -115,6 +121,20 @@ class OrderAdmin(admin.ModelAdmin):
     ordering = ('-created_at',)
     readonly_fields = ('total_price', 'created_at')
     list_editable = ('status',)
+    list_select_related = ('user',)
     inlines = [OrderItemInline]
     list_per_page = 20
     autocomplete_fields = ('user',)
+
+
+# -------------------------------
+# TELEGRAM NOTIFICATION ADMIN
+# -------------------------------
+@admin.register(TelegramNotification)
+class TelegramNotificationAdmin(admin.ModelAdmin):
+    list_display = ('id', 'chat_id', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('chat_id', 'dedup_key', 'text')
+    ordering = ('-created_at',)
+    readonly_fields = ('created_at', 'sent_at', 'last_error')
+    list_per_page = 25
@@ -0,0 +1,308 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.db import connections, router, transaction
+from django.db.models import Count, F, Max, Sum, Value
+from django.db.models.functions import Greatest, TruncDate, TruncMonth
+from django.utils import timezone
+
+from .models import Order, OrderItem, CustomerMonthlyStats, DailyProductSales
+
+COUNTED_ORDERS = {"status": "completed", "is_confirmed": True}
+
+
+def month_start(value):
+    """Sana/vaqt uchun oyning birinchi kuni (mahalliy vaqt zonasida)."""
+    if isinstance(value, datetime):
+        value = timezone.localtime(value).date()
+    return value.replace(day=1)
+
+
+def month_bounds(month):
+    start = timezone.make_aware(datetime(month.year, month.month, 1))
+    if month.month == 12:
+        end = timezone.make_aware(datetime(month.year + 1, 1, 1))
+    else:
+        end = timezone.make_aware(datetime(month.year, month.month + 1, 1))
+    return start, end
+
+
+def is_counted(status, is_confirmed):
+    return status == COUNTED_ORDERS["status"] and bool(is_confirmed) == COUNTED_ORDERS["is_confirmed"]
+
+
+def refresh_customer_month(user_id, month):
+    """Bitta (foydalanuvchi, oy) qatorini shu oydagi buyurtmalaridan qayta hisoblaydi.
+
+    So'rov user_id indeksidan foydalanadi, shuning uchun status/summa qanday
+    o'zgarganidan qat'i nazar natija to'g'ri va arzon bo'ladi.
+    """
+    start, end = month_bounds(month)
+    row = Order.objects.filter(
+        user_id=user_id, created_at__gte=start, created_at__lt=end, **COUNTED_ORDERS
+    ).aggregate(total=Sum('total_price'), count=Count('id'), last=Max('created_at'))
+
+    if not row['count']:
+        CustomerMonthlyStats.objects.filter(user_id=user_id, month=month).delete()
+        return None
+
+    stats, _ = CustomerMonthlyStats.objects.update_or_create(
+        user_id=user_id, month=month,
+        defaults={
+            "total_spent": row['total'] or Decimal('0.00'),
+            "order_count": row['count'],
+            "last_order": row['last'],
+        },
+    )
+    return stats
+
+
+def refresh_customer_month_for_order(order):
+    return refresh_customer_month(order.user_id, month_start(order.created_at))
+
+
+def order_day(order):
+    return timezone.localtime(order.created_at).date()
+
+
+def refresh_rollups_for_order(order, product_ids=None):
+    """Hisobdagi buyurtmaning summasi yoki mahsulotlari o'zgarganda rollup'larni yangilaydi.
+
+    Kunlik savdodan faqat ``product_ids`` (berilmasa — buyurtmadagi mahsulotlar) qatorlari qayta hisoblanadi.
+    """
+    refresh_customer_month_for_order(order)
+    if product_ids is None:
+        product_ids = OrderItem.objects.filter(order_id=order.pk).values_list('product_id', flat=True)
+    refresh_daily_sales(order_day(order), product_ids)
+
+
+def update_rollups_on_state_change(order, was_counted, now_counted, claimed=True):
+    """Order.save dan: buyurtma hisobga kirsa o'z mahsulotlarini kunlik savdoga qo'shadi, chiqsa ayiradi.
+
+    ``claimed=False`` — eski holat bazadagidan farq qilgan (eskirgan obyekt saqlandi), delta ishonchsiz:
+    buyurtmaning kuni va mahsulotlari aniq qayta hisoblanadi.
+    """
+    if not claimed:
+        refresh_rollups_for_order(order)
+        return
+    if was_counted or now_counted:
+        refresh_customer_month_for_order(order)
+    if was_counted != now_counted:
+        apply_order_to_daily_sales(order, 1 if now_counted else -1)
+
+
+@transaction.atomic
+def rebuild_customer_stats(month=None):
+    """Rollup jadvalini buyurtmalardan to'liq (yoki bitta oy uchun) qayta quradi."""
+    orders = Order.objects.filter(**COUNTED_ORDERS)
+    stats = CustomerMonthlyStats.objects.all()
+    if month is not None:
+        start, end = month_bounds(month)
+        orders = orders.filter(created_at__gte=start, created_at__lt=end)
+        stats = stats.filter(month=month)
+
+    rows = (
+        orders
+        .annotate(period=TruncMonth('created_at'))
+        .values('user_id', 'period')
+        .annotate(total=Sum('total_price'), count=Count('id'), last=Max('created_at'))
+        .order_by()
+    )
+    stats.delete()
+    created = CustomerMonthlyStats.objects.bulk_create(
+        (
+            CustomerMonthlyStats(
+                user_id=row['user_id'], month=month_start(row['period']),
+                total_spent=row['total'] or Decimal('0.00'), order_count=row['count'], last_order=row['last'],
+            )
+            for row in rows.iterator(chunk_size=2000)
+        ),
+        batch_size=1000,
+    )
+    return len(created)
+
+
+def day_bounds(start, end):
+    """[start, end] sanalari (mahalliy) uchun [boshlanish, tugash) aware datetime oralig'i."""
+    return (
+        timezone.make_aware(datetime(start.year, start.month, start.day)),
+        timezone.make_aware(datetime(end.year, end.month, end.day)) + timedelta(days=1),
+    )
+
+
+def counted_items(start, end):
+    since, until = day_bounds(start, end)
+    return OrderItem.objects.filter(
+        order__created_at__gte=since, order__created_at__lt=until,
+        order__status=COUNTED_ORDERS["status"], order__is_confirmed=COUNTED_ORDERS["is_confirmed"],
+    )
+
+
+@transaction.atomic
+def build_daily_sales(start, end):
+    """[start, end] kunlari uchun DailyProductSales qatorlarini qayta quradi (idempotent).
+
+    Faqat build_daily_sales buyrug'i va backfill uchun — buyurtma yakunlanganda
+    ``apply_order_to_daily_sales`` faqat o'sha buyurtmaning mahsulotlarini yozadi.
+    """
+    rows = (
+        counted_items(start, end)
+        .annotate(day=TruncDate('order__created_at'))
+        .values('day', 'product_id', 'product__name_category__category_id')
+        .annotate(revenue=Sum('total_price'), units=Sum('quantity'), orders=Count('order_id', distinct=True))
+        .order_by()
+    )
+    DailyProductSales.objects.filter(date__gte=start, date__lte=end).delete()
+    created = DailyProductSales.objects.bulk_create(
+        (
+            DailyProductSales(
+                date=row['day'], product_id=row['product_id'],
+                category_id=row['product__name_category__category_id'],
+                revenue=row['revenue'] or Decimal('0.00'), units=row['units'] or Decimal('0.00'),
+                order_count=row['orders'],
+            )
+            for row in rows.iterator(chunk_size=2000)
+        ),
+        batch_size=1000,
+    )
+    return len(created)
+
+
+def order_product_sales(order_id):
+    return list(
+        OrderItem.objects
+        .filter(order_id=order_id)
+        .values('product_id', category_id=F('product__name_category__category_id'))
+        .annotate(revenue=Sum('total_price'), units=Sum('quantity'))
+        .order_by()
+    )
+
+
+def _upsert_daily_sales(day, rows, increment):
+    """(date, product) qatorlarini bitta ``INSERT ... ON CONFLICT DO UPDATE`` bilan yozadi.
+
+    ``increment`` bo'lsa qiymatlar mavjud qatorga qo'shiladi, aks holda almashtiriladi. Parallel
+    yakunlashlar bir xil qatorga tushsa ham unikal cheklov buzilmaydi.
+    """
+    if not rows:
+        return
+    alias = router.db_for_write(DailyProductSales)
+    connection = connections[alias]
+    if connection.vendor not in ("postgresql", "sqlite"):
+        for row in rows:
+            values = {name: row[name] for name in ('revenue', 'units', 'order_count')}
+            if increment:
+                values = {name: F(name) + value for name, value in values.items()}
+            updated = DailyProductSales.objects.using(alias).filter(
+                date=day, product_id=row['product_id']).update(category_id=row['category_id'], **values)
+            if not updated:
+                DailyProductSales.objects.using(alias).create(
+                    date=day, product_id=row['product_id'], category_id=row['category_id'],
+                    revenue=row['revenue'], units=row['units'], order_count=row['order_count'],
+                )
+        return
+
+    quote = connection.ops.quote_name
+    table = quote(DailyProductSales._meta.db_table)
+    fields = [DailyProductSales._meta.get_field(name) for name in
+              ('date', 'product', 'category', 'revenue', 'units', 'order_count')]
+    updates = [quote(f.column) for f in fields[2:]]
+    if increment:
+        updates = [updates[0] + f" = EXCLUDED.{updates[0]}"] + [
+            f"{column} = {table}.{column} + EXCLUDED.{column}" for column in updates[1:]
+        ]
+    else:
+        updates = [f"{column} = EXCLUDED.{column}" for column in updates]
+    params = []
+    for row in rows:
+        values = (day, row['product_id'], row['category_id'], row['revenue'], row['units'], row['order_count'])
+        params.extend(field.get_db_prep_save(value, connection) for field, value in zip(fields, values))
+    placeholders = "(" + ", ".join(["%s"] * len(fields)) + ")"
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} ({', '.join(quote(f.column) for f in fields)}) "
+            f"VALUES {', '.join([placeholders] * len(rows))} "
+            f"ON CONFLICT ({quote(fields[0].column)}, {quote(fields[1].column)}) DO UPDATE SET {', '.join(updates)}",
+            params,
+        )
+
+
+def apply_order_to_daily_sales(order, sign):
+    """Buyurtma mahsulotlarini kunlik savdoga qo'shadi (sign=1) yoki undan ayiradi (sign=-1).
+
+    Narx buyurtmadagi mahsulotlar soniga bog'liq, kunning boshqa buyurtmalari o'qilmaydi.
+    """
+    day = order_day(order)
+    rows = order_product_sales(order.pk)
+    if sign > 0:
+        _upsert_daily_sales(day, [{**row, 'order_count': 1} for row in rows], increment=True)
+        return
+    for row in rows:
+        DailyProductSales.objects.filter(date=day, product_id=row['product_id']).update(
+            revenue=F('revenue') - row['revenue'],
+            units=F('units') - row['units'],
+            order_count=Greatest(F('order_count') - 1, Value(0)),
+        )
+    DailyProductSales.objects.filter(
+        date=day, product_id__in=[row['product_id'] for row in rows], order_count=0
+    ).delete()
+
+
+def refresh_daily_sales(day, product_ids):
+    """Bitta kundagi berilgan mahsulotlar qatorlarini buyurtmalardan aniq qayta hisoblaydi."""
+    product_ids = list(product_ids)
+    if not product_ids:
+        return
+    rows = list(
+        counted_items(day, day)
+        .filter(product_id__in=product_ids)
+        .values('product_id', category_id=F('product__name_category__category_id'))
+        .annotate(revenue=Sum('total_price'), units=Sum('quantity'), order_count=Count('order_id', distinct=True))
+        .order_by()
+    )
+    _upsert_daily_sales(day, rows, increment=False)
+    DailyProductSales.objects.filter(date=day, product_id__in=product_ids).exclude(
+        product_id__in=[row['product_id'] for row in rows]
+    ).delete()
+
+
+def _totals(queryset, revenue, units):
+    return queryset.annotate(revenue=Sum(revenue), units=Sum(units))
+
+
+def sales_by_day(start, end, raw=False):
+    if raw:
+        queryset = counted_items(start, end).annotate(date=TruncDate('order__created_at')).values('date')
+        queryset = _totals(queryset, 'total_price', 'quantity')
+    else:
+        queryset = DailyProductSales.objects.filter(date__gte=start, date__lte=end).values('date')
+        queryset = _totals(queryset, 'revenue', 'units')
+    return list(queryset.order_by('date'))
+
+
+def sales_by_category(start, end, raw=False):
+    if raw:
+        queryset = counted_items(start, end).values(
+            category_id=F('product__name_category__category_id'),
+            category_name=F('product__name_category__category__name'),
+        )
+        queryset = _totals(queryset, 'total_price', 'quantity')
+    else:
+        queryset = DailyProductSales.objects.filter(date__gte=start, date__lte=end).values(
+            'category_id', category_name=F('category__name'),
+        )
+        queryset = _totals(queryset, 'revenue', 'units')
+    return list(queryset.order_by('-revenue', 'category_id'))
+
+
+def sales_by_product(start, end, limit=None, raw=False):
+    if raw:
+        queryset = counted_items(start, end).values('product_id', product_name=F('product__name'))
+        queryset = _totals(queryset, 'total_price', 'quantity')
+    else:
+        queryset = DailyProductSales.objects.filter(date__gte=start, date__lte=end).values(
+            'product_id', product_name=F('product__name'),
+        )
+        queryset = _totals(queryset, 'revenue', 'units')
+    queryset = queryset.order_by('-revenue', 'product_id')
+    return list(queryset[:limit] if limit else queryset)
@@ -0,0 +1,177 @@
+import hashlib
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db.models import Prefetch
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils import translation
+from django.utils.http import parse_etags, quote_etag
+
+from .models import Category, ProductNameCategory, Product
+
+CATALOG_VERSION_KEY = "catalog:version"
+CATALOG_TREE_KEY = "catalog:tree:{language}:{version}"
+CATALOG_TREE_TIMEOUT = 60 * 60 * 24
+CATALOG_RESPONSE_KEY = "catalog:response:{version}:{digest}"
+CATALOG_RESPONSE_TIMEOUT = 60 * 60
+CATALOG_RESPONSE_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+
+def _initial_version():
+    # Kesh tozalangan bo'lsa ham versiya eski qiymatlarga qaytmasligi uchun vaqtdan olinadi
+    return int(time.time() * 1000)
+
+
+def get_catalog_version():
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, _initial_version(), timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    try:
+        return cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        version = _initial_version()
+        cache.set(CATALOG_VERSION_KEY, version, timeout=None)
+        return version
+
+
+def build_catalog_tree(language):
+    """Category → ProductNameCategory → Product daraxti (3 ta so'rov)."""
+    products = Product.objects.order_by('id')
+    name_categories = ProductNameCategory.objects.order_by('id').prefetch_related(
+        Prefetch('product_names', queryset=products)
+    )
+    categories = Category.objects.order_by('id').prefetch_related(
+        Prefetch('products', queryset=name_categories)
+    )
+
+    with translation.override(language):
+        return [
+            {
+                "id": category.id,
+                "name": category.name,
+                "name_categories": [
+                    {
+                        "id": nc.id,
+                        "name": nc.name,
+                        "products": [
+                            {
+                                "id": p.id,
+                                "name": p.name,
+                                "price": float(p.price),
+                                "unit": p.unit,
+                                "available": p.available,
+                            } for p in nc.product_names.all()
+                        ],
+                    } for nc in category.products.all()
+                ],
+            } for category in categories
+        ]
+
+
+def get_catalog(language):
+    """Joriy versiya uchun keshlangan katalogni qaytaradi: (version, tree)."""
+    version = get_catalog_version()
+    key = CATALOG_TREE_KEY.format(language=language, version=version)
+    tree = cache.get(key)
+    if tree is None:
+        tree = build_catalog_tree(language)
+        cache.set(key, tree, timeout=CATALOG_TREE_TIMEOUT)
+    return version, tree
+
+
+def response_cache_key(request, version):
+    # Til, endpoint, query parametrlari va Accept (JSON/browsable API) bo'yicha
+    raw = "|".join([
+        translation.get_language() or "",
+        request.path,
+        repr(sorted(request.GET.lists())),
+        request.headers.get("Accept", ""),
+    ])
+    return CATALOG_RESPONSE_KEY.format(version=version, digest=hashlib.md5(raw.encode()).hexdigest())
+
+
+def _not_modified(request, etag):
+    if etag and etag in parse_etags(request.headers.get("If-None-Match", "")):
+        response = HttpResponseNotModified()
+        response["ETag"] = etag
+        return response
+    return None
+
+
+def catalog_response_from_cache(request, cached):
+    """Keshdagi ``(content, headers)`` dan javob; If-None-Match mos kelsa 304."""
+    content, headers = cached
+    not_modified = _not_modified(request, headers.get("ETag"))
+    if not_modified is not None:
+        return not_modified
+    response = HttpResponse(content)
+    for name, value in headers.items():
+        response[name] = value
+    return response
+
+
+def catalog_cache_entry(response):
+    """Render qilingan javobdan keshga yoziladigan ``(content, headers)``."""
+    headers = {name: response[name] for name in CATALOG_RESPONSE_HEADERS if response.has_header(name)}
+    return response.content, headers
+
+
+class CatalogResponseCacheMixin:
+    """Faqat o'qiladigan katalog endpointlari uchun tayyor JSON baytlarini keshlaydi.
+
+    Kalit katalog versiyasini o'z ichiga oladi, shuning uchun Category/ProductNameCategory/Product
+    o'zgarganda (signallar ``bump_catalog_version`` ni chaqiradi) eski yozuvlar o'z-o'zidan eskiradi.
+    Keshdan javob berilganda ORM, serializer va renderer umuman ishlamaydi.
+
+    Keshlangan view'lar replikadan o'qimaydi: kechikkan replika yozishdan keyingi birinchi o'tkazib
+    yuborishda eski ma'lumotni yangi versiya kaliti ostida bir soatga saqlab qo'yardi.
+    """
+    response_cache_timeout = CATALOG_RESPONSE_TIMEOUT
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method != "GET":
+            return super().dispatch(request, *args, **kwargs)
+
+        key = response_cache_key(request, get_catalog_version())
+        cached = cache.get(key)
+        if cached is not None:
+            return catalog_response_from_cache(request, cached)
+
+        response = super().dispatch(request, *args, **kwargs)
+        renderer = getattr(response, "accepted_renderer", None)
+        if response.status_code == 200 and renderer is not None and renderer.format == "json":
+            response.render()
+            cache.set(key, catalog_cache_entry(response), timeout=self.response_cache_timeout)
+        return response
+
+
+class AsyncCatalogResponseCacheMixin:
+    """``CatalogResponseCacheMixin`` ning async view'lar uchun varianti.
+
+    Async view'larda ``conditional_on`` yo'q, shuning uchun ETag javob tanasidan hisoblanadi
+    va keshdan yoki yangi javobda If-None-Match mos kelsa 304 qaytadi.
+    """
+    response_cache_timeout = CATALOG_RESPONSE_TIMEOUT
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method != "GET":
+            return await super().dispatch(request, *args, **kwargs)
+
+        key = response_cache_key(request, await sync_to_async(get_catalog_version)())
+        cached = await cache.aget(key)
+        if cached is not None:
+            return catalog_response_from_cache(request, cached)
+
+        response = await super().dispatch(request, *args, **kwargs)
+        if response.status_code != 200:
+            return response
+        etag = quote_etag(hashlib.md5(response.content).hexdigest())
+        response["ETag"] = etag
+        await cache.aset(key, catalog_cache_entry(response), timeout=self.response_cache_timeout)
+        return _not_modified(request, etag) or response
@@ -0,0 +1,33 @@
+from django.db.models import Count, Max
+from django.utils import translation
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+
+
+def conditional_on(get_queryset, *timestamp_fields):
+    """GET metodini ETag/Last-Modified bilan o'raydi; holat bitta ``MAX(updated_at)`` so'rovi bilan olinadi.
+
+    ``get_queryset(**kwargs)`` URL parametrlaridan queryset qaytaradi. ETag tilni,
+    qatorlar sonini (o'chirishlarni sezish uchun) va eng so'nggi o'zgarish vaqtini o'z ichiga oladi.
+    """
+    timestamp_fields = timestamp_fields or ('updated_at',)
+
+    def get_state(request, *args, **kwargs):
+        state = getattr(request, '_conditional_state', None)
+        if state is None:
+            aggregates = {f'last_{i}': Max(field) for i, field in enumerate(timestamp_fields)}
+            row = get_queryset(**kwargs).aggregate(count=Count('pk'), **aggregates)
+            stamps = [row[key] for key in aggregates if row[key] is not None]
+            state = (row['count'], max(stamps) if stamps else None)
+            request._conditional_state = state
+        return state
+
+    def etag_func(request, *args, **kwargs):
+        count, last_modified = get_state(request, *args, **kwargs)
+        stamp = int(last_modified.timestamp() * 1000000) if last_modified else 0
+        return f"{translation.get_language()}-{count}-{stamp}"
+
+    def last_modified_func(request, *args, **kwargs):
+        return get_state(request, *args, **kwargs)[1]
+
+    return method_decorator(condition(etag_func=etag_func, last_modified_func=last_modified_func))
@@ -0,0 +1,60 @@
+from django.db.models import F
+
+from .analytics import day_bounds
+from .models import User, Order, OrderItem
+from .streaming import STREAM_CHUNK_SIZE
+
+ORDER_ITEM_FIELDS = [
+    'order_id', 'created_at', 'status', 'is_confirmed', 'order_total', 'user_id', 'telegram_id',
+    'item_id', 'product_id', 'product_name', 'quantity', 'item_total',
+]
+ORDER_FIELDS = ['id', 'created_at', 'status', 'is_confirmed', 'total_price', 'user_id', 'telegram_id']
+USER_FIELDS = [
+    'id', 'telegram_id', 'first_name', 'user_name', 'age', 'phone_number', 'is_registered', 'language',
+    'created_at',
+]
+
+
+def _date_range(queryset, field, start=None, end=None):
+    if start:
+        queryset = queryset.filter(**{f'{field}__gte': day_bounds(start, start)[0]})
+    if end:
+        queryset = queryset.filter(**{f'{field}__lt': day_bounds(end, end)[1]})
+    return queryset
+
+
+def order_item_rows(start=None, end=None):
+    """Har bir OrderItem uchun buyurtma ma'lumotlari bilan bitta qator (JOIN bilan, modellar yaratilmaydi)."""
+    queryset = _date_range(OrderItem.objects.all(), 'order__created_at', start, end)
+    return (
+        queryset
+        .order_by('order_id', 'id')
+        .values(
+            'order_id', 'product_id', 'quantity',
+            item_id=F('id'),
+            created_at=F('order__created_at'),
+            status=F('order__status'),
+            is_confirmed=F('order__is_confirmed'),
+            order_total=F('order__total_price'),
+            user_id=F('order__user_id'),
+            telegram_id=F('order__user__telegram_id'),
+            product_name=F('product__name'),
+            item_total=F('total_price'),
+        )
+        .iterator(chunk_size=STREAM_CHUNK_SIZE)
+    )
+
+
+def order_rows(start=None, end=None):
+    queryset = _date_range(Order.objects.all(), 'created_at', start, end)
+    return (
+        queryset
+        .order_by('id')
+        .values(*ORDER_FIELDS[:-1], telegram_id=F('user__telegram_id'))
+        .iterator(chunk_size=STREAM_CHUNK_SIZE)
+    )
+
+
+def user_rows(start=None, end=None):
+    queryset = _date_range(User.objects.all(), 'created_at', start, end)
+    return queryset.order_by('created_at', 'id').values(*USER_FIELDS).iterator(chunk_size=STREAM_CHUNK_SIZE)
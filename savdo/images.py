@@ -0,0 +1,84 @@
+import hashlib
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+# Eng uzun tomon bo'yicha o'lchamlar (px)
+VARIANT_SIZES = {
+    "thumb": 160,
+    "medium": 640,
+}
+
+VARIANT_FORMATS = {
+    "webp": ("WEBP", "webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", "jpg", {"quality": 85, "optimize": True, "progressive": True}),
+}
+
+
+def file_sha256(source_name, storage=default_storage):
+    digest = hashlib.sha256()
+    with storage.open(source_name, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def variant_name(source_name, size, fmt):
+    base, _ = os.path.splitext(source_name)
+    return f"{base}__{size}.{VARIANT_FORMATS[fmt][1]}"
+
+
+def _encode(image, fmt):
+    pil_format, _, options = VARIANT_FORMATS[fmt]
+    if pil_format == "JPEG" and image.mode not in ("RGB", "L"):
+        # JPEG shaffoflikni qo'llamaydi — oq fon ustiga qo'yamiz
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        rgba = image.convert("RGBA")
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        image = background
+    elif image.mode not in ("RGB", "RGBA", "L"):
+        image = image.convert("RGBA")
+    buffer = BytesIO()
+    image.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def generate_variants(source_name, storage=default_storage):
+    """Asl rasm yonida thumbnail/WebP variantlarini yaratadi va ularning ma'lumotlarini qaytaradi.
+
+    Natija ``Product.image_variants`` ga yoziladi:
+    ``{"source", "width", "height", "sizes": {size: {fmt: {"name", "width", "height"}}}}``.
+    """
+    with storage.open(source_name, "rb") as f:
+        image = Image.open(f)
+        image = ImageOps.exif_transpose(image)
+        image.load()
+
+    result = {"source": source_name, "width": image.width, "height": image.height, "sizes": {}}
+    for size, edge in VARIANT_SIZES.items():
+        resized = image.copy()
+        resized.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+        result["sizes"][size] = {}
+        for fmt in VARIANT_FORMATS:
+            name = variant_name(source_name, size, fmt)
+            if storage.exists(name):
+                storage.delete(name)
+            saved = storage.save(name, ContentFile(_encode(resized, fmt)))
+            result["sizes"][size][fmt] = {"name": saved, "width": resized.width, "height": resized.height}
+    return result
+
+
+def delete_variants(variants, storage=default_storage):
+    for formats in (variants or {}).get("sizes", {}).values():
+        for info in formats.values():
+            if storage.exists(info["name"]):
+                storage.delete(info["name"])
+
+
+def variants_are_current(product):
+    if not product.image:
+        return not product.image_variants
+    return (product.image_variants or {}).get("source") == product.image.name
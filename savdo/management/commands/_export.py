@@ -0,0 +1,41 @@
+from abc import ABCMeta, abstractmethod
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from savdo.streaming import FORMATS, iter_export
+
+
+def parse_date(value):
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise CommandError(f"Sana YYYY-MM-DD formatida bo'lishi kerak: {value}")
+
+
+class ExportCommand(BaseCommand, metaclass=ABCMeta):
+    """export_orders/export_users uchun umumiy asos: ``get_rows`` (qatorlar, maydonlar) ni qaytaradi."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--from', dest='start', help="created_at >= shu kun (YYYY-MM-DD)")
+        parser.add_argument('--to', dest='end', help="created_at <= shu kun (YYYY-MM-DD)")
+        parser.add_argument('--file', help="Fayl yo'li; berilmasa stdout'ga yoziladi")
+
+    @abstractmethod
+    def get_rows(self, options, start, end):
+        """(qatorlar iteratori, maydonlar ro'yxati)"""
+
+    def handle(self, *args, **options):
+        rows, fields = self.get_rows(options, parse_date(options['start']), parse_date(options['end']))
+        chunks = iter_export(rows, fields, options['output'])
+
+        if options['file']:
+            with open(options['file'], 'w', encoding='utf-8', newline='') as f:
+                f.writelines(chunks)
+        else:
+            # call_command(..., stdout=...) ham ushlab olishi uchun self.stdout orqali
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
@@ -0,0 +1,23 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from savdo.analytics import rebuild_customer_stats
+
+
+class Command(BaseCommand):
+    help = "CustomerMonthlyStats rollup jadvalini yakunlangan buyurtmalardan qayta quradi."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', help="Faqat shu oy (YYYY-MM); berilmasa barcha oylar")
+
+    def handle(self, *args, **options):
+        month = None
+        if options['month']:
+            try:
+                month = datetime.strptime(options['month'], "%Y-%m").date()
+            except ValueError:
+                raise CommandError("--month YYYY-MM formatida bo'lishi kerak")
+
+        created = rebuild_customer_stats(month)
+        self.stdout.write(self.style.SUCCESS(f"{created} ta statistika qatori yaratildi."))
@@ -0,0 +1,178 @@
+import json
+import os
+import shlex
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from savdo.management.commands.loadtest import Recorder
+
+# profil: (server turi, endpoint prefiksi)
+PROFILES = {
+    "wsgi": ("wsgi", ""),
+    "wsgi-async": ("wsgi", "/async"),
+    "asgi-sync": ("asgi", ""),
+    "asgi-async": ("asgi", "/async"),
+}
+
+
+class Command(BaseCommand):
+    help = ("Qaynoq endpointlarning (users/<telegram_id>/, katalog, order_item_creat/, user_order_update/) "
+            "sinxron WSGI va async ASGI variantlarini parallel so'rovlar bilan solishtiradi. "
+            "ASGI uchun uvicorn (yoki --asgi-command bilan daphne) o'rnatilgan bo'lishi kerak.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', default='wsgi,asgi-sync,asgi-async',
+                            help=f"Vergul bilan: {', '.join(PROFILES)}")
+        parser.add_argument('--users', type=int, default=32, help="Parallel mijozlar soni")
+        parser.add_argument('--duration', type=float, default=15, help="Har bir profil uchun (soniya)")
+        parser.add_argument('--port', type=int, default=8766)
+        parser.add_argument('--timeout', type=float, default=30)
+        parser.add_argument('--wsgi-command', default='{python} manage.py runserver --noreload 127.0.0.1:{port}')
+        parser.add_argument('--asgi-command',
+                            default='{python} -m uvicorn config.asgi:application --host 127.0.0.1 --port {port}',
+                            help="Masalan: 'daphne -b 127.0.0.1 -p {port} config.asgi:application'")
+        parser.add_argument('--output', default='benchmark_async.json')
+
+    def handle(self, *args, **options):
+        names = [name.strip() for name in options['profiles'].split(',') if name.strip()]
+        unknown = [name for name in names if name not in PROFILES]
+        if unknown:
+            raise CommandError(f"Noma'lum profil: {', '.join(unknown)}")
+
+        results = {}
+        with tempfile.TemporaryDirectory(prefix='savdo-bench-') as workdir:
+            # Barcha profillar bitta (WAL) SQLite bazasida ishlaydi — farq faqat server va view'larda
+            env = {**os.environ, "DB_ENGINE": "sqlite", "DB_NAME": os.path.join(workdir, 'bench.sqlite3')}
+            self.prepare_database(env)
+
+            for name in names:
+                self.stdout.write(f"--- {name}")
+                try:
+                    results[name] = self.run_profile(name, env, options)
+                except CommandError as e:
+                    self.stderr.write(f"{name}: {e}")
+                    results[name] = {"error": str(e)}
+                    continue
+                summary = results[name]['summary']
+                for label, stats in summary['endpoints'].items():
+                    self.stdout.write(
+                        f"{label:35} n={stats['requests']:<6} err={stats['errors']:<4} rps={stats['rps']:<8} "
+                        f"p50={stats['p50_ms']:>8}ms p95={stats['p95_ms']:>8}ms p99={stats['p99_ms']:>8}ms"
+                    )
+                self.stdout.write(self.style.SUCCESS(
+                    f"{name}: {summary['total_requests']} so'rov, {summary['rps']} req/s, "
+                    f"xatolar {summary['total_errors']}"
+                ))
+
+        with open(options['output'], 'w') as f:
+            json.dump({
+                "started_at": datetime.now().isoformat(timespec='seconds'),
+                "params": {key: options[key] for key in ('users', 'duration')},
+                "profiles": results,
+            }, f, indent=2, ensure_ascii=False)
+        self.stdout.write(f"→ {options['output']}")
+
+    def prepare_database(self, env):
+        for args in (['migrate', '-v0'], ['benchmark_writes', '--prepare']):
+            result = subprocess.run(
+                [sys.executable, str(settings.BASE_DIR / 'manage.py'), *args],
+                env=env, capture_output=True, text=True,
+            )
+            if result.returncode != 0:
+                raise CommandError(f"{' '.join(args)} bajarilmadi:\n{result.stderr.strip()[-500:]}")
+
+    def run_profile(self, name, env, options):
+        server_type, prefix = PROFILES[name]
+        template = options['asgi_command'] if server_type == 'asgi' else options['wsgi_command']
+        command = shlex.split(template.format(python=shlex.quote(sys.executable), port=options['port']))
+        server = subprocess.Popen(command, cwd=settings.BASE_DIR, env=env,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        base_url = f"http://127.0.0.1:{options['port']}"
+        try:
+            self.wait_for_server(server, base_url)
+            return self.run_load(name, base_url, prefix, options)
+        finally:
+            server.terminate()
+            server.wait()
+
+    def wait_for_server(self, server, base_url, attempts=50):
+        for _ in range(attempts):
+            if server.poll() is not None:
+                raise CommandError(f"Server ishga tushmadi:\n{server.stderr.read().strip()[-500:]}")
+            try:
+                requests.get(base_url + '/cat_list/', timeout=1)
+                return
+            except requests.RequestException:
+                time.sleep(0.2)
+        raise CommandError(f"Server javob bermadi: {base_url}")
+
+    def run_load(self, name, base_url, prefix, options):
+        http = requests.Session()
+        category_id = http.get(base_url + '/cat_list/').json()[0]['id']
+        name_category_id = http.get(f'{base_url}/category_to_name/{category_id}/').json()[0]['id']
+        product_ids = [p['id'] for p in http.get(f'{base_url}/namecat_to_product/{name_category_id}/').json()]
+
+        recorder = Recorder()
+        run_id = int(time.time())
+        deadline = None
+
+        def call(session, label, method, path, **kwargs):
+            started = time.perf_counter()
+            try:
+                response = session.request(method, base_url + prefix + path, timeout=options['timeout'], **kwargs)
+            except requests.RequestException:
+                recorder.record(label, time.perf_counter() - started, ok=False)
+                return
+            recorder.record(label, time.perf_counter() - started, ok=response.status_code < 400)
+
+        def worker(n):
+            session = requests.Session()
+            # Foydalanuvchi va buyurtma sinxron endpointlar orqali yaratiladi, o'lchovga kirmaydi
+            telegram_id = f"bench-{name}-{run_id}-{n}"
+            user = session.post(base_url + '/create_user/', json={
+                "telegram_id": telegram_id, "first_name": f"Bench {n}", "language": "uz",
+            }, timeout=options['timeout'])
+            if user.status_code != 201:
+                return
+            user_id = user.json()['id']
+            order = session.post(base_url + '/order_creat/', json={"user": user_id, "status": "preparing"},
+                                 timeout=options['timeout'])
+            if order.status_code != 201:
+                return
+            order_id = order.json()['id']
+
+            i = 0
+            while time.monotonic() < deadline:
+                call(session, 'users/<telegram_id>/', 'GET', f'/users/{telegram_id}/')
+                call(session, 'cat_list/', 'GET', '/cat_list/')
+                call(session, 'category_to_name/<id>/', 'GET', f'/category_to_name/{category_id}/')
+                call(session, 'namecat_to_product/<id>/', 'GET', f'/namecat_to_product/{name_category_id}/')
+                call(session, 'order_item_creat/', 'POST', '/order_item_creat/', json={
+                    "order": order_id, "product": product_ids[(n + i) % len(product_ids)], "quantity": "1",
+                })
+                call(session, 'user_order_update/<user_id>/', 'PATCH', f'/user_order_update/{user_id}/',
+                     json={"is_confirmed": True})
+                i += 1
+
+        deadline = time.monotonic() + options['duration']
+        started = time.monotonic()
+        threads = [threading.Thread(target=worker, args=(n,), daemon=True) for n in range(options['users'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+
+        return {
+            "prefix": prefix,
+            "elapsed_seconds": round(elapsed, 2),
+            "summary": recorder.summary(elapsed),
+        }
@@ -0,0 +1,142 @@
+import json
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from savdo.analytics import build_daily_sales, sales_by_day, sales_by_category, sales_by_product
+from savdo.models import User, Category, ProductNameCategory, Product, Order, OrderItem
+
+
+@contextmanager
+def explicit_created_at():
+    # Sintetik buyurtmalarga o'tmish sanalarini berish uchun auto_now_add vaqtincha o'chiriladi
+    field = Order._meta.get_field('created_at')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def normalize(rows):
+    return [
+        {key: (round(Decimal(value), 2) if key in ('revenue', 'units') else value) for key, value in row.items()}
+        for row in rows
+    ]
+
+
+class Command(BaseCommand):
+    help = ("Sintetik ma'lumotlarda (standart 1 000 000 OrderItem) /stats/ so'rovlarini DailyProductSales "
+            "jadvali va to'g'ridan-to'g'ri OrderItem agregatsiyasi bo'yicha solishtiradi. "
+            "Barcha ma'lumotlar oxirida rollback qilinadi.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=1_000_000)
+        parser.add_argument('--items-per-order', type=int, default=5)
+        parser.add_argument('--products', type=int, default=1000)
+        parser.add_argument('--days', type=int, default=365)
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--output', help="Natijalarni JSON faylga yozish")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.seed(options)
+            result = self.measure(options)
+            transaction.set_rollback(True)
+
+        for row in result['queries']:
+            self.stdout.write(
+                f"{row['query']:10} {row['days']:>4} kun  raw={row['raw_ms']:>10.2f}ms  "
+                f"rollup={row['rollup_ms']:>8.2f}ms  x{row['speedup']:<8} mos={row['match']}"
+            )
+        self.stdout.write(f"Rollup qurish: {result['build_ms']:.0f}ms ({result['rollup_rows']} qator)")
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(result, f, indent=2, default=str)
+
+        if not all(row['match'] for row in result['queries']):
+            self.stderr.write(self.style.ERROR("Rollup natijalari xom so'rov bilan mos kelmadi!"))
+
+    def seed(self, options):
+        rnd = random.Random(42)
+        now = timezone.now()
+        started = time.perf_counter()
+
+        categories = Category.objects.bulk_create(Category(name=f"bench-cat-{i}") for i in range(20))
+        name_categories = ProductNameCategory.objects.bulk_create(
+            ProductNameCategory(category=categories[i % 20], name=f"bench-type-{i}") for i in range(100)
+        )
+        products = Product.objects.bulk_create(
+            Product(name=f"bench-{i}", name_category=name_categories[i % 100],
+                    price=Decimal(rnd.randint(10, 500) * 100), quantity=Decimal('100000'))
+            for i in range(options['products'])
+        )
+        users = User.objects.bulk_create(User(first_name=f"bench-{i}") for i in range(5000))
+
+        order_count = max(options['items'] // options['items_per_order'], 1)
+        with explicit_created_at():
+            orders = Order.objects.bulk_create(
+                (
+                    Order(user=users[i % len(users)], status='completed' if i % 10 else 'cancelled',
+                          is_confirmed=True, created_at=now - timedelta(minutes=rnd.randint(0, options['days'] * 1440)))
+                    for i in range(order_count)
+                ),
+                batch_size=5000,
+            )
+
+        def items():
+            for order in orders:
+                for product in rnd.sample(products, options['items_per_order']):
+                    quantity = Decimal(rnd.randint(1, 5))
+                    yield OrderItem(order=order, product=product, quantity=quantity,
+                                    total_price=product.price * quantity)
+
+        OrderItem.objects.bulk_create(items(), batch_size=5000)
+        self.stdout.write(
+            f"{len(orders)} buyurtma, {len(orders) * options['items_per_order']} OrderItem "
+            f"{time.perf_counter() - started:.1f}s da yaratildi."
+        )
+
+    def measure(self, options):
+        today = timezone.localdate()
+        first_day = today - timedelta(days=options['days'])
+
+        started = time.perf_counter()
+        rollup_rows = build_daily_sales(first_day, today)
+        build_ms = (time.perf_counter() - started) * 1000
+
+        queries = {
+            'daily': sales_by_day,
+            'category': sales_by_category,
+            'product': lambda start, end, raw: sales_by_product(start, end, limit=20, raw=raw),
+        }
+        rows = []
+        for days in (7, 30, options['days']):
+            start = today - timedelta(days=days - 1)
+            for name, func in queries.items():
+                timings = {}
+                answers = {}
+                for raw in (True, False):
+                    best = None
+                    for _ in range(options['repeat']):
+                        t0 = time.perf_counter()
+                        answers[raw] = func(start, today, raw=raw)
+                        elapsed = (time.perf_counter() - t0) * 1000
+                        best = elapsed if best is None else min(best, elapsed)
+                    timings[raw] = best
+                rows.append({
+                    "query": name,
+                    "days": days,
+                    "raw_ms": round(timings[True], 2),
+                    "rollup_ms": round(timings[False], 2),
+                    "speedup": round(timings[True] / timings[False], 1) if timings[False] else None,
+                    "match": normalize(answers[True]) == normalize(answers[False]),
+                })
+        return {"items": options['items'], "build_ms": build_ms, "rollup_rows": rollup_rows, "queries": rows}
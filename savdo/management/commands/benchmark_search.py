@@ -0,0 +1,126 @@
+import json
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from savdo.management.commands.loadtest import percentile
+from savdo.models import Category, ProductNameCategory, Product
+from savdo.search import rebuild_search_index, search_product_ids
+
+UZ_SYLLABLES = ["ol", "ma", "qo", "vun", "no", "k", "uz", "um", "sab", "zi", "pi", "yoz", "gu", "lob", "to", "mat",
+                "bod", "ring", "sut", "qa", "ymoq", "non", "go‘sht", "tuz", "shakar", "choy", "ka", "ram", "be", "hi",
+                "an", "jir", "o‘rik", "shaf", "to‘li", "ker", "ak", "lim", "on", "pa", "xta", "yog‘", "un", "gur"]
+RU_SYLLABLES = ["яб", "ло", "ко", "ды", "ня", "гру", "ша", "ви", "но", "град", "мо", "хлеб", "мя", "со", "сыр", "чай",
+                "са", "хар", "по", "ми", "дор", "ка", "пус", "та", "ар", "буз", "пер", "сик", "лук", "мас", "рис",
+                "ро", "ны", "кру", "па", "ке", "фир"]
+
+
+def make_vocabulary(rnd, syllables, size):
+    return sorted({"".join(rnd.choice(syllables) for _ in range(rnd.randint(2, 3))) for _ in range(size)})
+
+
+def make_typo(rnd, word):
+    # Bitta harfni almashtirish — eng ko'p uchraydigan imlo xatosi
+    i = rnd.randrange(1, len(word))
+    return word[:i] + rnd.choice("aeiouxy") + word[i + 1:]
+
+
+class Command(BaseCommand):
+    help = ("Sintetik katalogda (standart 100 000 mahsulot) products/search/ qidiruvining tezligini o'lchaydi. "
+            "Barcha ma'lumotlar oxirida rollback qilinadi.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=100_000)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument('--output', help="Natijalarni JSON faylga yozish")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.seed(options)
+            result = self.measure(options)
+            transaction.set_rollback(True)
+
+        for row in result['queries']:
+            self.stdout.write(
+                f"{row['q']:24} natija={row['results']:<3} p50={row['p50_ms']:>7.2f}ms "
+                f"p95={row['p95_ms']:>7.2f}ms max={row['max_ms']:>7.2f}ms"
+            )
+        self.stdout.write(
+            f"{connection.vendor}: {result['products']} mahsulot, indeks {result['index_ms']:.0f}ms, "
+            f"umumiy p95={result['p95_ms']:.2f}ms"
+        )
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(result, f, indent=2, ensure_ascii=False)
+
+    def seed(self, options):
+        rnd = random.Random(42)
+        started = time.perf_counter()
+        uz_words = make_vocabulary(rnd, UZ_SYLLABLES, 4000)
+        ru_words = make_vocabulary(rnd, RU_SYLLABLES, 4000)
+        category = Category.objects.create(name="bench-search")
+        name_categories = ProductNameCategory.objects.bulk_create(
+            ProductNameCategory(category=category, name=f"bench-search-{i}") for i in range(100)
+        )
+
+        def products():
+            for i in range(options['products']):
+                name_uz = " ".join(rnd.sample(uz_words, 2)).capitalize()
+                yield Product(
+                    name=name_uz, name_uz=name_uz,
+                    name_ru=" ".join(rnd.sample(ru_words, 2)).capitalize(),
+                    description_uz=" ".join(rnd.sample(uz_words, 10)),
+                    description_ru=" ".join(rnd.sample(ru_words, 10)),
+                    name_category=name_categories[i % 100], price=Decimal('1000'), quantity=Decimal('10'),
+                )
+
+        Product.objects.bulk_create(products(), batch_size=5000)
+
+        # To'g'ri, imlo xatoli, prefiks va ikki so'zli so'rovlar
+        self.queries = []
+        for vocabulary in (uz_words, ru_words):
+            for word in rnd.sample([w for w in vocabulary if len(w) >= 5], 3):
+                self.queries += [word, make_typo(rnd, word), word[:3]]
+            self.queries.append(" ".join(rnd.sample(vocabulary, 2)))
+        self.stdout.write(f"{options['products']} mahsulot {time.perf_counter() - started:.1f}s da yaratildi.")
+
+    def measure(self, options):
+        started = time.perf_counter()
+        rebuild_search_index()
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE savdo_product')
+        index_ms = (time.perf_counter() - started) * 1000
+
+        rows = []
+        everything = []
+        for q in self.queries:
+            timings = []
+            for _ in range(options['repeat']):
+                t0 = time.perf_counter()
+                ids = search_product_ids(q, limit=options['limit'])
+                # Endpoint kabi mahsulotlarning o'zini ham o'qiymiz
+                list(Product.objects.with_category().filter(id__in=ids))
+                timings.append((time.perf_counter() - t0) * 1000)
+            timings.sort()
+            everything.extend(timings)
+            rows.append({
+                "q": q,
+                "results": len(ids),
+                "p50_ms": round(percentile(timings, 50), 2),
+                "p95_ms": round(percentile(timings, 95), 2),
+                "max_ms": round(timings[-1], 2),
+            })
+        everything.sort()
+        return {
+            "database": connection.vendor,
+            "products": options['products'],
+            "index_ms": index_ms,
+            "p95_ms": round(percentile(everything, 95), 2),
+            "queries": rows,
+        }
@@ -0,0 +1,219 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from decimal import Decimal
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from savdo.management.commands.loadtest import Recorder
+
+# Har bir profil settings.py dagi DB_* muhit o'zgaruvchilari orqali tanlanadi
+PROFILES = {
+    "sqlite": {"DB_ENGINE": "sqlite", "DB_SQLITE_TUNED": "0"},
+    "sqlite-wal": {"DB_ENGINE": "sqlite", "DB_SQLITE_TUNED": "1"},
+    "postgres": {"DB_ENGINE": "postgresql"},
+    "postgres-pool": {"DB_ENGINE": "postgresql", "DB_POOL": "1"},
+}
+
+
+class Command(BaseCommand):
+    help = ("order_creat/ + order_item_creat/ yozish o'tkazuvchanligini DB profillari (SQLite standart, "
+            "SQLite WAL, PostgreSQL) bo'yicha solishtiradi. Har bir profil uchun alohida runserver ishga tushiriladi; "
+            "PostgreSQL ulanishi DB_NAME/DB_USER/DB_PASSWORD/DB_HOST/DB_PORT dan olinadi.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', default='sqlite,sqlite-wal',
+                            help=f"Vergul bilan: {', '.join(PROFILES)}")
+        parser.add_argument('--users', type=int, default=16, help="Parallel yozuvchilar soni")
+        parser.add_argument('--duration', type=float, default=15, help="Har bir profil uchun (soniya)")
+        parser.add_argument('--items-per-order', type=int, default=3)
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--timeout', type=float, default=30)
+        parser.add_argument('--output', default='benchmark_writes.json')
+        # Ichki: spawn qilingan jarayon joriy (muhitdan tanlangan) bazaga sinov ma'lumotlarini yozadi
+        parser.add_argument('--prepare', action='store_true', help="Faqat mahsulotlarni yaratib, id'larini chiqaradi")
+        # Ichki: PostgreSQL profillari uchun alohida <DB_NAME>_bench bazasini yaratish/o'chirish
+        parser.add_argument('--create-database', metavar='NAME', help=argparse.SUPPRESS)
+        parser.add_argument('--drop-database', metavar='NAME', help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if options['prepare']:
+            self.stdout.write(json.dumps(self.prepare()))
+            return
+        if options['create_database'] or options['drop_database']:
+            self.manage_database(options['create_database'], options['drop_database'])
+            return
+
+        names = [name.strip() for name in options['profiles'].split(',') if name.strip()]
+        unknown = [name for name in names if name not in PROFILES]
+        if unknown:
+            raise CommandError(f"Noma'lum profil: {', '.join(unknown)}")
+
+        results = {}
+        with tempfile.TemporaryDirectory(prefix='savdo-bench-') as workdir:
+            for name in names:
+                self.stdout.write(f"--- {name}")
+                try:
+                    results[name] = self.run_profile(name, workdir, options)
+                except CommandError as e:
+                    self.stderr.write(f"{name}: {e}")
+                    results[name] = {"error": str(e)}
+                    continue
+                summary = results[name]['summary']
+                for label, stats in summary['endpoints'].items():
+                    self.stdout.write(
+                        f"{label:20} n={stats['requests']:<6} err={stats['errors']:<4} rps={stats['rps']:<8} "
+                        f"p50={stats['p50_ms']:>8}ms p95={stats['p95_ms']:>8}ms p99={stats['p99_ms']:>8}ms"
+                    )
+                self.stdout.write(self.style.SUCCESS(
+                    f"{name}: {results[name]['orders']} buyurtma, {summary['rps']} yozish/s, "
+                    f"xatolar {summary['total_errors']}"
+                ))
+
+        with open(options['output'], 'w') as f:
+            json.dump({
+                "started_at": datetime.now().isoformat(timespec='seconds'),
+                "params": {key: options[key] for key in ('users', 'duration', 'items_per_order')},
+                "profiles": results,
+            }, f, indent=2, ensure_ascii=False)
+        self.stdout.write(f"→ {options['output']}")
+
+    def prepare(self):
+        from savdo.models import Category, ProductNameCategory, Product
+
+        category = Category.objects.create(name="bench-writes")
+        name_category = ProductNameCategory.objects.create(category=category, name="bench-writes")
+        products = Product.objects.bulk_create(
+            Product(name=f"bench-{i}", name_uz=f"bench-{i}", name_category=name_category,
+                    price=Decimal('1000'), quantity=Decimal('1000000'))
+            for i in range(20)
+        )
+        return [product.id for product in products]
+
+    def manage_database(self, create, drop):
+        if connection.vendor != 'postgresql':
+            raise CommandError("Faqat PostgreSQL profillari uchun")
+        quote = connection.ops.quote_name
+        # Bazaning o'ziga emas, "postgres" xizmat bazasiga ulanib bajariladi
+        with connection._nodb_cursor() as cursor:
+            if drop:
+                cursor.execute(f"DROP DATABASE IF EXISTS {quote(drop)}")
+            if create:
+                cursor.execute(f"CREATE DATABASE {quote(create)}")
+
+    def manage(self, env, *args, **kwargs):
+        return subprocess.run(
+            [sys.executable, str(settings.BASE_DIR / 'manage.py'), *args],
+            env=env, capture_output=True, text=True, **kwargs,
+        )
+
+    def run_profile(self, name, workdir, options):
+        env = {**os.environ, **PROFILES[name]}
+        if env['DB_ENGINE'] == 'sqlite':
+            env['DB_NAME'] = os.path.join(workdir, f'{name}.sqlite3')
+            return self.run_on_database(name, env, options)
+
+        # PostgreSQL: ish bazasiga tegmaslik uchun har safar yangi <DB_NAME>_bench bazasi
+        admin_env = {**env, 'DB_POOL': '0'}
+        bench_name = f"{env.get('DB_NAME', 'savdo')}_bench"
+        created = self.manage(admin_env, 'benchmark_writes', '--drop-database', bench_name,
+                              '--create-database', bench_name)
+        if created.returncode != 0:
+            raise CommandError(f"{bench_name} bazasi yaratilmadi:\n{created.stderr.strip()[-500:]}")
+        try:
+            return self.run_on_database(name, {**env, 'DB_NAME': bench_name}, options)
+        finally:
+            self.manage(admin_env, 'benchmark_writes', '--drop-database', bench_name)
+
+    def run_on_database(self, name, env, options):
+        migrated = self.manage(env, 'migrate', '-v0')
+        if migrated.returncode != 0:
+            raise CommandError(f"migrate bajarilmadi:\n{migrated.stderr.strip()[-500:]}")
+        prepared = self.manage(env, 'benchmark_writes', '--prepare')
+        if prepared.returncode != 0:
+            raise CommandError(f"Ma'lumot tayyorlanmadi:\n{prepared.stderr.strip()[-500:]}")
+        product_ids = json.loads(prepared.stdout.strip().splitlines()[-1])
+
+        base_url = f"http://127.0.0.1:{options['port']}"
+        server = subprocess.Popen(
+            [sys.executable, str(settings.BASE_DIR / 'manage.py'), 'runserver', '--noreload',
+             f"127.0.0.1:{options['port']}"],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            self.wait_for_server(base_url)
+            return self.run_writes(name, base_url, product_ids, options)
+        finally:
+            server.terminate()
+            server.wait()
+
+    def wait_for_server(self, base_url, attempts=50):
+        for _ in range(attempts):
+            try:
+                requests.get(base_url + '/cat_list/', timeout=1)
+                return
+            except requests.RequestException:
+                time.sleep(0.2)
+        raise CommandError(f"Server javob bermadi: {base_url}")
+
+    def run_writes(self, name, base_url, product_ids, options):
+        recorder = Recorder()
+        orders = [0]
+        lock = threading.Lock()
+        run_id = int(time.time())
+
+        def call(http, label, path, payload):
+            started = time.perf_counter()
+            try:
+                response = http.post(base_url + path, json=payload, timeout=options['timeout'])
+            except requests.RequestException:
+                recorder.record(label, time.perf_counter() - started, ok=False)
+                return None
+            # "database is locked" kabi xatolar 500 bo'lib qaytadi
+            recorder.record(label, time.perf_counter() - started, ok=response.status_code == 201)
+            return response if response.status_code == 201 else None
+
+        def worker(n):
+            http = requests.Session()
+            response = http.post(base_url + '/create_user/', json={
+                "telegram_id": f"bench-{name}-{run_id}-{n}", "first_name": f"Bench {n}", "language": "uz",
+            }, timeout=options['timeout'])
+            if response.status_code != 201:
+                return
+            user_id = response.json()['id']
+            while time.monotonic() < deadline:
+                response = call(http, 'order_creat/', '/order_creat/', {"user": user_id, "status": "preparing"})
+                if response is None:
+                    continue
+                order_id = response.json()['id']
+                for i in range(options['items_per_order']):
+                    call(http, 'order_item_creat/', '/order_item_creat/', {
+                        "order": order_id, "product": product_ids[(n + i) % len(product_ids)], "quantity": "1",
+                    })
+                with lock:
+                    orders[0] += 1
+
+        deadline = time.monotonic() + options['duration']
+        started = time.monotonic()
+        threads = [threading.Thread(target=worker, args=(n,), daemon=True) for n in range(options['users'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+
+        return {
+            "env": PROFILES[name],
+            "elapsed_seconds": round(elapsed, 2),
+            "orders": orders[0],
+            "summary": recorder.summary(elapsed),
+        }
@@ -0,0 +1,37 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from savdo.analytics import build_daily_sales
+from savdo.models import Order
+
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise CommandError(f"Sana YYYY-MM-DD formatida bo'lishi kerak: {value}")
+
+
+class Command(BaseCommand):
+    help = "DailyProductSales jadvalini berilgan kunlar (yoki barcha buyurtmalar) uchun qayta quradi."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='start', help="Boshlanish sanasi (YYYY-MM-DD)")
+        parser.add_argument('--to', dest='end', help="Tugash sanasi (YYYY-MM-DD), shu kun ham kiradi")
+
+    def handle(self, *args, **options):
+        bounds = Order.objects.aggregate(first=Min('created_at'), last=Max('created_at'))
+        if options['start']:
+            start = parse_date(options['start'])
+        elif bounds['first']:
+            start = timezone.localtime(bounds['first']).date()
+        else:
+            self.stdout.write("Buyurtmalar yo'q.")
+            return
+        end = parse_date(options['end']) if options['end'] else timezone.localdate()
+
+        created = build_daily_sales(start, end)
+        self.stdout.write(self.style.SUCCESS(f"{start} — {end}: {created} ta qator yaratildi."))
@@ -0,0 +1,16 @@
+from savdo.exports import order_item_rows, order_rows, ORDER_ITEM_FIELDS, ORDER_FIELDS
+
+from ._export import ExportCommand
+
+
+class Command(ExportCommand):
+    help = "Buyurtmalarni (standart — har bir OrderItem qatori) CSV/JSONL ko'rinishida oqim bilan eksport qiladi."
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--level', choices=['items', 'orders'], default='items')
+
+    def get_rows(self, options, start, end):
+        if options['level'] == 'orders':
+            return order_rows(start, end), ORDER_FIELDS
+        return order_item_rows(start, end), ORDER_ITEM_FIELDS
@@ -0,0 +1,10 @@
+from savdo.exports import user_rows, USER_FIELDS
+
+from ._export import ExportCommand
+
+
+class Command(ExportCommand):
+    help = "Foydalanuvchilarni CSV/JSONL ko'rinishida oqim bilan eksport qiladi."
+
+    def get_rows(self, options, start, end):
+        return user_rows(start, end), USER_FIELDS
@@ -0,0 +1,59 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand
+from django.db.models.functions import Now
+
+from savdo.catalog import bump_catalog_version
+from savdo.images import generate_variants, delete_variants, variants_are_current, file_sha256
+from savdo.models import Product
+
+
+def _generate(product_id, source_name):
+    try:
+        return product_id, (generate_variants(source_name), file_sha256(source_name)), None
+    except OSError as e:
+        return product_id, None, str(e)
+
+
+class Command(BaseCommand):
+    help = "Mavjud mahsulot rasmlari uchun thumbnail/WebP variantlarini parallel (process pool) yaratadi."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help="Jarayonlar soni (standart — CPU soni)")
+        parser.add_argument('--force', action='store_true', help="Variantlari bor rasmlarni ham qayta yaratish")
+
+    def handle(self, *args, **options):
+        products = (
+            Product.objects.exclude(image='').exclude(image=None)
+            .only('id', 'image', 'image_variants', 'image_hash')
+        )
+        pending = {p.pk: p for p in products if options['force'] or not variants_are_current(p)}
+        if not pending:
+            self.stdout.write("Barcha rasmlar uchun variantlar mavjud.")
+            return
+
+        for product in pending.values():
+            if not variants_are_current(product):
+                delete_variants(product.image_variants)
+
+        done = failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=django.setup) as pool:
+            futures = [pool.submit(_generate, pk, p.image.name) for pk, p in pending.items()]
+            for future in as_completed(futures):
+                product_id, result, error = future.result()
+                if error:
+                    failed += 1
+                    self.stderr.write(f"#{product_id}: {error}")
+                    continue
+                variants, image_hash = result
+                fields = {"image_variants": variants}
+                if image_hash != pending[product_id].image_hash:
+                    fields.update(image_hash=image_hash, telegram_file_id="")
+                done += Product.objects.filter(pk=product_id).update(updated_at=Now(), **fields)
+
+        if done:
+            # UPDATE signal chaqirmaydi — keshlangan products/<id>/ javoblari eski rasmlarni bermasligi uchun
+            bump_catalog_version()
+
+        self.stdout.write(self.style.SUCCESS(f"{done} ta rasm tayyorlandi, {failed} ta xatolik."))
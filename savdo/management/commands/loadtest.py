@@ -0,0 +1,237 @@
+import json
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = max(int(round(pct / 100 * len(sorted_values))) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+class BotSession:
+    """Bitta bot foydalanuvchisining API bilan ishlash oqimini takrorlaydi."""
+
+    def __init__(self, base_url, telegram_id, recorder, items_per_order, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.telegram_id = telegram_id
+        self.recorder = recorder
+        self.items_per_order = items_per_order
+        self.timeout = timeout
+        self.http = requests.Session()
+        self.user_id = None
+
+    def call(self, label, method, path, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = self.http.request(method, self.base_url + path, timeout=self.timeout, **kwargs)
+        except requests.RequestException:
+            self.recorder.record(label, time.perf_counter() - started, ok=False)
+            return None
+        self.recorder.record(label, time.perf_counter() - started, ok=response.status_code < 500)
+        return response
+
+    def ensure_user(self):
+        response = self.call('users/<telegram_id>/', 'GET', f'/users/{self.telegram_id}/')
+        if response is not None and response.status_code == 200:
+            self.user_id = response.json()['id']
+            return
+        response = self.call('create_user/', 'POST', '/create_user/', json={
+            "telegram_id": self.telegram_id, "first_name": f"Load {self.telegram_id}", "language": "uz",
+        })
+        if response is not None and response.status_code == 201:
+            self.user_id = response.json()['id']
+
+    def browse_catalog(self):
+        response = self.call('cat_list/', 'GET', '/cat_list/')
+        if response is None or response.status_code != 200 or not response.json():
+            return []
+        category = random.choice(response.json())
+
+        response = self.call('category_to_name/<id>/', 'GET', f"/category_to_name/{category['id']}/")
+        if response is None or response.status_code != 200 or not response.json():
+            return []
+        name_category = random.choice(response.json())
+
+        response = self.call('namecat_to_product/<id>/', 'GET', f"/namecat_to_product/{name_category['id']}/")
+        if response is None or response.status_code != 200:
+            return []
+        return [p['id'] for p in response.json() if p.get('available')]
+
+    def place_order(self, product_ids):
+        response = self.call('order_creat/', 'POST', '/order_creat/', json={
+            "user": self.user_id, "status": "preparing",
+        })
+        if response is None or response.status_code != 201:
+            return False
+        order_id = response.json()['id']
+
+        for product_id in random.sample(product_ids, min(self.items_per_order, len(product_ids))):
+            self.call('order_item_creat/', 'POST', '/order_item_creat/', json={
+                "order": order_id, "product": product_id, "quantity": "1",
+            })
+
+        self.call('user_order_update/<user_id>/', 'PATCH', f'/user_order_update/{self.user_id}/', json={
+            "is_confirmed": True,
+        })
+        return True
+
+    def run_iteration(self):
+        """Bitta buyurtma oqimi; foydalanuvchi yaratilmasa, katalog bo'sh bo'lsa yoki buyurtma ochilmasa False."""
+        if self.user_id is None:
+            self.ensure_user()
+            if self.user_id is None:
+                return False
+        product_ids = self.browse_catalog()
+        if not product_ids:
+            return False
+        return self.place_order(product_ids)
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, label, seconds, ok=True):
+        with self.lock:
+            self.latencies[label].append(seconds * 1000)
+            if not ok:
+                self.errors[label] += 1
+
+    def summary(self, elapsed):
+        endpoints = {}
+        for label, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            endpoints[label] = {
+                "requests": len(values),
+                "errors": self.errors[label],
+                "rps": round(len(values) / elapsed, 2),
+                "p50_ms": round(percentile(values, 50), 2),
+                "p95_ms": round(percentile(values, 95), 2),
+                "p99_ms": round(percentile(values, 99), 2),
+                "max_ms": round(values[-1], 2),
+            }
+        total = sum(e["requests"] for e in endpoints.values())
+        return {
+            "total_requests": total,
+            "total_errors": sum(self.errors.values()),
+            "rps": round(total / elapsed, 2),
+            "endpoints": endpoints,
+        }
+
+
+class Command(BaseCommand):
+    help = ("Bot trafigini (ro'yxatdan o'tish, katalog, buyurtma, mahsulot qo'shish, tasdiqlash) "
+            "parallel foydalanuvchilar bilan API'ga yuboradi va p50/p95/p99 natijalarni JSON'ga yozadi.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--users', type=int, default=10, help="Parallel bot foydalanuvchilari soni")
+        parser.add_argument('--duration', type=float, default=30, help="Sinov davomiyligi (soniya)")
+        parser.add_argument('--items-per-order', type=int, default=3)
+        parser.add_argument('--timeout', type=float, default=10)
+        parser.add_argument('--output', default='loadtest_results.json')
+        parser.add_argument('--spawn-server', action='store_true',
+                            help="--base-url portida 'runserver --noreload' ni o'zi ishga tushiradi")
+
+    def handle(self, *args, **options):
+        server = self.spawn_server(options['base_url']) if options['spawn_server'] else None
+        try:
+            self.wait_for_server(options['base_url'])
+            result = self.run_load(options)
+        finally:
+            if server:
+                server.terminate()
+                server.wait()
+
+        with open(options['output'], 'w') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+
+        for label, stats in result['summary']['endpoints'].items():
+            self.stdout.write(
+                f"{label:35} n={stats['requests']:<6} err={stats['errors']:<4} "
+                f"p50={stats['p50_ms']:>8}ms p95={stats['p95_ms']:>8}ms p99={stats['p99_ms']:>8}ms"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Jami: {result['summary']['total_requests']} so'rov, {result['summary']['rps']} req/s "
+            f"→ {options['output']}"
+        ))
+
+    def spawn_server(self, base_url):
+        address = base_url.split('://', 1)[-1].rstrip('/')
+        return subprocess.Popen(
+            [sys.executable, str(settings.BASE_DIR / 'manage.py'), 'runserver', '--noreload', address],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+
+    def wait_for_server(self, base_url, attempts=50):
+        for _ in range(attempts):
+            try:
+                requests.get(base_url.rstrip('/') + '/cat_list/', timeout=1)
+                return
+            except requests.RequestException:
+                time.sleep(0.2)
+        raise CommandError(f"Server javob bermadi: {base_url}")
+
+    def run_load(self, options):
+        recorder = Recorder()
+        started_at = datetime.now().isoformat(timespec='seconds')
+        deadline = time.monotonic() + options['duration']
+        run_id = int(time.time())
+
+        def worker(n):
+            session = BotSession(
+                options['base_url'], f"load-{run_id}-{n}", recorder,
+                options['items_per_order'], options['timeout'],
+            )
+            backoff = 0.05
+            while time.monotonic() < deadline:
+                if session.run_iteration():
+                    backoff = 0.05
+                    continue
+                # Bo'sh iteratsiya (server xatosi, bo'sh katalog) — serverni to'xtovsiz urmaslik uchun kutamiz
+                time.sleep(min(backoff, max(deadline - time.monotonic(), 0)))
+                backoff = min(backoff * 2, 1)
+
+        started = time.monotonic()
+        threads = [threading.Thread(target=worker, args=(n,), daemon=True) for n in range(options['users'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+
+        return {
+            "started_at": started_at,
+            "commit": self.git_commit(),
+            "database": settings.DATABASES['default']['ENGINE'],
+            "params": {
+                "base_url": options['base_url'],
+                "users": options['users'],
+                "duration": options['duration'],
+                "items_per_order": options['items_per_order'],
+            },
+            "elapsed_seconds": round(elapsed, 2),
+            "summary": recorder.summary(elapsed),
+        }
+
+    @staticmethod
+    def git_commit():
+        try:
+            return subprocess.check_output(
+                ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR, stderr=subprocess.DEVNULL, text=True
+            ).strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from savdo.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = ("Mahsulot qidiruvi indeksini (SQLite FTS5 jadvallari) qayta quradi. "
+            "bulk_create/import kabi signalsiz o'zgarishlardan keyin ishlatiladi; PostgreSQL'da kerak emas.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            count = rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS(f"{count} ta mahsulot indekslandi."))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from savdo.notifications import TelegramDispatcher
+
+
+class Command(BaseCommand):
+    help = "Navbatdagi Telegram xabarlarini partiyalab yuboradi (worker)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Bitta partiyani yuborib to'xtaydi")
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--idle-sleep', type=float, default=1.0,
+                            help="Navbat bo'sh bo'lganda kutish vaqti (soniya)")
+
+    def handle(self, *args, **options):
+        dispatcher = TelegramDispatcher(batch_size=options['batch_size'])
+
+        if options['once']:
+            sent = dispatcher.dispatch_once()
+            self.stdout.write(self.style.SUCCESS(f"{sent} ta xabar yuborildi."))
+            return
+
+        self.stdout.write("Xabarlar dispatcheri ishga tushdi...")
+        try:
+            dispatcher.run(idle_sleep=options['idle_sleep'])
+        except KeyboardInterrupt:
+            self.stdout.write("To'xtatildi.")
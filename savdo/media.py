@@ -0,0 +1,152 @@
+import mimetypes
+import posixpath
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_etags, quote_etag
+
+# ManifestStaticFilesStorage nomlari: "base.3f1c2a9b8e7d.css" — tarkib o'zgarsa nom ham o'zgaradi
+HASHED_NAME_RE = re.compile(r"\.[0-9a-f]{12}\.[^./]+$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+CHUNK_SIZE = 64 * 1024
+
+SENDFILE_HEADERS = {
+    "x-sendfile": "X-Sendfile",
+    "x-accel-redirect": "X-Accel-Redirect",
+}
+
+
+class RangeFile:
+    """Faylning [start, start + length) qismini FileResponse uchun bo'laklab o'qiydi."""
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.file.seek(start)
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b""
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def file_etag(stat):
+    # Hajm va o'zgartirish vaqti (ns) — fayl almashtirilsa ETag ham o'zgaradi
+    return quote_etag(f"{stat.st_size:x}-{stat.st_mtime_ns:x}")
+
+
+def cache_control_for(path):
+    if HASHED_NAME_RE.search(path):
+        return IMMUTABLE_CACHE_CONTROL
+    return f"public, max-age={settings.MEDIA_CACHE_MAX_AGE}"
+
+
+def parse_range(header, size):
+    """``Range: bytes=a-b`` ni (start, end) ga aylantiradi; noto'g'ri/ko'p oraliqli bo'lsa None.
+
+    Oraliq fayldan tashqarida bo'lsa ValueError.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if size == 0:
+        # Bo'sh faylda qondiriladigan oraliq yo'q (bytes=-N ham 0--1 bo'lib qolardi)
+        raise ValueError(header)
+    if not first:
+        # bytes=-500 — oxirgi 500 bayt
+        length = int(last)
+        if length == 0:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def serve(request, path, document_root=None, sendfile_location=None):
+    """``django.views.static.serve`` o'rniga: ETag/Cache-Control, Range va sendfile bilan.
+
+    ``settings.SENDFILE_BACKEND`` berilsa fayl tanasini veb-server (Apache X-Sendfile yoki
+    nginx X-Accel-Redirect) yuboradi, aks holda FileResponse bo'laklab o'qiydi.
+    """
+    path = posixpath.normpath(path).lstrip("/")
+    try:
+        fullpath = Path(safe_join(document_root, path))
+    except SuspiciousFileOperation:
+        raise Http404("Fayl topilmadi")
+    if not fullpath.is_file():
+        raise Http404("Fayl topilmadi")
+
+    stat = fullpath.stat()
+    etag = file_etag(stat)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(stat.st_mtime),
+        "Cache-Control": cache_control_for(path),
+        "Accept-Ranges": "bytes",
+    }
+
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match and (etag in parse_etags(if_none_match) or if_none_match.strip() == "*"):
+        response = HttpResponseNotModified()
+        for name in ("ETag", "Cache-Control", "Last-Modified"):
+            response[name] = headers[name]
+        return response
+
+    content_type, encoding = mimetypes.guess_type(str(fullpath))
+    content_type = content_type or "application/octet-stream"
+
+    backend = SENDFILE_HEADERS.get(settings.SENDFILE_BACKEND)
+    if backend:
+        response = HttpResponse(content_type=content_type)
+        if backend == "X-Accel-Redirect":
+            response[backend] = posixpath.join(sendfile_location, path)
+        else:
+            response[backend] = str(fullpath)
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+    byte_range = None
+    range_header = request.headers.get("Range")
+    if_range = request.headers.get("If-Range")
+    if range_header and (not if_range or if_range.strip() == etag):
+        try:
+            byte_range = parse_range(range_header, stat.st_size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{stat.st_size}"
+            return response
+
+    if byte_range is None:
+        response = FileResponse(fullpath.open("rb"), content_type=content_type)
+    else:
+        start, end = byte_range
+        response = FileResponse(
+            RangeFile(fullpath.open("rb"), start, end - start + 1), status=206, content_type=content_type
+        )
+        response["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+        response["Content-Length"] = end - start + 1
+    response.block_size = CHUNK_SIZE
+    if encoding:
+        response["Content-Encoding"] = encoding
+    for name, value in headers.items():
+        response[name] = value
+    return response
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:30
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('savdo', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TelegramNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chat_id', models.CharField(max_length=100)),
+                ('text', models.TextField()),
+                ('parse_mode', models.CharField(blank=True, default='', max_length=20)),
+                ('dedup_key', models.CharField(blank=True, max_length=100, null=True)),
+                ('status', models.CharField(choices=[('pending', 'Navbatda'), ('sent', 'Yuborilgan'), ('failed', 'Xatolik')], default='pending', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='notification_queue_idx'), models.Index(fields=['dedup_key', 'status'], name='notification_dedup_idx')],
+            },
+        ),
+    ]
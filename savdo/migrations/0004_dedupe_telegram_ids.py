@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:37
+
+from django.db import migrations
+from django.db.models import Count
+
+
+def dedupe_telegram_ids(apps, schema_editor):
+    User = apps.get_model('savdo', 'User')
+    Order = apps.get_model('savdo', 'Order')
+
+    # Bo'sh satrlar unique indeksga xalaqit bermasligi uchun NULL qilinadi
+    User.objects.filter(telegram_id='').update(telegram_id=None)
+
+    duplicates = (
+        User.objects.exclude(telegram_id=None)
+        .values('telegram_id')
+        .annotate(n=Count('id'))
+        .filter(n__gt=1)
+        .values_list('telegram_id', flat=True)
+    )
+    for telegram_id in list(duplicates):
+        # Ro'yxatdan o'tgan, eng birinchi yaratilgan yozuv qoldiriladi, buyurtmalar unga o'tkaziladi
+        users = list(User.objects.filter(telegram_id=telegram_id).order_by('-is_registered', 'id'))
+        keep, extra = users[0], [u.pk for u in users[1:]]
+        Order.objects.filter(user_id__in=extra).update(user_id=keep.pk)
+        User.objects.filter(pk__in=extra).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('savdo', '0003_catalog_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_telegram_ids, migrations.RunPython.noop),
+    ]
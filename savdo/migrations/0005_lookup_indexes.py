@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('savdo', '0004_dedupe_telegram_ids'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='telegram_id',
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['user', '-created_at'], name='order_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['user', 'is_confirmed', '-created_at'], name='order_user_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('is_confirmed', True), ('status', 'completed')), fields=['created_at'], name='order_completed_created_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('savdo', '0005_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomerMonthlyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('total_spent', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('order_count', models.PositiveIntegerField(default=0)),
+                ('last_order', models.DateTimeField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_stats', to='savdo.user')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['month', '-total_spent'], name='customer_month_top_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'month'), name='customer_month_unique')],
+            },
+        ),
+    ]
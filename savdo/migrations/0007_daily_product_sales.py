@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('savdo', '0006_customer_monthly_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyProductSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('units', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('order_count', models.PositiveIntegerField(default=0)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='savdo.category')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='savdo.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['category', 'date'], name='daily_sales_category_idx'), models.Index(fields=['product', 'date'], name='daily_sales_product_idx')],
+                'constraints': [models.UniqueConstraint(fields=('date', 'product'), name='daily_product_sales_unique')],
+            },
+        ),
+    ]
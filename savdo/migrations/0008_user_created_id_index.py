@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('savdo', '0007_daily_product_sales'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['created_at', 'id'], name='user_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('savdo', '0009_product_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='image_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='telegram_file_id',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+    ]
@@ -0,0 +1,90 @@
+import re
+
+from django.db import migrations
+
+# Migratsiya savdo.search ga bog'lanmasligi uchun indekslash qoidalarining shu paytdagi nusxasi
+
+PG_DOCUMENT = (
+    "(setweight(to_tsvector('simple'::regconfig, coalesce(name_uz, '') || ' ' || coalesce(name_ru, '')), 'A') || "
+    "setweight(to_tsvector('simple'::regconfig, coalesce(description_uz, '') || ' ' || coalesce(description_ru, '')), 'B'))"
+)
+PG_INDEXES = {
+    "product_search_doc_idx": f"USING gin ({PG_DOCUMENT})",
+    "product_name_uz_trgm_idx": "USING gin (name_uz gin_trgm_ops)",
+    "product_name_ru_trgm_idx": "USING gin (name_ru gin_trgm_ops)",
+}
+SQLITE_TABLES = [
+    ("savdo_product_fts", "CREATE VIRTUAL TABLE savdo_product_fts USING fts5("
+                          "name_uz, name_ru, description_uz, description_ru, tokenize='unicode61 remove_diacritics 2')"),
+    ("savdo_search_term", "CREATE TABLE savdo_search_term (id INTEGER PRIMARY KEY, term TEXT NOT NULL UNIQUE)"),
+    ("savdo_search_term_fts", "CREATE VIRTUAL TABLE savdo_search_term_fts USING fts5(term, tokenize='trigram')"),
+]
+FTS_COLUMNS = ("name_uz", "name_ru", "description_uz", "description_ru")
+APOSTROPHES_RE = re.compile(r"[‘’ʻʼ`']")
+WORD_RE = re.compile(r"[^\W_]+")
+
+
+def normalize(text):
+    return APOSTROPHES_RE.sub("", (text or "").lower())
+
+
+def index_rows(cursor, rows):
+    """rows: (id, name_uz, name_ru, description_uz, description_ru)"""
+    terms = set()
+    values = []
+    for pk, *texts in rows:
+        texts = [normalize(text) for text in texts]
+        values.append([pk, *texts])
+        for text in texts:
+            terms.update(WORD_RE.findall(text))
+    cursor.executemany(
+        "INSERT INTO savdo_product_fts (rowid, name_uz, name_ru, description_uz, description_ru) "
+        "VALUES (%s, %s, %s, %s, %s)", values
+    )
+    # Trigram lug'ati: 3 harfdan qisqa so'zlar kiritilmaydi
+    for term in sorted(terms):
+        if len(term) < 3:
+            continue
+        cursor.execute("INSERT OR IGNORE INTO savdo_search_term (term) VALUES (%s)", [term])
+        if cursor.rowcount == 1:
+            cursor.execute(
+                "INSERT INTO savdo_search_term_fts (rowid, term) VALUES (%s, %s)", [cursor.lastrowid, f" {term} "]
+            )
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for name, definition in PG_INDEXES.items():
+            schema_editor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON savdo_product {definition}")
+    elif vendor == "sqlite":
+        for _, sql in SQLITE_TABLES:
+            schema_editor.execute(sql)
+        # Mavjud mahsulotlar bilan to'ldirish
+        Product = apps.get_model("savdo", "Product")
+        rows = list(Product.objects.using(schema_editor.connection.alias).values_list("id", *FTS_COLUMNS))
+        if rows:
+            with schema_editor.connection.cursor() as cursor:
+                index_rows(cursor, rows)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        for name in PG_INDEXES:
+            schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+    elif vendor == "sqlite":
+        for table, _ in reversed(SQLITE_TABLES):
+            schema_editor.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('savdo', '0010_product_telegram_file_id'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -1,9 +1,66 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from decimal import Decimal
 
 
+class FieldTrackerMixin:
+    """Bazadan yuklangan maydon qiymatlarini eslab qoladi: ``has_changed('status')``, ``previous('status')``.
+
+    Qiymatlar ``from_db``, ``refresh_from_db`` va ``save`` dan keyin yangilanadi, shuning uchun
+    eski holatni bilish uchun qo'shimcha SELECT kerak emas. ``tracked_fields`` — oddiy maydonlar
+    (ForeignKey uchun ``user_id`` kabi attname).
+    """
+    tracked_fields = ()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._loaded_values = {}
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot()
+        return instance
+
+    def _snapshot(self, fields=None):
+        deferred = self.get_deferred_fields()
+        for name in self.tracked_fields:
+            if (fields is None or name in fields) and name not in deferred:
+                self._loaded_values[name] = getattr(self, name)
+
+    def is_tracked(self, name):
+        return name in self._loaded_values
+
+    def previous(self, name):
+        """Bazadagi (oxirgi yuklangan/saqlangan) qiymat; yangi obyekt yoki yuklanmagan maydon uchun None."""
+        return self._loaded_values.get(name)
+
+    def has_changed(self, name):
+        if name not in self._loaded_values:
+            return True
+        return self._loaded_values[name] != getattr(self, name)
+
+    def load_previous(self):
+        """pk bilan qo'lda yaratilgan yoki only()/defer() bilan yuklangan obyekt uchun yetishmagan qiymatlarni o'qiydi."""
+        missing = [name for name in self.tracked_fields if name not in self._loaded_values]
+        if missing and self.pk is not None:
+            row = type(self)._base_manager.filter(pk=self.pk).values(*missing).first()
+            if row:
+                self._loaded_values.update(row)
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        self._snapshot(fields)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._snapshot(kwargs.get("update_fields"))
+
+
 class User(models.Model):
-    telegram_id = models.CharField(max_length=100, blank=True, null=True)
+    telegram_id = models.CharField(max_length=100, blank=True, null=True, unique=True)
     first_name = models.CharField(max_length=100, blank=True, null=True)
     user_name = models.CharField(max_length=100, default="no username")
     age = models.PositiveIntegerField(blank=True, null=True)
@@ -12,12 +69,19 @@ class User(models.Model):
     language = models.CharField(max_length=20, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # users/ ro'yxatidagi (created_at, id) kursor paginatsiyasi uchun
+            models.Index(fields=['created_at', 'id'], name='user_created_id_idx'),
+        ]
+
     def __str__(self):
         return f"{self.first_name} {self.user_name} ({self.phone_number})"
 
 
 class Category(models.Model):
     name = models.CharField(max_length=255, unique=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
@@ -26,27 +90,41 @@ class Category(models.Model):
 class ProductNameCategory(models.Model):
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name="products")
     name = models.CharField(max_length=255, unique=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.name} -- {self.category.name}"
 
 
+class ProductQuerySet(models.QuerySet):
+    def with_category(self):
+        return self.select_related('name_category__category')
+
+
 class Product(models.Model):
     name = models.CharField(max_length=50)
     name_category = models.ForeignKey(ProductNameCategory, on_delete=models.CASCADE, related_name="product_names")
     price = models.DecimalField(max_digits=10, decimal_places=2)
     unit = models.CharField(max_length=50, default="dona")
     image = models.ImageField(upload_to='products/', blank=True, null=True)
+    # Oldindan tayyorlangan thumbnail/WebP variantlari (savdo.images.generate_variants)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    # Rasm tarkibining sha256 xeshi va shu rasm uchun Telegram qaytargan file_id
+    image_hash = models.CharField(max_length=64, blank=True, default="", editable=False)
+    telegram_file_id = models.CharField(max_length=255, blank=True, default="", editable=False)
     available = models.BooleanField(default=True)
     quantity = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
     description = models.TextField(blank=True, null=True, max_length=100)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = ProductQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.name} ({self.name_category.name})"
 
     @property
     def image_path(self):
-        return self.image.path
+        return self.image.path if self.image else None
 
     def save(self, *args, **kwargs):
         if self.quantity <= 0:
@@ -56,7 +134,15 @@ class Product(models.Model):
         super().save(*args, **kwargs)
 
 
-class Order(models.Model):
+class OrderQuerySet(models.QuerySet):
+    def with_items(self):
+        # OrderSerializer uchun: mahsulot va kategoriya nomlari bitta qo'shimcha so'rovda
+        return self.prefetch_related(
+            models.Prefetch('items', queryset=OrderItem.objects.select_related('product__name_category__category'))
+        )
+
+
+class Order(FieldTrackerMixin, models.Model):
     STATUS_CHOICES = [
         ('preparing', "🍳 Buyurtmangiz kutilmoqda"),
         ('delivering', "🚚 Buyurtmangiz qabul qilindi"),
@@ -69,46 +155,192 @@ class Order(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='new')
     total_price = models.DecimalField(max_digits=12, decimal_places=2, default=0)
 
+    objects = OrderQuerySet.as_manager()
+    tracked_fields = ("status", "is_confirmed")
+
+    class Meta:
+        indexes = [
+            # Foydalanuvchining oxirgi buyurtmasi (user_orders, user_order_update)
+            models.Index(fields=['user', '-created_at'], name='order_user_created_idx'),
+            # Faol buyurtmalar: user_id va is_confirmed tengligi, -created_at tartibida (status qatorda tekshiriladi)
+            models.Index(fields=['user', 'is_confirmed', '-created_at'], name='order_user_active_idx'),
+            # Oylik statistika faqat yakunlangan va tasdiqlangan buyurtmalarni ko'radi
+            models.Index(
+                fields=['created_at'],
+                name='order_completed_created_idx',
+                condition=models.Q(status='completed', is_confirmed=True),
+            ),
+        ]
+
     def __str__(self):
         return f"Order #{self.id} — {self.user.first_name or self.user.telegram_id}"
 
+    @classmethod
+    def recalculate_total(cls, order_id, order=None, product_ids=None):
+        """Umumiy summani bitta UPDATE ... SET total_price = (SELECT SUM ...) bilan bazada hisoblaydi.
+
+        ``product_ids`` — mahsulotlari o'zgargan qatorlar; buyurtma hisobda bo'lsa (yakunlangan va
+        tasdiqlangan) oylik mijoz statistikasi va shu mahsulotlarning kunlik savdosi ham yangilanadi.
+        ``order`` berilmasa holati bazadan o'qiladi.
+        """
+        items_total = (
+            OrderItem.objects
+            .filter(order_id=OuterRef('pk'))
+            .values('order_id')
+            .annotate(total=Sum('total_price'))
+            .values('total')
+        )
+        updated = cls.objects.filter(pk=order_id).update(
+            total_price=Coalesce(
+                Subquery(items_total),
+                Value(Decimal('0.00')),
+                output_field=models.DecimalField(max_digits=12, decimal_places=2),
+            )
+        )
+        if product_ids:
+            from .analytics import COUNTED_ORDERS, is_counted, refresh_rollups_for_order
+
+            if order is None:
+                order = cls.objects.filter(pk=order_id, **COUNTED_ORDERS).first()
+            if order is not None and is_counted(order.status, order.is_confirmed):
+                refresh_rollups_for_order(order, product_ids=product_ids)
+        return updated
+
     def calculate_total(self):
-        total = sum((item.total_price or 0) for item in self.items.all())
-        self.total_price = total
-        self.save(update_fields=["total_price"])
-        return total
+        Order.recalculate_total(self.pk)
+        self.refresh_from_db(fields=["total_price"])
+        return self.total_price
 
     def save(self, *args, **kwargs):
-        # Avval eski holatni olish uchun bazadan tekshiramiz
-        if self.pk:
-            old_status = Order.objects.get(pk=self.pk).status
-        else:
-            old_status = None
+        from .services import decrement_stock_for_order
+        from .analytics import is_counted, update_rollups_on_state_change
 
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            # Eski holat from_db da eslab qolingan — odatda qo'shimcha o'qish kerak emas
+            self.load_previous()
+            old_status = self.previous("status")
+            old_confirmed = bool(self.previous("is_confirmed"))
+
+            update_fields = kwargs.get("update_fields")
+            writes_state = update_fields is None or {"status", "is_confirmed"} & set(update_fields)
+            # Holat maydonlari yozilmasa hisobga kirish/chiqish ham bo'lmaydi
+            new_status, new_confirmed = (self.status, self.is_confirmed) if writes_state else (old_status, old_confirmed)
+            completing = new_status == "completed" and old_status != "completed"
+            claimed = True
+            if writes_state and self.pk is not None and not self._state.adding:
+                # Holat o'tishini shartli UPDATE bilan "egallaymiz": bazada hali eslab qolingan holat bo'lsa
+                # qator qulflanadi va delta aniq. 0 qator — obyekt eskirgan (boshqa so'rov holatni o'zgartirgan)
+                claimed = bool(
+                    Order.objects.filter(pk=self.pk, status=old_status, is_confirmed=old_confirmed)
+                    .update(status=new_status, is_confirmed=new_confirmed)
+                )
+                if not claimed and completing:
+                    # Parallel yakunlashda zaxirani faqat bitta so'rov kamaytiradi
+                    completing = bool(
+                        Order.objects.filter(pk=self.pk).exclude(status="completed").update(status="completed")
+                    )
+                    if not completing:
+                        # Bazada allaqachon 'completed' — status signali ham xabar yubormaydi
+                        self._loaded_values["status"] = "completed"
 
-        # ✅ Agar status 'completed' bo'lsa, Product miqdorini kamaytirish
-        if self.status == "completed" and old_status != "completed":
-            for item in self.items.all():
-                product = item.product
-                if product.quantity >= item.quantity:
-                    product.quantity -= item.quantity
-                else:
-                    product.quantity = Decimal('0.00')
-                    product.available = False  # agar qolmasa, mavjud emas deb belgilanadi
-                product.save(update_fields=["quantity", "available"])
+            super().save(*args, **kwargs)
 
+            # ✅ Agar status 'completed' bo'lsa, Product miqdorini kamaytirish
+            if completing:
+                decrement_stock_for_order(self)
 
-class OrderItem(models.Model):
+            # Oylik mijoz statistikasi va kunlik savdo shu tranzaksiyada yangilanadi
+            update_rollups_on_state_change(
+                self, is_counted(old_status, old_confirmed), is_counted(new_status, new_confirmed), claimed
+            )
+
+
+class OrderItem(FieldTrackerMixin, models.Model):
     order = models.ForeignKey('Order', on_delete=models.CASCADE, related_name='items')
     product = models.ForeignKey('Product', on_delete=models.CASCADE)
     quantity = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('1.00'))
     total_price = models.DecimalField(max_digits=12, decimal_places=2, default=0)
 
+    # Mahsulot almashtirilsa, eski mahsulotning kunlik savdosi ham qayta hisoblanadi
+    tracked_fields = ("product_id",)
+
     def save(self, *args, **kwargs):
         self.total_price = Decimal(self.product.price) * self.quantity
+        product_ids = {self.product_id, self.previous("product_id")} - {None}
         super().save(*args, **kwargs)
-        self.order.calculate_total()
+        order = self.order if OrderItem.order.is_cached(self) else None
+        Order.recalculate_total(self.order_id, order=order, product_ids=product_ids)
 
     def __str__(self):
         return f"{self.product.name} x {self.quantity}"
+
+
+class TelegramNotification(models.Model):
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Navbatda"),
+        (STATUS_SENT, "Yuborilgan"),
+        (STATUS_FAILED, "Xatolik"),
+    ]
+    chat_id = models.CharField(max_length=100)
+    text = models.TextField()
+    parse_mode = models.CharField(max_length=20, blank=True, default="")
+    # Bir xil kalitli navbatdagi xabarlar birlashtiriladi (masalan, low stock)
+    dedup_key = models.CharField(max_length=100, blank=True, null=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='notification_queue_idx'),
+            models.Index(fields=['dedup_key', 'status'], name='notification_dedup_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.chat_id} [{self.status}]"
+
+
+class CustomerMonthlyStats(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="monthly_stats")
+    month = models.DateField()  # oyning birinchi kuni (TIME_ZONE bo'yicha)
+    total_spent = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    order_count = models.PositiveIntegerField(default=0)
+    last_order = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'month'], name='customer_month_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['month', '-total_spent'], name='customer_month_top_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} — {self.month:%Y-%m}: {self.total_spent}"
+
+
+class DailyProductSales(models.Model):
+    date = models.DateField()  # buyurtma sanasi (TIME_ZONE bo'yicha)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="daily_sales")
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name="daily_sales")
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    units = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    order_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'product'], name='daily_product_sales_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['category', 'date'], name='daily_sales_category_idx'),
+            models.Index(fields=['product', 'date'], name='daily_sales_product_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} — {self.product_id}: {self.revenue}"
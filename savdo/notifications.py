@@ -0,0 +1,176 @@
+import time
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
+
+from .models import TelegramNotification
+
+# Telegram cheklovlari: umumiy ~30 xabar/soniya, bitta chatga ~1 xabar/soniya
+GLOBAL_RATE_LIMIT = 30
+CHAT_INTERVAL = 1.0
+
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = 5
+BACKOFF_MAX = 600
+CLAIM_LEASE = 60
+
+
+def enqueue_notification(chat_id, text, parse_mode="", dedup_key=None):
+    """Xabarni navbatga qo'yadi; dedup_key bo'yicha kutilayotgan xabar bo'lsa, uning matnini yangilaydi."""
+    if not chat_id:
+        return None
+
+    if dedup_key:
+        pending = TelegramNotification.objects.filter(
+            dedup_key=dedup_key, status=TelegramNotification.STATUS_PENDING
+        )
+        if pending.update(chat_id=chat_id, text=text, parse_mode=parse_mode):
+            return None
+
+    return TelegramNotification.objects.create(
+        chat_id=chat_id, text=text, parse_mode=parse_mode, dedup_key=dedup_key
+    )
+
+
+def build_low_stock_message(products):
+    """Kam qolgan mahsulotlar bo'yicha bitta admin xabari (name_category__category oldindan yuklangan bo'lsin)."""
+    lines = ["⚠️ *Omborda mahsulot kamaydi!*"]
+    for product in products:
+        # ✨ Emoji'lar bilan xabar
+        lines.append(
+            "\n"
+            f"📂 *Kategoriya:* {product.name_category.category.name}\n"
+            f"🏷️ *Turi:* {product.name_category.name}\n"
+            f"🥫 *Nomi:* {product.name}\n"
+            f"📉 *Qolgan miqdor:* {product.quantity} {product.unit}"
+        )
+    return "\n".join(lines)
+
+
+def backoff_delay(attempts):
+    return min(BACKOFF_BASE * (2 ** max(attempts - 1, 0)), BACKOFF_MAX)
+
+
+class TelegramDispatcher:
+    """Navbatdagi xabarlarni bitta HTTP sessiya orqali partiyalab yuboradi."""
+
+    def __init__(self, token=None, api_url=None, batch_size=50, session=None,
+                 global_rate=GLOBAL_RATE_LIMIT, chat_interval=CHAT_INTERVAL, timeout=5):
+        self.token = token if token is not None else settings.TELEGRAM_BOT_TOKEN
+        self.api_url = (api_url or settings.TELEGRAM_API_URL).rstrip('/')
+        self.batch_size = batch_size
+        self.global_interval = 1.0 / global_rate if global_rate else 0
+        self.chat_interval = chat_interval
+        self.timeout = timeout
+        self.session = session or self._build_session()
+        self._last_sent = 0.0
+        self._chat_last_sent = {}
+
+    @staticmethod
+    def _build_session():
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=10)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    @property
+    def send_url(self):
+        return f"{self.api_url}/bot{self.token}/sendMessage"
+
+    def claim_batch(self):
+        now = timezone.now()
+        with transaction.atomic():
+            batch = list(
+                TelegramNotification.objects
+                .select_for_update(skip_locked=True)
+                .filter(status=TelegramNotification.STATUS_PENDING, next_attempt_at__lte=now)
+                .order_by('next_attempt_at', 'id')[:self.batch_size]
+            )
+            if batch:
+                # Boshqa worker'lar shu xabarlarni qayta olmasligi uchun vaqtinchalik band qilamiz
+                TelegramNotification.objects.filter(pk__in=[n.pk for n in batch]).update(
+                    next_attempt_at=now + timedelta(seconds=CLAIM_LEASE)
+                )
+        return batch
+
+    def _wait_for_slot(self, chat_id):
+        now = time.monotonic()
+        wait = self._last_sent + self.global_interval - now
+        chat_last = self._chat_last_sent.get(chat_id)
+        if chat_last is not None:
+            wait = max(wait, chat_last + self.chat_interval - now)
+        if wait > 0:
+            time.sleep(wait)
+
+    def send(self, notification):
+        self._wait_for_slot(notification.chat_id)
+        payload = {"chat_id": notification.chat_id, "text": notification.text}
+        if notification.parse_mode:
+            payload["parse_mode"] = notification.parse_mode
+
+        try:
+            response = self.session.post(self.send_url, json=payload, timeout=self.timeout)
+        finally:
+            self._last_sent = time.monotonic()
+            self._chat_last_sent[notification.chat_id] = self._last_sent
+        return response
+
+    def _mark_sent(self, notification):
+        notification.status = TelegramNotification.STATUS_SENT
+        notification.sent_at = timezone.now()
+        notification.attempts += 1
+        notification.last_error = ""
+        notification.save(update_fields=['status', 'sent_at', 'attempts', 'last_error'])
+
+    def _mark_retry(self, notification, error, retry_after=None):
+        notification.attempts += 1
+        notification.last_error = str(error)[:1000]
+        if notification.attempts >= MAX_ATTEMPTS:
+            notification.status = TelegramNotification.STATUS_FAILED
+        delay = retry_after if retry_after is not None else backoff_delay(notification.attempts)
+        notification.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+        notification.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at'])
+
+    def process(self, notification):
+        try:
+            response = self.send(notification)
+        except requests.RequestException as e:
+            self._mark_retry(notification, e)
+            return False
+
+        if response.status_code == 200:
+            self._mark_sent(notification)
+            return True
+
+        retry_after = None
+        try:
+            body = response.json()
+        except ValueError:
+            body = {}
+        if response.status_code == 429:
+            retry_after = (body.get("parameters") or {}).get("retry_after")
+
+        error = body.get("description") or f"HTTP {response.status_code}"
+        if 400 <= response.status_code < 500 and response.status_code != 429:
+            # Chat topilmadi, bot bloklangan va h.k. — qayta urinish foydasiz
+            notification.attempts = MAX_ATTEMPTS - 1
+        self._mark_retry(notification, error, retry_after)
+        return False
+
+    def dispatch_once(self):
+        """Bitta partiyani yuboradi va yuborilgan xabarlar sonini qaytaradi."""
+        sent = 0
+        for notification in self.claim_batch():
+            if self.process(notification):
+                sent += 1
+        return sent
+
+    def run(self, idle_sleep=1.0, stop=None):
+        while not (stop and stop()):
+            if not self.dispatch_once():
+                time.sleep(idle_sleep)
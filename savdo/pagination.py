@@ -0,0 +1,75 @@
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class CreatedAtCursorPagination(BasePagination):
+    """(created_at, id) juftligi bo'yicha keyset paginatsiya.
+
+    OFFSET ishlatilmaydi: har bir sahifa ``(created_at, id) > (kursor)`` sharti bilan
+    indeksdan o'qiladi, shuning uchun jadval o'sgani sari kechikish o'zgarmaydi.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 100
+    max_page_size = 1000
+    invalid_cursor_message = "Kursor noto‘g‘ri."
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            size = self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            created_at, pk = base64.urlsafe_b64decode(encoded.encode()).decode().split('|')
+            return datetime.fromisoformat(created_at), int(pk)
+        except (ValueError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    @staticmethod
+    def encode_cursor(obj):
+        raw = f"{obj.created_at.isoformat()}|{obj.pk}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by('created_at', 'pk')
+
+        cursor = self.decode_cursor(request)
+        if cursor:
+            created_at, pk = cursor
+            queryset = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk))
+
+        page = list(queryset[:page_size + 1])
+        self.next_cursor = self.encode_cursor(page[page_size - 1]) if len(page) > page_size else None
+        return page[:page_size]
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
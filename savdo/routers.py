@@ -0,0 +1,89 @@
+import contextvars
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_KEY = "db:pin:user:{user_id}"
+
+# Joriy so'rov holati: replikadan o'qish yoqilganmi va shu so'rovda yozish bo'lganmi
+_state = contextvars.ContextVar("savdo_db_state", default=None)
+
+
+def replica_alias():
+    return getattr(settings, "REPLICA_DATABASE", None)
+
+
+def pin_user(user_id):
+    """Foydalanuvchini REPLICA_PIN_SECONDS davomida asosiy bazaga bog'laydi (replikatsiya kechikishi)."""
+    if replica_alias() and user_id is not None:
+        cache.set(PIN_KEY.format(user_id=user_id), 1, timeout=settings.REPLICA_PIN_SECONDS)
+
+
+def is_user_pinned(user_id):
+    return user_id is not None and cache.get(PIN_KEY.format(user_id=user_id)) is not None
+
+
+@contextmanager
+def read_from_replica(user_id=None):
+    """Blok ichidagi o'qishlar replikaga yuboriladi.
+
+    ``user_id`` berilsa va u yaqinda buyurtma yozgan bo'lsa, o'qishlar asosiy bazada qoladi.
+    """
+    if not replica_alias():
+        yield
+        return
+    token = _state.set({"pinned": is_user_pinned(user_id)})
+    try:
+        yield
+    finally:
+        _state.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """``read_from_replica`` ichidagi o'qishlarni ``settings.REPLICA_DATABASE`` ga yuboradi.
+
+    Yozishlar doim ``default`` ga. So'rov ichida yozish bo'lsa yoki tranzaksiya ochiq bo'lsa,
+    qolgan o'qishlar ham ``default`` da qoladi. Order/OrderItem yozilganda egasi ``pin_user``
+    bilan bog'lanadi (signals) — keyingi so'rovlarda ham o'z buyurtmasini ko'radi.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        alias = replica_alias()
+        if state is None or alias is None or state["pinned"]:
+            return None
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        if replica_alias() is None:
+            return None
+        state = _state.get()
+        if state is not None:
+            state["pinned"] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replika — asosiy bazaning nusxasi, ular orasidagi bog'lanishlar ruxsat etiladi
+        return True if replica_alias() else None
+
+
+class ReplicaReadMixin:
+    """View'ning GET so'rovlarini replikadan o'qiydi.
+
+    ``replica_pin_kwarg`` — URL'dagi foydalanuvchi id'si; u yaqinda yozgan bo'lsa asosiy bazadan o'qiladi.
+    """
+    replica_pin_kwarg = None
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return super().dispatch(request, *args, **kwargs)
+        user_id = kwargs.get(self.replica_pin_kwarg) if self.replica_pin_kwarg else None
+        with read_from_replica(user_id=user_id):
+            return super().dispatch(request, *args, **kwargs)
@@ -0,0 +1,189 @@
+import difflib
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connection, connections, router
+from django.db.models import Q
+
+from .models import Product
+
+# SQLite: so'zlar bo'yicha FTS5 jadvali (rowid = Product.id) va imlo xatolarini tuzatish uchun
+# mahsulotlardagi barcha so'zlarning trigram lug'ati. Ikkalasi ham signallar orqali yangilanadi.
+FTS_TABLE = "savdo_product_fts"
+FTS_COLUMNS = ("name_uz", "name_ru", "description_uz", "description_ru")
+# bm25 og'irliklari: nomdagi moslik tavsifdagidan muhimroq
+FTS_WEIGHTS = (10.0, 10.0, 1.0, 1.0)
+TERM_TABLE = "savdo_search_term"
+TERM_FTS_TABLE = "savdo_search_term_fts"
+# Lug'atdan olinadigan nomzodlar soni va "o'xshash" deb hisoblanadigan eng kichik moslik
+TERM_CANDIDATES = 30
+TERM_SUGGESTIONS = 3
+TERM_MIN_RATIO = 0.7
+
+# PostgreSQL: ifoda indekslari bilan bir xil bo'lishi shart, aks holda indeks ishlatilmaydi
+PG_DOCUMENT = (
+    "(setweight(to_tsvector('simple'::regconfig, coalesce(name_uz, '') || ' ' || coalesce(name_ru, '')), 'A') || "
+    "setweight(to_tsvector('simple'::regconfig, coalesce(description_uz, '') || ' ' || coalesce(description_ru, '')), 'B'))"
+)
+PG_SEARCH_SQL = f"""
+    SELECT id FROM savdo_product
+    WHERE {PG_DOCUMENT} @@ websearch_to_tsquery('simple', %(q)s)
+       OR %(q)s <%% name_uz OR %(q)s <%% name_ru
+    ORDER BY ts_rank({PG_DOCUMENT}, websearch_to_tsquery('simple', %(q)s))
+           + coalesce(greatest(word_similarity(%(q)s, name_uz), word_similarity(%(q)s, name_ru)), 0) DESC, id
+    LIMIT %(limit)s
+"""
+
+APOSTROPHES_RE = re.compile(r"[‘’ʻʼ`']")
+WORD_RE = re.compile(r"[^\W_]+")
+
+
+def normalize(text):
+    """Kichik harf; o‘/o'/oʻ dagi apostroflar olib tashlanadi (o‘zbek → ozbek)."""
+    return APOSTROPHES_RE.sub("", (text or "").lower())
+
+
+def words(text):
+    return WORD_RE.findall(normalize(text))
+
+
+def trigrams(word):
+    # pg_trgm kabi chetlarga bo'sh joy qo'shiladi — qisqa so'zlarda ham moslik topiladi
+    padded = f" {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _quote(term):
+    return '"{}"'.format(term.replace('"', '""'))
+
+
+def _fts_search(cursor, match, limit):
+    weights = ", ".join(str(w) for w in FTS_WEIGHTS)
+    cursor.execute(
+        f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s ORDER BY bm25({FTS_TABLE}, {weights}) LIMIT %s",
+        [match, limit],
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def similar_terms(cursor, word):
+    """Lug'atdan ``word`` ga eng o'xshash so'zlar (trigramlar bo'yicha nomzodlar, difflib bo'yicha saralash)."""
+    if len(word) < 3:
+        return []
+    cursor.execute(
+        f"SELECT term FROM {TERM_FTS_TABLE} WHERE {TERM_FTS_TABLE} MATCH %s "
+        f"ORDER BY bm25({TERM_FTS_TABLE}) LIMIT %s",
+        [" OR ".join(_quote(t) for t in sorted(trigrams(word))), TERM_CANDIDATES],
+    )
+    scored = sorted(
+        ((difflib.SequenceMatcher(None, word, term.strip()).ratio(), term.strip()) for (term,) in cursor.fetchall()),
+        reverse=True,
+    )
+    return [term for ratio, term in scored[:TERM_SUGGESTIONS] if ratio >= TERM_MIN_RATIO]
+
+
+def _sqlite_search(connection, query, limit):
+    query_words = words(query)
+    if not query_words:
+        return []
+    with connection.cursor() as cursor:
+        # 1) Har bir so'z prefiks sifatida ("olm" → olma), avval faqat nomlarda: qisqa prefikslar
+        # tavsiflarda minglab qatorga mos keladi, ularning hammasini bm25 bilan baholash qimmat
+        prefix = " AND ".join(_quote(w) + "*" for w in query_words)
+        ids = _fts_search(cursor, f"{{name_uz name_ru}}: ({prefix})", limit)
+        if len(ids) < limit:
+            ids = _fts_search(cursor, prefix, limit) or ids
+        if ids:
+            return ids
+
+        # 2) Imlo xatosi: har bir so'z lug'atdagi eng yaqin so'zlar bilan almashtiriladi
+        groups = []
+        for word in query_words:
+            options = [_quote(word) + "*"] + [_quote(term) for term in similar_terms(cursor, word) if term != word]
+            groups.append("(" + " OR ".join(options) + ")")
+        return _fts_search(cursor, " AND ".join(groups), limit)
+
+
+def search_product_ids(query, limit=20):
+    """Mahsulot id'larini moslik darajasi bo'yicha (eng mosi birinchi) qaytaradi."""
+    query = (query or "").strip()
+    if not query:
+        return []
+
+    # Xom SQL ham ORM kabi router tanlagan bazaga (replika bo'lishi mumkin) yuboriladi
+    alias = router.db_for_read(Product) or DEFAULT_DB_ALIAS
+    db = connections[alias]
+    if db.vendor == "postgresql":
+        with db.cursor() as cursor:
+            cursor.execute(PG_SEARCH_SQL, {"q": query, "limit": limit})
+            return [row[0] for row in cursor.fetchall()]
+
+    if db.vendor == "sqlite":
+        return _sqlite_search(db, query, limit)
+
+    return list(
+        Product.objects.using(alias).filter(Q(name_uz__icontains=query) | Q(name_ru__icontains=query))
+        .order_by("id").values_list("id", flat=True)[:limit]
+    )
+
+
+def _add_terms(cursor, terms):
+    for term in terms:
+        if len(term) < 3:
+            continue
+        cursor.execute(f"INSERT OR IGNORE INTO {TERM_TABLE} (term) VALUES (%s)", [term])
+        if cursor.rowcount == 1:
+            cursor.execute(
+                f"INSERT INTO {TERM_FTS_TABLE} (rowid, term) VALUES (%s, %s)", [cursor.lastrowid, f" {term} "]
+            )
+
+
+def _index_rows(cursor, rows):
+    """rows: (id, name_uz, name_ru, description_uz, description_ru)"""
+    terms = set()
+    values = []
+    for pk, *texts in rows:
+        texts = [normalize(text) for text in texts]
+        values.append([pk, *texts])
+        for text in texts:
+            terms.update(WORD_RE.findall(text))
+    cursor.executemany(
+        f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(FTS_COLUMNS)}) VALUES (%s, %s, %s, %s, %s)", values
+    )
+    _add_terms(cursor, sorted(terms))
+
+
+def index_product(product):
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [product.pk])
+        _index_rows(cursor, [[product.pk, *(getattr(product, column) for column in FTS_COLUMNS)]])
+
+
+def unindex_product(product_id):
+    # Lug'atdagi so'zlar qoldiriladi: ular faqat tuzatish nomzodlari, natijaga ta'sir qilmaydi
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [product_id])
+
+
+def rebuild_search_index():
+    """bulk_create/update kabi signalsiz o'zgarishlardan keyin qidiruv jadvallarini to'liq qayta quradi."""
+    if connection.vendor != "sqlite":
+        return 0
+    count = 0
+    with connection.cursor() as cursor:
+        for table in (FTS_TABLE, TERM_FTS_TABLE, TERM_TABLE):
+            cursor.execute(f"DELETE FROM {table}")
+        batch = []
+        for row in Product.objects.order_by().values_list("id", *FTS_COLUMNS).iterator(chunk_size=2000):
+            batch.append(row)
+            if len(batch) >= 2000:
+                _index_rows(cursor, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            _index_rows(cursor, batch)
+            count += len(batch)
+    return count
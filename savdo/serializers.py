@@ -1,13 +1,39 @@
 from rest_framework import serializers
+from decimal import Decimal
+from django.core.files.storage import default_storage
 from .models import User, Category, Product, Order, OrderItem, ProductNameCategory
 
 
-class UsersSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    """``context['fields']`` berilsa faqat shu maydonlarni qaytaradi.
+
+    Ro'yxat faqat o'qish view'idan (``UsersView``) uzatiladi — yozish endpointlarida
+    ``?fields=`` kiritilgan ma'lumotni tashlab yubormasligi uchun so'rovdan o'qilmaydi.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = self.context.get('fields')
+        if requested:
+            for name in set(self.fields) - set(requested):
+                self.fields.pop(name)
+
+
+class UsersSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = '__all__'
 
 
+class UserUpsertSerializer(serializers.ModelSerializer):
+    # Unikallik tekshiruvi (qo'shimcha SELECT) olib tashlangan — mavjud telegram_id yangilanadi
+    telegram_id = serializers.CharField(max_length=100)
+
+    class Meta:
+        model = User
+        fields = ['telegram_id', 'first_name', 'user_name', 'age', 'phone_number', 'is_registered', 'language']
+
+
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
@@ -30,9 +56,32 @@ class ProductSerializer(serializers.ModelSerializer):
     class Meta:
         model = Product
         fields = ['id', 'name', 'price', 'unit', 'available', 'category', 'photo', "quantity",
-                  "description", "name_category", "name_category_name", "category_id"]
+                  "description", "name_category", "name_category_name", "category_id", "images",
+                  "image_hash", "telegram_file_id"]
 
     photo = serializers.CharField(source='image_path')
+    images = serializers.SerializerMethodField()
+
+    def get_images(self, obj):
+        """{"thumb": {"webp": {"url", "width", "height"}, "jpeg": {...}}, "medium": {...}}"""
+        request = self.context.get('request')
+        result = {}
+        for size, formats in (obj.image_variants or {}).get('sizes', {}).items():
+            result[size] = {}
+            for fmt, info in formats.items():
+                url = default_storage.url(info['name'])
+                result[size][fmt] = {
+                    "url": request.build_absolute_uri(url) if request else url,
+                    "width": info['width'],
+                    "height": info['height'],
+                }
+        return result
+
+
+class ProductTelegramFileSerializer(serializers.Serializer):
+    """Bot rasmni yuklagandan keyin Telegram qaytargan file_id ni saqlash uchun."""
+    file_id = serializers.CharField(max_length=255)
+    image_hash = serializers.CharField(max_length=64)
 
 
 class OrderItemSerializer(serializers.ModelSerializer):
@@ -57,3 +106,34 @@ class OrderSerializer(serializers.ModelSerializer):
     class Meta:
         model = Order
         fields = ['id', 'user', 'created_at', 'is_confirmed', 'status', 'total_price', 'items']
+
+
+class OrderItemAsyncCreateSerializer(serializers.Serializer):
+    """Async view uchun: faqat formatni tekshiradi, buyurtma va mahsulot mavjudligi view'da async o'qiladi."""
+    order = serializers.IntegerField()
+    product = serializers.IntegerField()
+    quantity = serializers.DecimalField(max_digits=10, decimal_places=2, default=Decimal('1.00'))
+
+
+class OrderItemBulkEntrySerializer(serializers.Serializer):
+    product = serializers.IntegerField()
+    quantity = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0.01'))
+
+
+class OrderItemBulkSerializer(serializers.Serializer):
+    order = serializers.PrimaryKeyRelatedField(queryset=Order.objects.all())
+    items = OrderItemBulkEntrySerializer(many=True, allow_empty=False)
+
+    def validate_items(self, items):
+        product_ids = [item["product"] for item in items]
+        if len(product_ids) != len(set(product_ids)):
+            raise serializers.ValidationError("Mahsulotlar takrorlanmasligi kerak.")
+
+        products = Product.objects.in_bulk(product_ids)
+        missing = sorted(set(product_ids) - products.keys())
+        if missing:
+            raise serializers.ValidationError(f"Mahsulot topilmadi: {missing}")
+
+        for item in items:
+            item["product"] = products[item["product"]]
+        return items
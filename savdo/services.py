@@ -0,0 +1,123 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import Case, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Greatest, Now
+from django.utils import timezone
+
+from .models import Order, OrderItem, Product, User
+from .notifications import enqueue_notification, build_low_stock_message
+from .catalog import bump_catalog_version
+from .routers import pin_user
+
+
+def upsert_user(data):
+    """telegram_id bo'yicha foydalanuvchini yaratadi yoki ``data`` dagi maydonlarini yangilaydi: (user, created).
+
+    PostgreSQL va SQLite'da bitta ``INSERT ... ON CONFLICT (telegram_id) DO UPDATE ... RETURNING`` —
+    parallel qayta urinishlar ham dublikat yaratmaydi va qo'shimcha SELECT kerak emas.
+    Yangi qatorda ``data`` da yo'q maydonlar model standart qiymatlarini oladi.
+    """
+    alias = router.db_for_write(User)
+    connection = connections[alias]
+    telegram_id = data["telegram_id"]
+    if connection.vendor not in ("postgresql", "sqlite"):
+        defaults = {name: value for name, value in data.items() if name != "telegram_id"}
+        return User.objects.using(alias).update_or_create(telegram_id=telegram_id, defaults=defaults)
+
+    now = timezone.now()
+    user = User(**data, created_at=now)
+    fields = [field for field in User._meta.concrete_fields if not field.primary_key]
+    quote = connection.ops.quote_name
+    values = [field.get_db_prep_save(getattr(user, field.attname), connection) for field in fields]
+    # Faqat yuborilgan maydonlar yangilanadi; telegram_id — bo'sh SET bo'lmasligi uchun (RETURNING qator qaytarsin)
+    updates = [quote(User._meta.get_field(name).column) for name in data]
+    sql = (
+        f"INSERT INTO {quote(User._meta.db_table)} ({', '.join(quote(f.column) for f in fields)}) "
+        f"VALUES ({', '.join(['%s'] * len(fields))}) "
+        f"ON CONFLICT ({quote(User._meta.get_field('telegram_id').column)}) DO UPDATE SET "
+        f"{', '.join(f'{column} = EXCLUDED.{column}' for column in updates)} "
+        f"RETURNING {', '.join(quote(f.column) for f in User._meta.concrete_fields)}"
+    )
+    # raw() qaytgan qatorni model maydon turlariga (sana, bool) o'giradi
+    user = list(User.objects.db_manager(alias).raw(sql, values))[0]
+    # created_at faqat INSERT'da yoziladi — mavjud qator bo'lsa eski qiymat qaytadi
+    return user, user.created_at == now
+
+
+@transaction.atomic
+def bulk_upsert_order_items(order, entries):
+    """Buyurtmadagi mahsulotlar miqdorini bitta tranzaksiyada yaratadi yoki yangilaydi.
+
+    ``entries`` — ``{"product": Product, "quantity": Decimal}`` ro'yxati.
+    """
+    existing = {
+        item.product_id: item
+        for item in OrderItem.objects.filter(order=order, product__in=[e["product"] for e in entries])
+    }
+
+    to_create, to_update = [], []
+    for entry in entries:
+        product = entry["product"]
+        quantity = entry["quantity"]
+        total_price = Decimal(product.price) * quantity
+
+        item = existing.get(product.pk)
+        if item is None:
+            to_create.append(OrderItem(order=order, product=product, quantity=quantity, total_price=total_price))
+        else:
+            item.quantity = quantity
+            item.total_price = total_price
+            to_update.append(item)
+
+    OrderItem.objects.bulk_create(to_create)
+    OrderItem.objects.bulk_update(to_update, ["quantity", "total_price"])
+    Order.recalculate_total(order.pk, order=order, product_ids=[e["product"].pk for e in entries])
+    # bulk_create signal chaqirmaydi
+    pin_user(order.user_id)
+    return to_create + to_update
+
+
+LOW_STOCK_THRESHOLD = Decimal('5.00')
+
+
+def decrement_stock_for_order(order):
+    """Buyurtma mahsulotlarini ombordan bitta UPDATE bilan ayiradi va bitta low-stock xabarini navbatga qo'yadi.
+
+    Miqdor SQL ichida nolgacha cheklanadi, ``available`` shu statementda yangilanadi,
+    shuning uchun parallel yakunlashlarda yangilanishlar yo'qolmaydi.
+    """
+    ordered = (
+        OrderItem.objects
+        .filter(order_id=order.pk, product_id=OuterRef('pk'))
+        .values('product_id')
+        .annotate(total=Sum('quantity'))
+        .values('total')
+    )
+    product_ids = OrderItem.objects.filter(order_id=order.pk).values('product_id')
+
+    with transaction.atomic():
+        # SET ichidagi barcha ifodalar eski qiymatni ko'radi (SQL semantikasi)
+        updated = Product.objects.filter(pk__in=product_ids).update(
+            quantity=Greatest(F('quantity') - Subquery(ordered), Value(Decimal('0.00'))),
+            available=Case(When(quantity__gt=Subquery(ordered), then=Value(True)), default=Value(False)),
+            updated_at=Now(),
+        )
+        if updated:
+            # UPDATE signal chaqirmaydi, katalogdagi 'available' uchun versiyani o'zimiz oshiramiz
+            transaction.on_commit(bump_catalog_version)
+            low_stock = list(
+                Product.objects
+                .select_related('name_category__category')
+                .filter(pk__in=product_ids, quantity__lte=LOW_STOCK_THRESHOLD)
+                .order_by('pk')
+            )
+            if low_stock:
+                enqueue_notification(
+                    settings.ADMIN_TELEGRAM_ID,
+                    build_low_stock_message(low_stock),
+                    parse_mode="Markdown",
+                    dedup_key=f"low_stock_order:{order.pk}",
+                )
+    return updated
@@ -1,36 +1,46 @@
-from django.db.models.signals import pre_save
+from django.db.models.signals import pre_save, pre_delete, post_delete
 from django.dispatch import receiver
-from config.settings import TELEGRAM_BOT_TOKEN, ADMIN_TELEGRAM_ID
-from .models import Order
-import requests
+from django.conf import settings
+from .models import Order, OrderItem
 from django.db.models.signals import post_save
-from .models import Product
+from .models import Product, Category, ProductNameCategory
 from decimal import Decimal
 from django.db import transaction
-import sys
+from django.db.models.functions import Now
+from .catalog import bump_catalog_version
+from .analytics import is_counted, apply_order_to_daily_sales, refresh_customer_month_for_order
+from .models import User
+from .images import generate_variants, delete_variants, variants_are_current, file_sha256
+from .notifications import enqueue_notification, build_low_stock_message
+from .search import index_product, unindex_product
+from .routers import pin_user, replica_alias
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 @receiver(pre_save, sender=Order)
 def send_order_status_notification(sender, instance, **kwargs):
-    # Faqat mavjud (update) buyurtmalarda ishlaydi
-    if not instance.pk:
-        return
-
-    try:
-        old_instance = sender.objects.get(pk=instance.pk)
-    except sender.DoesNotExist:
+    # Faqat mavjud (update) buyurtmalarda ishlaydi; eski status from_db da eslab qolingan
+    if instance.previous("status") is None:
         return
 
     # Agar status o‘zgarmagan bo‘lsa — hech narsa yuborilmaydi
-    if old_instance.status == instance.status:
+    if not instance.has_changed("status"):
         return
 
-    user = instance.user
-    telegram_id = getattr(user, "telegram_id", None)
+    # select_related('user') bilan yuklangan bo'lsa so'rovsiz, aks holda faqat kerakli ikki ustun
+    if sender.user.is_cached(instance):
+        telegram_id, lang = instance.user.telegram_id, instance.user.language
+    else:
+        telegram_id, lang = (
+            User.objects.filter(pk=instance.user_id).values_list("telegram_id", "language").first()
+            or (None, None)
+        )
     if not telegram_id:
         return
 
-    lang = getattr(user, "language", "uz") or "uz"
+    lang = lang or "uz"
 
     messages = {
         "uz": {
@@ -76,68 +86,127 @@ def send_order_status_notification(sender, instance, **kwargs):
 
     msg = msg_text + info_text
 
-    # Telegramga yuborish
-    token = TELEGRAM_BOT_TOKEN
-    url = f"https://api.telegram.org/bot{token}/sendMessage"
-    payload = {
+    # Xabar saqlash muvaffaqiyatli bo'lgandan keyin navbatga qo'yiladi
+    instance._status_notification = {
         "chat_id": telegram_id,
         "text": msg,
         "parse_mode": "HTML",
     }
 
-    try:
-        requests.post(url, json=payload, timeout=5)
-    except Exception as e:
-        print(f"Telegram xabar yuborishda xatolik: {e}")
+
+@receiver(post_save, sender=Order)
+def enqueue_order_status_notification(sender, instance, **kwargs):
+    notification = instance.__dict__.pop("_status_notification", None)
+    if notification:
+        enqueue_notification(**notification)
 
 
 @receiver(post_save, sender=Product)
 def notify_low_stock(sender, instance, **kwargs):
-    def send_notification():
+    quantity_value = Decimal(str(instance.quantity))
+    if quantity_value > Decimal('5.00'):
+        return
+
+    product = Product.objects.select_related('name_category__category').get(pk=instance.pk)
+    message = build_low_stock_message([product])
+
+    # Bir mahsulot uchun yuborilmagan ogohlantirishlar bittaga birlashtiriladi
+    enqueue_notification(
+        settings.ADMIN_TELEGRAM_ID, message, parse_mode="Markdown", dedup_key=f"low_stock:{product.pk}"
+    )
+
+
+@receiver(pre_delete, sender=OrderItem)
+def collect_orders_on_item_delete(sender, instance, origin=None, **kwargs):
+    # Buyurtmaning (yoki foydalanuvchining) o'zi o'chirilayotgan bo'lsa, summani qayta hisoblash shart emas
+    if origin is None or isinstance(origin, (Order, User)):
+        return
+    # Collector avval barcha pre_delete, keyin DELETE, so'ng post_delete signallarini yuboradi:
+    # queryset.delete() dagi mahsulotlar origin ustida buyurtma bo'yicha yig'iladi
+    pending = origin.__dict__.setdefault("_pending_order_totals", {})
+    order = instance.order if OrderItem.order.is_cached(instance) else None
+    entry = pending.setdefault(instance.order_id, {"order": order, "product_ids": set()})
+    entry["product_ids"].add(instance.product_id)
+
+
+@receiver(post_delete, sender=OrderItem)
+def update_order_total_on_item_delete(sender, instance, origin=None, **kwargs):
+    if origin is None:
+        Order.recalculate_total(instance.order_id, product_ids=[instance.product_id])
+        return
+    # Birinchi post_delete hamma qatorlar o'chganidan keyin keladi — har bir buyurtma bir marta hisoblanadi
+    pending = origin.__dict__.pop("_pending_order_totals", None)
+    for order_id, entry in (pending or {}).items():
+        Order.recalculate_total(order_id, order=entry["order"], product_ids=entry["product_ids"])
+
+
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=ProductNameCategory)
+@receiver([post_save, post_delete], sender=Product)
+def invalidate_catalog_cache(sender, **kwargs):
+    # Katalog keshi versiya orqali eskiradi; yangi versiya commitdan keyin beriladi
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(post_save, sender=Product)
+def update_product_search_index(sender, instance, **kwargs):
+    index_product(instance)
+
+
+@receiver(post_delete, sender=Product)
+def remove_product_from_search_index(sender, instance, **kwargs):
+    unindex_product(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Order)
+@receiver([post_save, post_delete], sender=OrderItem)
+def pin_order_owner_to_primary(sender, instance, origin=None, **kwargs):
+    # Replika orqada qolishi mumkin — buyurtma egasi o'z o'zgarishini darhol ko'rishi kerak
+    if not replica_alias():
+        return
+    if sender is Order:
+        pin_user(instance.user_id)
+    elif not isinstance(origin, Order):
+        # Buyurtma bilan birga o'chirilganda egasini Order receiver'i bog'laydi
+        pin_user(instance.order.user_id)
+
+
+@receiver(pre_delete, sender=Order)
+def remove_order_from_daily_sales(sender, instance, origin=None, **kwargs):
+    # Mahsulotlar hali o'chirilmagan — buyurtma ulushini kunlik savdodan ayiramiz
+    # (foydalanuvchi bilan birga o'chirilganda ham: kunlik savdo CASCADE bilan o'chmaydi)
+    if is_counted(instance.status, instance.is_confirmed):
+        apply_order_to_daily_sales(instance, -1)
+
+
+@receiver(post_delete, sender=Order)
+def update_customer_stats_on_order_delete(sender, instance, origin=None, **kwargs):
+    # Foydalanuvchi o'chirilsa, uning statistikasi CASCADE bilan o'chadi
+    if isinstance(origin, User):
+        return
+    if is_counted(instance.status, instance.is_confirmed):
+        refresh_customer_month_for_order(instance)
+
+
+@receiver(post_save, sender=Product)
+def generate_product_image_variants(sender, instance, **kwargs):
+    if variants_are_current(instance):
+        return
+
+    # Nomlar asl fayl nomidan kelib chiqadi, shuning uchun avval eskilarini o'chiramiz
+    delete_variants(instance.image_variants)
+    variants, image_hash = {}, ""
+    if instance.image:
         try:
-            sys.stdout.reconfigure(encoding='utf-8')
-
-            product = Product.objects.select_related('name_category__category').get(pk=instance.pk)
-
-            quantity_value = Decimal(str(product.quantity))
-            if quantity_value <= Decimal('5.00'):
-                category_name = product.name_category.category.name
-                type_name = product.name_category.name
-                product_name = product.name
-                quantity = product.quantity
-
-                # ✨ Emoji'lar bilan xabar
-                message = (
-                    "⚠️ *Omborda mahsulot kamaydi!*\n\n"
-                    f"📂 *Kategoriya:* {category_name}\n"
-                    f"🏷️ *Turi:* {type_name}\n"
-                    f"🥫 *Nomi:* {product_name}\n"
-                    f"📉 *Qolgan miqdor:* {quantity} {product.unit}"
-                )
-
-                token = TELEGRAM_BOT_TOKEN
-                chat_id = ADMIN_TELEGRAM_ID
-                url = f"https://api.telegram.org/bot{token}/sendMessage"
-
-                payload = {
-                    "chat_id": chat_id,
-                    "text": message,
-                    "parse_mode": "Markdown"
-                }
-
-                response = requests.post(url, json=payload, timeout=5)
-                print(f"Telegram javobi: {response.status_code}")
-
-            else:
-                print(f"{product.name} yetarli miqdorda ({product.quantity}), xabar yuborilmadi.")
-
-        except Exception as e:
-            print(f"Low stock signal xatolik: {e}".encode("utf-8", errors="ignore").decode("utf-8"))
-
-    conn = transaction.get_connection()
-    if conn.in_atomic_block:
-        print("Transaction ichida, commitdan keyin bajariladi.")
-        conn.on_commit(send_notification)
-    else:
-        print("Transaction yo‘q, darhol bajariladi.")
-        send_notification()
+            image_hash = file_sha256(instance.image.name)
+            variants = generate_variants(instance.image.name)
+        except OSError as e:
+            logger.warning("Rasm variantlarini yaratib bo'lmadi (%s): %s", instance.image.name, e)
+
+    fields = {"image_variants": variants}
+    if image_hash != instance.image_hash:
+        # Rasm tarkibi o'zgardi — eski Telegram file_id endi yaroqsiz
+        fields.update(image_hash=image_hash, telegram_file_id="")
+    Product.objects.filter(pk=instance.pk).update(updated_at=Now(), **fields)
+    for name, value in fields.items():
+        setattr(instance, name, value)
@@ -0,0 +1,60 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+STREAM_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """csv.writer uchun: yozilgan qatorni buferlamasdan qaytaradi."""
+
+    def write(self, value):
+        return value
+
+
+def iter_json_array(rows):
+    """Qatorlarni JSON massiv sifatida bo'laklab chiqaradi; butun natija xotiraga yuklanmaydi."""
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    yield '['
+    first = True
+    for row in rows:
+        yield ('' if first else ',') + encoder.encode(row)
+        first = False
+    yield ']'
+
+
+def iter_jsonl(rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(row) + '\n'
+
+
+def iter_csv(rows, fields):
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([row[field] for field in fields])
+
+
+FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'jsonl': ('application/x-ndjson', 'jsonl'),
+}
+
+
+def iter_export(rows, fields, fmt):
+    return iter_csv(rows, fields) if fmt == 'csv' else iter_jsonl(rows)
+
+
+def export_response(rows, fields, fmt, filename):
+    content_type, extension = FORMATS[fmt]
+    response = StreamingHttpResponse(iter_export(rows, fields, fmt), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{extension}"'
+    return response
+
+
+def json_stream_response(queryset, fields, chunk_size=STREAM_CHUNK_SIZE):
+    rows = queryset.values(*fields).iterator(chunk_size=chunk_size)
+    return StreamingHttpResponse(iter_json_array(rows), content_type='application/json')
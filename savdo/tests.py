@@ -1,3 +1,1596 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
-# Create your tests here.
+from django.conf import settings
+from django.db import OperationalError, connection
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.http import Http404
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .models import User, Category, ProductNameCategory, Product, Order, OrderItem, TelegramNotification, \
+    CustomerMonthlyStats, DailyProductSales
+from . import urls as savdo_urls
+from .notifications import TelegramDispatcher, enqueue_notification
+from .media import serve as serve_media
+from .routers import PrimaryReplicaRouter, pin_user, read_from_replica, _state as replica_state
+from .catalog import get_catalog_version
+from .search import rebuild_search_index, search_product_ids
+from .analytics import month_start, rebuild_customer_stats, build_daily_sales, sales_by_day, \
+    sales_by_category, sales_by_product
+
+
+class StubTelegramHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        self.server.received.append(payload)
+
+        status_code, body = 200, {"ok": True, "result": {}}
+        if self.server.responses:
+            status_code, body = self.server.responses.pop(0)
+
+        data = json.dumps(body).encode()
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubTelegramServer:
+    def __init__(self):
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), StubTelegramHandler)
+        self.httpd.received = []
+        self.httpd.responses = []
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class NotificationOutboxTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(telegram_id="1001", first_name="Ali", language="uz")
+        category = Category.objects.create(name="Ichimliklar")
+        name_category = ProductNameCategory.objects.create(category=category, name="Suv")
+        cls.product = Product.objects.create(
+            name="Suv 1L", name_category=name_category, price=Decimal('5000'), quantity=Decimal('20')
+        )
+
+    def test_status_change_is_queued_not_sent(self):
+        order = Order.objects.create(user=self.user, status='preparing')
+        self.assertFalse(TelegramNotification.objects.exists())
+
+        order.status = 'delivering'
+        order.save()
+
+        notification = TelegramNotification.objects.get()
+        self.assertEqual(notification.chat_id, "1001")
+        self.assertEqual(notification.status, TelegramNotification.STATUS_PENDING)
+
+    def test_low_stock_alerts_are_coalesced(self):
+        with self.settings(ADMIN_TELEGRAM_ID="42"):
+            for quantity in ('4', '3', '2'):
+                self.product.quantity = Decimal(quantity)
+                self.product.save()
+
+        notification = TelegramNotification.objects.get(dedup_key=f"low_stock:{self.product.pk}")
+        self.assertIn("Qolgan miqdor:* 2.00", notification.text)
+
+    def test_dispatcher_sends_batch_and_retries(self):
+        enqueue_notification("1", "birinchi")
+        enqueue_notification("2", "ikkinchi")
+
+        with StubTelegramServer() as server:
+            httpd = server.httpd
+            httpd.responses = [
+                (200, {"ok": True}),
+                (429, {"ok": False, "description": "Too Many Requests", "parameters": {"retry_after": 0}}),
+            ]
+            dispatcher = TelegramDispatcher(token="test", api_url=server.url, chat_interval=0)
+            self.assertEqual(dispatcher.dispatch_once(), 1)
+            self.assertEqual(dispatcher.dispatch_once(), 1)
+
+        self.assertEqual([p["text"] for p in httpd.received], ["birinchi", "ikkinchi", "ikkinchi"])
+        self.assertEqual(
+            TelegramNotification.objects.filter(status=TelegramNotification.STATUS_SENT).count(), 2
+        )
+        retried = TelegramNotification.objects.get(chat_id="2")
+        self.assertEqual(retried.attempts, 2)
+
+
+class OrderTotalTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(telegram_id="2002")
+        category = Category.objects.create(name="Mevalar")
+        name_category = ProductNameCategory.objects.create(category=category, name="Olma")
+        cls.apple = Product.objects.create(
+            name="Olma", name_category=name_category, price=Decimal('12000'), quantity=Decimal('50')
+        )
+        cls.pear = Product.objects.create(
+            name="Nok", name_category=name_category, price=Decimal('15000'), quantity=Decimal('50')
+        )
+
+    def test_item_write_updates_total_in_two_statements(self):
+        order = Order.objects.create(user=self.user, status='preparing')
+
+        with self.assertNumQueries(2):
+            OrderItem.objects.create(order=order, product=self.apple, quantity=Decimal('2'))
+
+        order.refresh_from_db()
+        self.assertEqual(order.total_price, Decimal('24000'))
+
+    def test_total_follows_update_and_delete(self):
+        order = Order.objects.create(user=self.user, status='preparing')
+        apple_item = OrderItem.objects.create(order=order, product=self.apple, quantity=Decimal('1'))
+        OrderItem.objects.create(order=order, product=self.pear, quantity=Decimal('2'))
+        self.assertEqual(order.calculate_total(), Decimal('42000'))
+
+        apple_item.quantity = Decimal('3')
+        apple_item.save()
+        self.assertEqual(order.calculate_total(), Decimal('66000'))
+
+        apple_item.delete()
+        self.assertEqual(order.calculate_total(), Decimal('30000'))
+
+    def test_queryset_delete_recalculates_each_order_once(self):
+        orders = [Order.objects.create(user=self.user, status='preparing') for _ in range(2)]
+        for order in orders:
+            for product in (self.apple, self.pear, self.apple):
+                OrderItem.objects.create(order=order, product=product, quantity=Decimal('1'))
+        OrderItem.objects.create(order=orders[0], product=self.pear, quantity=Decimal('2'))
+
+        with CaptureQueriesContext(connection) as ctx:
+            OrderItem.objects.filter(order__in=orders, quantity=Decimal('1')).delete()
+        updates = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE "savdo_order"')]
+        self.assertEqual(len(updates), 2)
+
+        totals = dict(Order.objects.filter(pk__in=[o.pk for o in orders]).values_list('pk', 'total_price'))
+        self.assertEqual(totals, {orders[0].pk: Decimal('30000'), orders[1].pk: Decimal('0')})
+
+
+class OrderItemBulkUpsertTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(telegram_id="3003")
+        category = Category.objects.create(name="Sabzavotlar")
+        name_category = ProductNameCategory.objects.create(category=category, name="Kartoshka")
+        cls.products = [
+            Product.objects.create(
+                name=f"Mahsulot {i}", name_category=name_category, price=Decimal('1000') * (i + 1),
+                quantity=Decimal('100'),
+            )
+            for i in range(20)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.order = Order.objects.create(user=self.user, status='preparing')
+
+    def test_bulk_create_and_update_with_fixed_queries(self):
+        url = reverse('order_items_bulk')
+        payload = {
+            "order": self.order.pk,
+            "items": [{"product": p.pk, "quantity": "2"} for p in self.products],
+        }
+        with self.assertNumQueries(9):
+            response = self.client.post(url, payload, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(len(response.data["items"]), 20)
+        self.assertEqual(Decimal(response.data["total_price"]), Decimal('420000'))
+
+        payload["items"] = [{"product": self.products[0].pk, "quantity": "5"}]
+        response = self.client.post(url, payload, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self.order.items.count(), 20)
+        self.assertEqual(Decimal(response.data["total_price"]), Decimal('423000'))
+
+    def test_unknown_product_is_rejected(self):
+        response = self.client.post(
+            reverse('order_items_bulk'),
+            {"order": self.order.pk, "items": [{"product": 999999, "quantity": "1"}]},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(self.order.items.exists())
+
+
+class OrderChangeTrackingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(telegram_id="4104", language="ru")
+        cls.order = Order.objects.create(user=cls.user, status='preparing')
+
+    def test_previous_and_has_changed(self):
+        order = Order.objects.get(pk=self.order.pk)
+        self.assertFalse(order.has_changed('status'))
+        order.status = 'delivering'
+        self.assertTrue(order.has_changed('status'))
+        self.assertEqual(order.previous('status'), 'preparing')
+
+        order.save()
+        self.assertFalse(order.has_changed('status'))
+        self.assertEqual(order.previous('status'), 'delivering')
+
+        self.assertIsNone(Order(user=self.user).previous('status'))
+
+    def test_status_transition_without_extra_reads(self):
+        order = Order.objects.select_related('user').get(pk=self.order.pk)
+        order.status = 'delivering'
+        with CaptureQueriesContext(connection) as ctx:
+            order.save()
+        self.assertFalse([q for q in ctx.captured_queries if q['sql'].startswith('SELECT')])
+
+        notification = TelegramNotification.objects.get()
+        self.assertEqual(notification.chat_id, "4104")
+        self.assertIn("в пути", notification.text)
+
+    def test_deferred_status_is_loaded_once(self):
+        order = Order.objects.only('id', 'user_id').get(pk=self.order.pk)
+        order.status = 'cancelled'
+        order.save()
+        self.assertEqual(TelegramNotification.objects.count(), 1)
+
+    def test_stale_completion_is_not_applied_twice(self):
+        first = Order.objects.get(pk=self.order.pk)
+        second = Order.objects.get(pk=self.order.pk)
+        for order in (first, second):
+            order.status = 'completed'
+            order.save()
+        # Ikkinchi nusxa eski 'preparing' ni ko'rgan, lekin bazada o'tish allaqachon bo'lgan
+        self.assertEqual(TelegramNotification.objects.filter(text__contains="завершён").count(), 1)
+
+
+class AsyncViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(telegram_id="3003", first_name="Async")
+        category = Category.objects.create(name="Ichimliklar")
+        cls.name_category = ProductNameCategory.objects.create(category=category, name="Choy")
+        cls.tea = Product.objects.create(
+            name="Choy", name_category=cls.name_category, price=Decimal('8000'), quantity=Decimal('20')
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+
+    def test_reads_match_sync_endpoints(self):
+        for path in (
+            f'users/{self.user.telegram_id}/',
+            'cat_list/',
+            f'category_to_name/{self.name_category.category_id}/',
+            f'namecat_to_product/{self.name_category.pk}/',
+        ):
+            with self.subTest(path=path):
+                self.assertEqual(self.client.get(f'/async/{path}').json(), self.client.get(f'/{path}').json())
+        self.assertEqual(self.client.get('/async/users/yoq/').status_code, 404)
+
+    def test_catalog_reads_use_response_cache_and_etag(self):
+        url = f'/async/namecat_to_product/{self.name_category.pk}/'
+        first = self.client.get(url)
+        self.assertTrue(first.has_header('ETag'))
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tea.price = Decimal('8500')
+            self.tea.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['price'], 8500.0)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+
+    def test_order_item_create_and_order_update(self):
+        order = Order.objects.create(user=self.user, status='preparing')
+        response = self.client.post(
+            '/async/order_item_creat/', {"order": order.pk, "product": self.tea.pk, "quantity": "2"}, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        order.refresh_from_db()
+        self.assertEqual(order.total_price, Decimal('16000'))
+
+        response = self.client.post(
+            '/async/order_item_creat/', {"order": order.pk, "product": 0, "quantity": "2"}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("product", response.json())
+
+        response = self.client.patch(
+            f'/async/user_order_update/{self.user.pk}/', {"status": "completed"}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["items"][0]["total_price"], "16000.00")
+        self.tea.refresh_from_db()
+        self.assertEqual(self.tea.quantity, Decimal('18'))
+
+
+class UserUpsertTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+
+    def test_insert_then_update_keeps_one_row(self):
+        response = self.client.post('/users/upsert/', {"telegram_id": "5005", "first_name": "Ali"}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["user_name"], "no username")
+        created = response.data
+
+        with self.assertNumQueries(1):
+            response = self.client.post(
+                '/users/upsert/', {"telegram_id": "5005", "phone_number": "+998901234567"}, format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        # Yuborilmagan maydonlar saqlanadi, javob — bazadagi kanonik qator
+        self.assertEqual(response.data["first_name"], "Ali")
+        self.assertEqual(response.data["phone_number"], "+998901234567")
+        self.assertEqual(response.data["id"], created["id"])
+        self.assertEqual(response.data["created_at"], created["created_at"])
+        self.assertEqual(User.objects.filter(telegram_id="5005").count(), 1)
+
+        self.assertEqual(self.client.post('/users/upsert/', {"first_name": "X"}, format='json').status_code, 400)
+
+    def test_idempotency_key_replays_response(self):
+        payload = {"telegram_id": "6006", "first_name": "Vali"}
+        first = self.client.post('/users/upsert/', payload, format='json', HTTP_IDEMPOTENCY_KEY="reg-1")
+        self.assertEqual(first.status_code, 201)
+
+        with self.assertNumQueries(0):
+            replay = self.client.post('/users/upsert/', payload, format='json', HTTP_IDEMPOTENCY_KEY="reg-1")
+        self.assertEqual(replay.status_code, 201)
+        self.assertEqual(replay.data, first.data)
+        self.assertEqual(replay["Idempotent-Replayed"], "true")
+
+        response = self.client.post(
+            '/users/upsert/', {**payload, "first_name": "Boshqa"}, format='json', HTTP_IDEMPOTENCY_KEY="reg-1"
+        )
+        self.assertEqual(response.status_code, 422)
+
+
+class BootstrapTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(telegram_id="4004", first_name="Bootstrap")
+        category = Category.objects.create(name="Sabzavotlar")
+        name_category = ProductNameCategory.objects.create(category=category, name="Sabzi")
+        carrot = Product.objects.create(
+            name="Sabzi", name_category=name_category, price=Decimal('5000'), quantity=Decimal('30')
+        )
+        for status_, confirmed in (("delivering", True), ("completed", True), ("preparing", False)):
+            order = Order.objects.create(user=cls.user, status=status_, is_confirmed=confirmed)
+            OrderItem.objects.create(order=order, product=carrot, quantity=Decimal('1'))
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+
+    def test_matches_separate_endpoints(self):
+        with self.assertNumQueries(4):
+            data = self.client.get(f'/bootstrap/{self.user.telegram_id}/').json()
+
+        self.assertEqual(data["user"], self.client.get(f'/users/{self.user.telegram_id}/').json())
+        self.assertEqual(data["latest_order"], self.client.get(f'/user_orders/{self.user.pk}/').json())
+        self.assertEqual(data["active_orders"], self.client.get(f'/orders_list/{self.user.pk}/').json())
+        self.assertEqual(data["categories"], self.client.get('/cat_list/').json())
+        self.assertEqual(data["latest_order"]["status"], "preparing")
+        self.assertEqual([o["status"] for o in data["active_orders"]], ["delivering"])
+
+    def test_new_user_and_unknown_user(self):
+        User.objects.create(telegram_id="4005")
+        data = self.client.get('/bootstrap/4005/').json()
+        self.assertIsNone(data["latest_order"])
+        self.assertEqual(data["active_orders"], [])
+        self.assertEqual(self.client.get('/bootstrap/yoq/').status_code, 404)
+
+
+class StockDecrementTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(telegram_id="4004")
+        category = Category.objects.create(name="Non")
+        name_category = ProductNameCategory.objects.create(category=category, name="Lavash")
+        cls.bread = Product.objects.create(
+            name="Lavash", name_category=name_category, price=Decimal('4000'), quantity=Decimal('10')
+        )
+        cls.cake = Product.objects.create(
+            name="Tort", name_category=name_category, price=Decimal('90000'), quantity=Decimal('1')
+        )
+
+    def test_completion_clamps_at_zero_and_sends_one_alert(self):
+        order = Order.objects.create(user=self.user, status='delivering')
+        OrderItem.objects.create(order=order, product=self.bread, quantity=Decimal('3'))
+        OrderItem.objects.create(order=order, product=self.bread, quantity=Decimal('4'))
+        OrderItem.objects.create(order=order, product=self.cake, quantity=Decimal('2'))
+
+        with self.settings(ADMIN_TELEGRAM_ID="42"):
+            order.status = 'completed'
+            order.save()
+            order.save()
+
+        self.bread.refresh_from_db()
+        self.cake.refresh_from_db()
+        self.assertEqual(self.bread.quantity, Decimal('3'))
+        self.assertTrue(self.bread.available)
+        self.assertEqual(self.cake.quantity, Decimal('0'))
+        self.assertFalse(self.cake.available)
+
+        alert = TelegramNotification.objects.get(dedup_key=f"low_stock_order:{order.pk}")
+        self.assertIn("Lavash", alert.text)
+        self.assertIn("Tort", alert.text)
+
+
+class ConcurrentStockDecrementTests(TransactionTestCase):
+    THREADS = 8
+
+    def setUp(self):
+        self.user = User.objects.create(telegram_id="5005")
+        category = Category.objects.create(name="Sut")
+        name_category = ProductNameCategory.objects.create(category=category, name="Qatiq")
+        self.product = Product.objects.create(
+            name="Qatiq", name_category=name_category, price=Decimal('8000'), quantity=Decimal('100')
+        )
+
+    def make_order(self, quantity):
+        order = Order.objects.create(user=self.user, status='delivering')
+        OrderItem.objects.create(order=order, product=self.product, quantity=Decimal(quantity))
+        return order
+
+    def complete_concurrently(self, order_ids):
+        barrier = threading.Barrier(len(order_ids))
+        errors = []
+
+        def worker(order_id):
+            try:
+                barrier.wait()
+                for _ in range(100):
+                    try:
+                        order = Order.objects.get(pk=order_id)
+                        order.status = 'completed'
+                        order.save()
+                        return
+                    except OperationalError:
+                        # SQLite yozuvchi qulfi — qayta urinib ko'ramiz
+                        time.sleep(0.01)
+                errors.append(order_id)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(pk,)) for pk in order_ids]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_parallel_completion_of_different_orders(self):
+        orders = [self.make_order('3') for _ in range(self.THREADS)]
+        self.complete_concurrently([order.pk for order in orders])
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, Decimal('100') - 3 * self.THREADS)
+
+    def test_parallel_completion_of_same_order_decrements_once(self):
+        order = self.make_order('7')
+        self.complete_concurrently([order.pk] * self.THREADS)
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, Decimal('93'))
+
+
+class CatalogTreeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name_uz="Ichimliklar", name_ru="Напитки")
+        cls.name_category = ProductNameCategory.objects.create(category=category, name="Sharbat")
+        cls.juice = Product.objects.create(
+            name_uz="Olma sharbati", name_ru="Яблочный сок", name_category=cls.name_category,
+            price=Decimal('9000'), quantity=Decimal('30'),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_tree_is_cached_per_language(self):
+        with self.assertNumQueries(3):
+            response = self.client.get('/catalog/')
+        self.assertEqual(response.status_code, 200)
+        product = response.data["categories"][0]["name_categories"][0]["products"][0]
+        self.assertEqual(product["name"], "Olma sharbati")
+
+        with self.assertNumQueries(0):
+            self.client.get('/catalog/')
+
+        response = self.client.get('/ru/catalog/')
+        self.assertEqual(response.data["categories"][0]["name"], "Напитки")
+
+    def test_etag_and_invalidation(self):
+        response = self.client.get('/catalog/')
+        etag = response["ETag"]
+
+        response = self.client.get('/catalog/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.juice.price = Decimal('9500')
+            self.juice.save()
+
+        response = self.client.get('/catalog/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        product = response.data["categories"][0]["name_categories"][0]["products"][0]
+        self.assertEqual(product["price"], 9500.0)
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name="Shirinliklar")
+        cls.name_category = ProductNameCategory.objects.create(category=cls.category, name="Shokolad")
+        cls.product = Product.objects.create(
+            name="Shokolad", name_category=cls.name_category, price=Decimal('15000'), quantity=Decimal('40')
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def assert_revalidates(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.has_header('Last-Modified'))
+        etag = response['ETag']
+
+        # Keshlangan javobdan — so'rovsiz
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # Kesh bo'lmasa ham bitta MAX(updated_at) so'rovi yetadi
+        cache.clear()
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        return response
+
+    def test_catalog_endpoints_return_304(self):
+        self.assert_revalidates('/cat_list/')
+        self.assert_revalidates(f'/category_to_name/{self.category.pk}/')
+        self.assert_revalidates(f'/namecat_to_product/{self.name_category.pk}/')
+
+    def test_product_etag_follows_category_rename(self):
+        url = f'/products/{self.product.pk}/'
+        etag = self.client.get(url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = "Desertlar"
+            self.category.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['category'], "Desertlar")
+
+    def test_deletion_changes_etag(self):
+        url = f'/namecat_to_product/{self.name_category.pk}/'
+        extra = Product.objects.create(
+            name="Konfet", name_category=self.name_category, price=Decimal('1000'), quantity=Decimal('40')
+        )
+        etag = self.client.get(url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            extra.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 1)
+
+
+class RecordingReplicaRouter(PrimaryReplicaRouter):
+    """Replikaga yuborilishi mumkin bo'lgan o'qishlarni yozib oladi va ularni default'da bajaradi.
+
+    TestCase tranzaksiya ichida ishlaydi (asosiy router u yerda doim default qaytaradi),
+    shuning uchun faqat ``read_from_replica`` bloki holati tekshiriladi.
+    """
+    replica_reads = []
+
+    def db_for_read(self, model, **hints):
+        state = replica_state.get()
+        if state is not None and not state["pinned"]:
+            self.replica_reads.append(model.__name__)
+        return None
+
+
+class CatalogResponseCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name_uz="Sut mahsulotlari", name_ru="Молочные продукты")
+        cls.name_category = ProductNameCategory.objects.create(category=category, name="Qatiq")
+        cls.product = Product.objects.create(
+            name_uz="Qatiq", name_ru="Катык", unit_uz="litr", unit_ru="литр", name_category=cls.name_category,
+            price=Decimal('8000'), quantity=Decimal('20'),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_hit_returns_same_bytes_without_queries(self):
+        url = f'/namecat_to_product/{self.name_category.pk}/'
+        first = self.client.get(url)
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['Content-Type'], first['Content-Type'])
+        self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_key_includes_language_and_params(self):
+        url = f'/namecat_to_product/{self.name_category.pk}/'
+        self.assertEqual(self.client.get(url).json()[0]['unit'], "litr")
+        self.assertEqual(self.client.get('/ru' + url).json()[0]['unit'], "литр")
+        self.assertEqual(self.client.get('/products/search/', {"q": "qatiq"}).json()[0]['id'], self.product.pk)
+        self.assertEqual(self.client.get('/products/search/', {"q": "qovun"}).json(), [])
+
+    def test_model_changes_bump_version(self):
+        url = f'/products/{self.product.pk}/'
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.price = Decimal('8500')
+            self.product.save()
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.json()['price'], "8500.00")
+
+    @override_settings(REPLICA_DATABASE="replica",
+                       DATABASE_ROUTERS=["savdo.tests.RecordingReplicaRouter"])
+    def test_cached_views_are_built_from_primary(self):
+        # Kechikkan replika eski ma'lumotni yangi versiya kaliti ostida keshlab qo'ymasligi kerak
+        RecordingReplicaRouter.replica_reads = []
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.price = Decimal('9000')
+            self.product.save()
+        for url in (
+            f'/products/{self.product.pk}/',
+            f'/namecat_to_product/{self.name_category.pk}/',
+            f'/async/namecat_to_product/{self.name_category.pk}/',
+            '/catalog/',
+            '/products/search/?q=qatiq',
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(RecordingReplicaRouter.replica_reads, [])
+
+        self.client.get('/top_monthly_customers/')
+        self.assertTrue(RecordingReplicaRouter.replica_reads)
+
+
+class QueryCountMixin:
+    def count_queries(self, func):
+        with CaptureQueriesContext(connection) as ctx:
+            func()
+        return len(ctx.captured_queries)
+
+    def assertConstantQueries(self, func, grow, expected=None):
+        """func() ma'lumotlar hajmi ``grow()`` bilan oshganda ham bir xil sondagi so'rov bajarishini tekshiradi."""
+        before = self.count_queries(func)
+        grow()
+        after = self.count_queries(func)
+        self.assertEqual(before, after, "so'rovlar soni natija hajmiga bog'liq bo'lib qoldi")
+        if expected is not None:
+            self.assertEqual(after, expected)
+
+
+class SerializerQueryCountTests(QueryCountMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(telegram_id="6006")
+        cls.categories = [Category.objects.create(name=f"Kategoriya {i}") for i in range(3)]
+        cls.name_categories = [
+            ProductNameCategory.objects.create(category=category, name=f"Tur {category.pk}")
+            for category in cls.categories
+        ]
+        cls.products = [
+            Product.objects.create(
+                name=f"Mahsulot {i}", name_category=cls.name_categories[i % 3],
+                price=Decimal('1000'), quantity=Decimal('500'),
+            )
+            for i in range(10)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def add_orders(self, count, items=5):
+        for _ in range(count):
+            order = Order.objects.create(user=self.user, status='preparing', is_confirmed=True)
+            OrderItem.objects.bulk_create(
+                OrderItem(order=order, product=product, quantity=Decimal('1'), total_price=product.price)
+                for product in self.products[:items]
+            )
+
+    def test_active_orders_list(self):
+        self.add_orders(1)
+        url = f'/orders_list/{self.user.pk}/'
+        self.assertConstantQueries(lambda: self.client.get(url), lambda: self.add_orders(10), expected=2)
+
+    def test_latest_order(self):
+        self.add_orders(1, items=1)
+        url = f'/user_orders/{self.user.pk}/'
+        self.assertConstantQueries(lambda: self.client.get(url), lambda: self.add_orders(1, items=10), expected=2)
+
+    def test_product_detail(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/products/{self.products[0].pk}/')
+        self.assertEqual(response.data['category'], self.categories[0].name)
+
+
+def seed_dataset(users=2000, categories=10, name_categories=50, products=500, orders=3000, items_per_order=3):
+    """Realistik hajmdagi ma'lumotlar: bulk_create bilan tez yaratiladi."""
+    User.objects.bulk_create(
+        User(telegram_id=str(100000 + i), first_name=f"User {i}", phone_number=f"+99890{i:07d}",
+             is_registered=True, language="uz" if i % 3 else "ru")
+        for i in range(users)
+    )
+    Category.objects.bulk_create(
+        Category(name=f"Kategoriya {i}", name_uz=f"Kategoriya {i}", name_ru=f"Категория {i}")
+        for i in range(categories)
+    )
+    category_ids = list(Category.objects.values_list('id', flat=True))
+    ProductNameCategory.objects.bulk_create(
+        ProductNameCategory(category_id=category_ids[i % categories], name=f"Tur {i}")
+        for i in range(name_categories)
+    )
+    name_category_ids = list(ProductNameCategory.objects.values_list('id', flat=True))
+    Product.objects.bulk_create(
+        Product(name=f"Mahsulot {i}", name_uz=f"Mahsulot {i}", name_ru=f"Товар {i}",
+                name_category_id=name_category_ids[i % name_categories],
+                price=Decimal(1000 + i * 10), quantity=Decimal('1000'))
+        for i in range(products)
+    )
+    user_ids = list(User.objects.values_list('id', flat=True))
+    product_list = list(Product.objects.only('id', 'price'))
+    statuses = ['preparing', 'delivering', 'completed', 'cancelled']
+    Order.objects.bulk_create(
+        Order(user_id=user_ids[i % users], status=statuses[i % 4], is_confirmed=bool(i % 5))
+        for i in range(orders)
+    )
+    OrderItem.objects.bulk_create(
+        OrderItem(order_id=order_id, product=product, quantity=Decimal('2'), total_price=product.price * 2)
+        for n, order_id in enumerate(Order.objects.values_list('id', flat=True))
+        for product in product_list[n % products:n % products + items_per_order]
+    )
+    Order.objects.update(total_price=Decimal('50000'))
+    rebuild_customer_stats()
+    today = timezone.localdate()
+    build_daily_sales(today, today)
+    rebuild_search_index()
+
+
+class EndpointBudgetTests(TestCase):
+    """Har bir savdo endpointi uchun SQL so'rovlar soni va vaqt byudjeti.
+
+    Yangi URL qo'shilsa, BUDGETS ga ham qo'shilishi shart. ``SAVDO_PERF_REPORT``
+    muhit o'zgaruvchisi berilsa, o'lchangan natijalar shu JSON faylga yoziladi.
+    """
+
+    # route: (so'rovlar chegarasi, millisekund chegarasi)
+    BUDGETS = {
+        'users/': (1, 100),
+        'create_user/': (2, 100),
+        # Bitta INSERT ... ON CONFLICT DO UPDATE ... RETURNING
+        'users/upsert/': (1, 100),
+        'users/<str:telegram_id>/': (1, 100),
+        'user_update/<str:telegram_id>/': (2, 100),
+        # Foydalanuvchi, buyurtmalar, ularning mahsulotlari va kategoriyalar
+        'bootstrap/<str:telegram_id>/': (4, 100),
+        'catalog/': (3, 300),
+        'cat_list/': (2, 100),
+        'category_to_name/<int:category_id>/': (2, 100),
+        'namecat_to_product/<int:name_category_id>/': (2, 100),
+        # Imlo xatoli so'rov: prefiks (nomlar, hammasi), lug'at, tuzatilgan qidiruv va mahsulotlar
+        'products/search/': (5, 100),
+        'products/<int:id>/': (2, 100),
+        'products/<int:id>/telegram_file_id/': (1, 100),
+        'order_del/<int:id>/': (4, 100),
+        'order_creat/': (5, 100),
+        'user_orders/<int:user_id>/': (2, 100),
+        'order_item_creat/': (4, 100),
+        'order_items_bulk/': (10, 250),
+        'orderit_update/<int:id>/': (4, 100),
+        'user_order_update/<int:user_id>/': (11, 200),
+        'orders_list/<int:user_id>/': (2, 100),
+        'top_monthly_customers/': (1, 100),
+        'stats/daily/': (1, 300),
+        'stats/categories/': (1, 300),
+        'stats/products/': (1, 300),
+        'export/orders/': (1, 3000),
+        'export/users/': (1, 1000),
+        'async/users/<str:telegram_id>/': (1, 100),
+        'async/cat_list/': (1, 100),
+        'async/category_to_name/<int:category_id>/': (1, 100),
+        'async/namecat_to_product/<int:name_category_id>/': (1, 100),
+        'async/order_item_creat/': (4, 100),
+        'async/user_order_update/<int:user_id>/': (11, 200),
+    }
+    TIME_SCALE = float(os.environ.get('SAVDO_PERF_TIME_SCALE', '1'))
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.results = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_dataset()
+        cls.user = (
+            Order.objects.filter(is_confirmed=True).exclude(status='completed').order_by('id').first().user
+        )
+        cls.product = Product.objects.order_by('id').first()
+        Product.objects.filter(pk=cls.product.pk).update(image_hash="a" * 64)
+        cls.category = cls.product.name_category.category
+
+    @classmethod
+    def tearDownClass(cls):
+        report = os.environ.get('SAVDO_PERF_REPORT')
+        if report:
+            with open(report, 'w') as f:
+                json.dump(cls.results, f, indent=2, sort_keys=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+
+    def new_order(self):
+        order = Order.objects.create(user=self.user, status='preparing')
+        OrderItem.objects.create(order=order, product=self.product, quantity=Decimal('1'))
+        return order
+
+    def cases(self):
+        user, product, category = self.user, self.product, self.category
+        return {
+            'users/': lambda: ('get', '/users/', None),
+            'create_user/': lambda: ('post', '/create_user/', {"telegram_id": "999999", "first_name": "Yangi"}),
+            'users/upsert/': lambda: (
+                'post', '/users/upsert/', {"telegram_id": user.telegram_id, "first_name": "Yangilangan"}),
+            'users/<str:telegram_id>/': lambda: ('get', f'/users/{user.telegram_id}/', None),
+            'user_update/<str:telegram_id>/': lambda: (
+                'patch', f'/user_update/{user.telegram_id}/', {"age": 30}),
+            'bootstrap/<str:telegram_id>/': lambda: ('get', f'/bootstrap/{user.telegram_id}/', None),
+            'catalog/': lambda: ('get', '/catalog/', None),
+            'cat_list/': lambda: ('get', '/cat_list/', None),
+            'category_to_name/<int:category_id>/': lambda: ('get', f'/category_to_name/{category.pk}/', None),
+            'namecat_to_product/<int:name_category_id>/': lambda: (
+                'get', f'/namecat_to_product/{product.name_category_id}/', None),
+            'products/search/': lambda: ('get', '/products/search/', {"q": "Mahsulto 42"}),
+            'products/<int:id>/': lambda: ('get', f'/products/{product.pk}/', None),
+            'products/<int:id>/telegram_file_id/': lambda: (
+                'post', f'/products/{product.pk}/telegram_file_id/', {"file_id": "AgAC-bench", "image_hash": "a" * 64}),
+            'order_del/<int:id>/': lambda: ('delete', f'/order_del/{self.new_order().pk}/', None),
+            'order_creat/': lambda: ('post', '/order_creat/', {"user": user.pk, "status": "preparing"}),
+            'user_orders/<int:user_id>/': lambda: ('get', f'/user_orders/{user.pk}/', None),
+            'order_item_creat/': lambda: (
+                'post', '/order_item_creat/', {"order": self.new_order().pk, "product": product.pk, "quantity": "2"}),
+            'order_items_bulk/': lambda: (
+                'post', '/order_items_bulk/', {
+                    "order": self.new_order().pk,
+                    "items": [{"product": pk, "quantity": "1"}
+                              for pk in Product.objects.values_list('pk', flat=True)[:20]],
+                }),
+            'orderit_update/<int:id>/': lambda: (
+                'patch', f'/orderit_update/{self.new_order().items.get().pk}/', {"quantity": "3"}),
+            'user_order_update/<int:user_id>/': lambda: (
+                'patch', f'/user_order_update/{self.new_order().user_id}/', {"status": "completed"}),
+            'orders_list/<int:user_id>/': lambda: ('get', f'/orders_list/{user.pk}/', None),
+            'top_monthly_customers/': lambda: ('get', '/top_monthly_customers/', None),
+            'stats/daily/': lambda: ('get', '/stats/daily/', None),
+            'stats/categories/': lambda: ('get', '/stats/categories/', None),
+            'stats/products/': lambda: ('get', '/stats/products/', None),
+            'export/orders/': lambda: ('get', '/export/orders/', None),
+            'export/users/': lambda: ('get', '/export/users/', None),
+            'async/users/<str:telegram_id>/': lambda: ('get', f'/async/users/{user.telegram_id}/', None),
+            'async/cat_list/': lambda: ('get', '/async/cat_list/', None),
+            'async/category_to_name/<int:category_id>/': lambda: (
+                'get', f'/async/category_to_name/{category.pk}/', None),
+            'async/namecat_to_product/<int:name_category_id>/': lambda: (
+                'get', f'/async/namecat_to_product/{product.name_category_id}/', None),
+            'async/order_item_creat/': lambda: (
+                'post', '/async/order_item_creat/', {"order": self.new_order().pk, "product": product.pk, "quantity": "2"}),
+            'async/user_order_update/<int:user_id>/': lambda: (
+                'patch', f'/async/user_order_update/{self.new_order().user_id}/', {"status": "completed"}),
+        }
+
+    def test_every_route_has_a_budget(self):
+        routes = {str(pattern.pattern) for pattern in savdo_urls.urlpatterns}
+        self.assertEqual(routes - self.BUDGETS.keys(), set(), "yangi URL uchun byudjet belgilanmagan")
+        self.assertEqual(self.cases().keys(), self.BUDGETS.keys())
+
+    def test_endpoint_budgets(self):
+        for route, prepare in self.cases().items():
+            max_queries, max_ms = self.BUDGETS[route]
+            with self.subTest(route=route):
+                method, path, data = prepare()
+                with CaptureQueriesContext(connection) as ctx:
+                    started = time.perf_counter()
+                    response = getattr(self.client, method)(path, data, format='json')
+                    if response.streaming:
+                        b''.join(response.streaming_content)
+                    elapsed_ms = (time.perf_counter() - started) * 1000
+
+                self.results[route] = {"queries": len(ctx.captured_queries), "ms": round(elapsed_ms, 2)}
+                self.assertLess(response.status_code, 400, getattr(response, 'data', None))
+                self.assertLessEqual(len(ctx.captured_queries), max_queries)
+                self.assertLessEqual(elapsed_ms, max_ms * self.TIME_SCALE)
+
+
+class IndexPlanTests(TestCase):
+    """Botning qidiruv so'rovlari indeks bo'yicha bajarilishini EXPLAIN orqali tekshiradi (SQLite va PostgreSQL)."""
+
+    ORDER_INDEXES = ('order_user_created_idx', 'order_user_active_idx', 'order_completed_created_idx')
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_dataset(users=200, products=50, orders=500)
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+    def explain(self, queryset):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                # Kichik jadvallarda ham rejalashtiruvchi indeksni tanlashi uchun
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+    def assertUsesIndex(self, plan, table, index_names):
+        if connection.vendor == 'sqlite':
+            self.assertNotIn(f'SCAN {table}\n', plan + '\n')
+            self.assertNotIn('TEMP B-TREE FOR ORDER BY', plan)
+        self.assertTrue(any(name in plan for name in index_names), plan)
+
+    def test_user_lookup_by_telegram_id(self):
+        plan = self.explain(User.objects.filter(telegram_id='100001'))
+        with connection.cursor() as cursor:
+            unique_indexes = [
+                name for name, info in connection.introspection.get_constraints(cursor, 'savdo_user').items()
+                if info['unique'] and info['columns'] == ['telegram_id']
+            ]
+        self.assertTrue(unique_indexes)
+        self.assertUsesIndex(plan, 'savdo_user', unique_indexes + ['sqlite_autoindex_savdo_user'])
+
+    def test_latest_order_for_user(self):
+        plan = self.explain(Order.objects.filter(user_id=self.user_id()).order_by('-created_at')[:1])
+        self.assertUsesIndex(plan, 'savdo_order', self.ORDER_INDEXES)
+
+    def test_active_orders_for_user(self):
+        queryset = (
+            Order.objects.filter(user_id=self.user_id(), is_confirmed=True)
+            .exclude(status='completed').order_by('-created_at')
+        )
+        self.assertUsesIndex(self.explain(queryset), 'savdo_order', self.ORDER_INDEXES)
+
+    def test_monthly_completed_orders(self):
+        start = timezone.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        queryset = Order.objects.filter(created_at__gte=start, is_confirmed=True, status='completed')
+        self.assertUsesIndex(self.explain(queryset), 'savdo_order', ['order_completed_created_idx'])
+
+    @staticmethod
+    def user_id():
+        return User.objects.order_by('id').values_list('id', flat=True).first()
+
+
+class CustomerMonthlyStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create(telegram_id="7001", first_name="Alisher")
+        cls.bob = User.objects.create(telegram_id="7002", first_name="Bobur")
+        category = Category.objects.create(name="Go'sht")
+        name_category = ProductNameCategory.objects.create(category=category, name="Mol go'shti")
+        cls.meat = Product.objects.create(
+            name="Mol go'shti", name_category=name_category, price=Decimal('100000'), quantity=Decimal('1000')
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.month = month_start(timezone.now())
+
+    def place(self, user, quantity, status='completed'):
+        order = Order.objects.create(user=user, status='preparing', is_confirmed=True)
+        OrderItem.objects.create(order=order, product=self.meat, quantity=Decimal(quantity))
+        order.refresh_from_db()
+        order.status = status
+        order.save()
+        return order
+
+    def test_rollup_follows_status_transitions(self):
+        first = self.place(self.alice, '2')
+        self.place(self.alice, '1')
+        self.place(self.alice, '5', status='delivering')
+
+        stats = CustomerMonthlyStats.objects.get(user=self.alice, month=self.month)
+        self.assertEqual((stats.total_spent, stats.order_count), (Decimal('300000'), 2))
+
+        first.status = 'cancelled'
+        first.save()
+        stats.refresh_from_db()
+        self.assertEqual((stats.total_spent, stats.order_count), (Decimal('100000'), 1))
+
+        Order.objects.filter(user=self.alice, status='completed').get().delete()
+        self.assertFalse(CustomerMonthlyStats.objects.filter(user=self.alice).exists())
+
+    def test_endpoint_reads_top_n_from_rollup(self):
+        self.place(self.alice, '1')
+        self.place(self.bob, '3')
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/top_monthly_customers/', {'limit': 1})
+        self.assertEqual([row['user_id'] for row in response.data], [self.bob.pk])
+
+        response = self.client.get('/top_monthly_customers/', {'month': '2001-01'})
+        self.assertIn('message', response.data)
+
+        response = self.client.get('/top_monthly_customers/', {'month': 'yanvar'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_backfill_matches_incremental_rollup(self):
+        self.place(self.alice, '2')
+        self.place(self.bob, '1')
+        incremental = list(CustomerMonthlyStats.objects.order_by('user_id').values_list(
+            'user_id', 'month', 'total_spent', 'order_count', 'last_order'))
+
+        CustomerMonthlyStats.objects.all().delete()
+        self.assertEqual(rebuild_customer_stats(), 2)
+        rebuilt = list(CustomerMonthlyStats.objects.order_by('user_id').values_list(
+            'user_id', 'month', 'total_spent', 'order_count', 'last_order'))
+        self.assertEqual(incremental, rebuilt)
+
+
+class DailySalesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(telegram_id="8001")
+        cls.fruit = Category.objects.create(name="Mevalar")
+        cls.dairy = Category.objects.create(name="Sut mahsulotlari")
+        cls.apple = Product.objects.create(
+            name="Olma", name_category=ProductNameCategory.objects.create(category=cls.fruit, name="Olma"),
+            price=Decimal('10000'), quantity=Decimal('1000'),
+        )
+        cls.milk = Product.objects.create(
+            name="Sut", name_category=ProductNameCategory.objects.create(category=cls.dairy, name="Sut"),
+            price=Decimal('12000'), quantity=Decimal('1000'),
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.today = timezone.localdate()
+
+    def complete(self, *lines):
+        order = Order.objects.create(user=self.user, status='preparing', is_confirmed=True)
+        for product, quantity in lines:
+            OrderItem.objects.create(order=order, product=product, quantity=Decimal(quantity))
+        # Bot kabi: yakunlashdan oldin buyurtma (summasi bilan) bazadan o'qiladi
+        order.refresh_from_db()
+        order.status = 'completed'
+        order.save()
+        return order
+
+    def assertRollupMatchesRaw(self):
+        for func in (sales_by_day, sales_by_category, sales_by_product):
+            self.assertEqual(
+                [(*row.values(),) for row in func(self.today, self.today)],
+                [(*row.values(),) for row in func(self.today, self.today, raw=True)],
+                func.__name__,
+            )
+
+    def test_incremental_rollup_matches_raw_aggregation(self):
+        self.complete((self.apple, '2'), (self.milk, '1'))
+        order = self.complete((self.apple, '3'))
+        self.assertRollupMatchesRaw()
+
+        order.status = 'cancelled'
+        order.save()
+        self.assertRollupMatchesRaw()
+
+        response = self.client.get('/stats/categories/')
+        self.assertEqual(
+            [(row['category_name'], row['revenue']) for row in response.data['results']],
+            [("Mevalar", 20000.0), ("Sut mahsulotlari", 12000.0)],
+        )
+
+    def test_completion_applies_only_its_own_delta(self):
+        self.complete((self.apple, '2'), (self.milk, '1'))
+        order = Order.objects.create(user=self.user, status='preparing', is_confirmed=True)
+        OrderItem.objects.create(order=order, product=self.apple, quantity=Decimal('3'))
+
+        order.status = 'completed'
+        with CaptureQueriesContext(connection) as ctx:
+            order.save()
+        sql = [q['sql'] for q in ctx.captured_queries if 'savdo_dailyproductsales' in q['sql']]
+        # Kunni qayta qurish (DELETE + hamma mahsulotlar) emas, bitta upsert
+        self.assertEqual(len(sql), 1)
+        self.assertIn('ON CONFLICT', sql[0])
+        self.assertEqual(
+            DailyProductSales.objects.get(product=self.apple).order_count, 2
+        )
+        self.assertRollupMatchesRaw()
+
+        order.delete()
+        self.assertRollupMatchesRaw()
+        self.assertEqual(DailyProductSales.objects.get(product=self.apple).revenue, Decimal('20000'))
+
+        self.user.delete()
+        self.assertFalse(DailyProductSales.objects.exists())
+
+    def test_stale_instances_do_not_double_apply_deltas(self):
+        self.complete((self.milk, '1'))
+        order = self.complete((self.apple, '2'))
+        first, second = Order.objects.get(pk=order.pk), Order.objects.get(pk=order.pk)
+
+        # Ikkalasi ham hisobdan chiqaradi — ayirish faqat bir marta
+        first.status = 'cancelled'
+        first.save()
+        second.is_confirmed = False
+        second.save()
+        self.assertRollupMatchesRaw()
+        self.assertFalse(DailyProductSales.objects.filter(product=self.apple).exists())
+
+        # Eskirgan obyektning to'liq saqlashi hisobdagi holatni qaytaradi — rollup ham qaytadi
+        restored = Order.objects.get(pk=order.pk)
+        restored.status, restored.is_confirmed = 'completed', True
+        restored.save()
+        stale = Order.objects.get(pk=order.pk)
+        fresh = Order.objects.get(pk=order.pk)
+        fresh.status = 'cancelled'
+        fresh.save()
+        stale.save()
+        self.assertRollupMatchesRaw()
+        self.assertEqual(DailyProductSales.objects.get(product=self.apple).revenue, Decimal('20000'))
+
+        # Ikkalasi ham qaytadan hisobga kiritadi — qo'shish faqat bir marta
+        fresh = Order.objects.get(pk=order.pk)
+        fresh.status = 'cancelled'
+        fresh.save()
+        first, second = Order.objects.get(pk=order.pk), Order.objects.get(pk=order.pk)
+        first.status = 'completed'
+        first.save()
+        second.status = 'completed'
+        second.save()
+        self.assertRollupMatchesRaw()
+        self.assertEqual(DailyProductSales.objects.get(product=self.apple).order_count, 1)
+
+    def test_item_changes_on_completed_order_refresh_rollups(self):
+        order = self.complete((self.apple, '2'))
+        item = order.items.get()
+
+        def top_spent():
+            return self.client.get('/top_monthly_customers/').data[0]["total_spent_this_month"]
+
+        def product_revenue():
+            return {row['product_name']: row['revenue'] for row in self.client.get('/stats/products/').data['results']}
+
+        self.assertEqual(top_spent(), 20000.0)
+        response = self.client.patch(f'/orderit_update/{item.pk}/', {"quantity": "5"}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(top_spent(), 50000.0)
+        self.assertEqual(product_revenue(), {"Olma": 50000.0})
+
+        response = self.client.post(
+            '/order_item_creat/', {"order": order.pk, "product": self.milk.pk, "quantity": "1"}, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(top_spent(), 62000.0)
+        self.assertEqual(product_revenue(), {"Olma": 50000.0, "Sut": 12000.0})
+
+        # Mahsulot almashtirilsa eski mahsulot qatori ham yangilanadi
+        item.refresh_from_db()
+        item.product = self.milk
+        item.save()
+        self.assertEqual(product_revenue(), {"Sut": 72000.0})
+
+        item.delete()
+        self.assertEqual(top_spent(), 12000.0)
+        self.assertEqual(product_revenue(), {"Sut": 12000.0})
+        self.assertRollupMatchesRaw()
+
+    def test_build_is_idempotent(self):
+        self.complete((self.milk, '4'))
+        build_daily_sales(self.today, self.today)
+        build_daily_sales(self.today, self.today)
+
+        response = self.client.get('/stats/daily/', {'from': self.today.isoformat(), 'to': self.today.isoformat()})
+        self.assertEqual(response.data['results'], [{'date': self.today, 'revenue': 48000.0, 'units': 4.0}])
+
+        response = self.client.get('/stats/products/', {'from': 'kecha'})
+        self.assertEqual(response.status_code, 400)
+
+
+class UsersListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # bulk_create barcha qatorlarga bir xil created_at beradi — kursor id bo'yicha ajratishi kerak
+        User.objects.bulk_create(User(telegram_id=str(9000 + i), first_name=f"U{i}") for i in range(25))
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_cursor_pages_cover_all_users_once(self):
+        seen = []
+        url = '/users/?page_size=10'
+        while url:
+            with self.assertNumQueries(1):
+                response = self.client.get(url)
+            seen += [row['id'] for row in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(seen, list(User.objects.order_by('created_at', 'id').values_list('id', flat=True)))
+
+    def test_sparse_fields(self):
+        response = self.client.get('/users/', {'fields': 'id,telegram_id', 'page_size': 2})
+        self.assertEqual(set(response.data['results'][0]), {'id', 'telegram_id'})
+        self.assertEqual(self.client.get('/users/', {'fields': 'id,yoq'}).status_code, 400)
+
+    def test_fields_param_does_not_drop_write_input(self):
+        response = self.client.post('/create_user/?fields=id', {"telegram_id": "77", "first_name": "A"}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['first_name'], "A")
+        user = User.objects.get(telegram_id="77")
+        self.assertEqual(user.first_name, "A")
+
+        response = self.client.patch('/user_update/77/?fields=id', {"first_name": "B"}, format='json')
+        self.assertEqual(response.status_code, 200)
+        user.refresh_from_db()
+        self.assertEqual(user.first_name, "B")
+
+    def test_bad_cursor_is_404(self):
+        response = self.client.get('/users/', {'cursor': 'yaroqsiz'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_stream_export(self):
+        response = self.client.get('/users/', {'stream': '1', 'fields': 'telegram_id'})
+        self.assertTrue(response.streaming)
+        rows = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(len(rows), 25)
+        self.assertEqual(set(rows[0]), {'telegram_id'})
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(telegram_id="10001", first_name="Eksport")
+        category = Category.objects.create(name="Non mahsulotlari")
+        name_category = ProductNameCategory.objects.create(category=category, name="Non")
+        cls.bread = Product.objects.create(
+            name="Non", name_category=name_category, price=Decimal('3000'), quantity=Decimal('100')
+        )
+        cls.order = Order.objects.create(user=cls.user, status='preparing')
+        OrderItem.objects.create(order=cls.order, product=cls.bread, quantity=Decimal('2'))
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def read(self, response):
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_orders_csv(self):
+        with self.assertNumQueries(1):
+            body = self.read(self.client.get('/export/orders/'))
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['telegram_id'], "10001")
+        self.assertEqual(rows[0]['product_name'], "Non")
+
+    def test_orders_jsonl_by_order_and_date_range(self):
+        body = self.read(self.client.get('/export/orders/', {'output': 'jsonl', 'level': 'orders'}))
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([row['id'] for row in rows], [self.order.pk])
+
+        body = self.read(self.client.get('/export/orders/', {'output': 'jsonl', 'to': '2001-01-01'}))
+        self.assertEqual(body, '')
+
+    def test_users_export_and_validation(self):
+        body = self.read(self.client.get('/export/users/', {'output': 'jsonl'}))
+        self.assertEqual(json.loads(body)['first_name'], "Eksport")
+        self.assertEqual(self.client.get('/export/users/', {'output': 'xml'}).status_code, 400)
+
+    def test_management_commands_write_to_stdout(self):
+        out = io.StringIO()
+        call_command('export_orders', level='orders', stdout=out)
+        rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+        self.assertEqual([row['id'] for row in rows], [str(self.order.pk)])
+
+        out = io.StringIO()
+        call_command('export_users', output='jsonl', stdout=out)
+        self.assertEqual(json.loads(out.getvalue())['telegram_id'], "10001")
+
+
+def make_image(name="rasm.png", size=(1200, 800), mode="RGBA"):
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new(mode, size, (200, 30, 30, 255) if mode == "RGBA" else (200, 30, 30)).save(buffer, "PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+
+class ProductImageVariantTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Rasmlar")
+        cls.name_category = ProductNameCategory.objects.create(category=category, name="Rasmli")
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root)
+        self.override.enable()
+        cache.clear()
+        self.client = APIClient()
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def create_product(self, **kwargs):
+        return Product.objects.create(
+            name="Rasmli", name_category=self.name_category, price=Decimal('1000'), quantity=Decimal('10'), **kwargs
+        )
+
+    def test_upload_generates_variants_exposed_by_serializer(self):
+        product = self.create_product(image=make_image())
+        product.refresh_from_db()
+
+        thumb = product.image_variants['sizes']['thumb']
+        self.assertEqual((thumb['webp']['width'], thumb['webp']['height']), (160, 107))
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, thumb['jpeg']['name'])))
+
+        response = self.client.get(f'/products/{product.pk}/')
+        self.assertTrue(response.data['images']['medium']['webp']['url'].endswith('__medium.webp'))
+
+    def test_replacing_image_removes_old_variants(self):
+        product = self.create_product(image=make_image("birinchi.png"))
+        old_thumb = os.path.join(self.media_root, product.image_variants['sizes']['thumb']['webp']['name'])
+
+        product.image = make_image("ikkinchi.png", size=(300, 600), mode="RGB")
+        product.save()
+
+        self.assertFalse(os.path.exists(old_thumb))
+        self.assertEqual(product.image_variants['sizes']['thumb']['webp']['height'], 160)
+
+    def test_backfill_command(self):
+        product = self.create_product(image=make_image())
+        Product.objects.filter(pk=product.pk).update(image_variants={})
+        version = get_catalog_version()
+
+        call_command('generate_thumbnails', workers=2, stdout=io.StringIO())
+        product.refresh_from_db()
+        self.assertEqual(product.image_variants['source'], product.image.name)
+        # Keshlangan products/<id>/ javoblari eskiradi
+        self.assertNotEqual(get_catalog_version(), version)
+
+    def test_telegram_file_id_is_kept_until_image_content_changes(self):
+        product = self.create_product(image=make_image("birinchi.png"))
+        self.assertEqual(len(product.image_hash), 64)
+        url = f'/products/{product.pk}/telegram_file_id/'
+
+        response = self.client.post(url, {"file_id": "AgAC-1", "image_hash": product.image_hash}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        # Rasmsiz maydonlarni saqlash file_id ga tegmaydi
+        product.refresh_from_db()
+        product.price = Decimal('1200')
+        product.save()
+        self.assertEqual(self.client.get(f'/products/{product.pk}/').data['telegram_file_id'], "AgAC-1")
+
+        old_hash = product.image_hash
+        product.image = make_image("ikkinchi.png", size=(300, 600), mode="RGB")
+        product.save()
+        product.refresh_from_db()
+        self.assertNotEqual(product.image_hash, old_hash)
+        self.assertEqual(product.telegram_file_id, "")
+
+        # Eski rasm uchun kechikib kelgan file_id yozilmaydi
+        response = self.client.post(url, {"file_id": "AgAC-old", "image_hash": old_hash}, format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.client.post('/products/0/telegram_file_id/', {"file_id": "x", "image_hash": old_hash},
+                                          format='json').status_code, 404)
+
+
+class ProductSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Mevalar")
+        name_category = ProductNameCategory.objects.create(category=category, name="Ho‘l mevalar")
+
+        def create(name_uz, name_ru, description_uz=""):
+            return Product.objects.create(
+                name=name_uz, name_uz=name_uz, name_ru=name_ru, description_uz=description_uz,
+                name_category=name_category, price=Decimal('1000'), quantity=Decimal('10'),
+            )
+
+        cls.apple = create("Olma qizil", "Яблоко красное", "Namangan olmasi")
+        cls.pear = create("Nok", "Груша", "Shirin va suvli")
+        cls.melon = create("Qovun", "Дыня", "O‘zbek qovuni, qizil olma bilan emas")
+
+    def setUp(self):
+        cache.clear()
+
+    def search(self, q, **params):
+        response = self.client.get('/products/search/', {"q": q, **params})
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.json()]
+
+    def test_ranks_name_matches_first_across_translations(self):
+        self.assertEqual(self.search("olma")[:2], [self.apple.pk, self.melon.pk])
+        self.assertEqual(self.search("ЯБЛОКО"), [self.apple.pk])
+
+    def test_typo_tolerance(self):
+        self.assertEqual(self.search("Qovin")[0], self.melon.pk)
+        self.assertEqual(self.search("Грушя")[0], self.pear.pk)
+
+    def test_index_follows_saves_and_deletes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pear.name_uz = "Behi"
+            self.pear.save()
+        self.assertEqual(self.search("behi"), [self.pear.pk])
+        self.assertNotIn(self.pear.pk, self.search("Nok"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pear.delete()
+        self.assertEqual(self.search("behi"), [])
+
+    def test_validation(self):
+        self.assertEqual(self.client.get('/products/search/').status_code, 400)
+        self.assertEqual(self.client.get('/products/search/', {"q": "olma", "limit": "x"}).status_code, 400)
+        self.assertEqual(len(self.search("olma", limit=1)), 1)
+
+    def test_rebuild_after_bulk_create(self):
+        Product.objects.bulk_create([Product(
+            name="Uzum", name_uz="Uzum", name_category=self.pear.name_category, price=Decimal('1'), quantity=Decimal('1'),
+        )])
+        self.assertEqual(search_product_ids("uzum"), [])
+        rebuild_search_index()
+        self.assertEqual(len(search_product_ids("uzum")), 1)
+
+
+class MediaServeTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.body = bytes(range(256)) * 40
+        for name in ("rasm.jpg", "base.3f1c2a9b8e7d.css"):
+            with open(os.path.join(self.root, name), "wb") as f:
+                f.write(self.body)
+        self.factory = RequestFactory()
+
+    def get(self, path, **headers):
+        request = self.factory.get(f"/media/{path}", headers=headers)
+        return serve_media(request, path, document_root=self.root, sendfile_location="/_protected/media/")
+
+    def test_full_response_and_revalidation(self):
+        response = self.get("rasm.jpg")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), self.body)
+        self.assertEqual(response["Content-Length"], str(len(self.body)))
+        self.assertEqual(response["Cache-Control"], "public, max-age=3600")
+        self.assertEqual(response["Content-Type"], "image/jpeg")
+
+        self.assertEqual(self.get("rasm.jpg", if_none_match=response["ETag"]).status_code, 304)
+
+    def test_hashed_names_are_immutable(self):
+        response = self.get("base.3f1c2a9b8e7d.css")
+        self.assertEqual(response["Cache-Control"], "public, max-age=31536000, immutable")
+        response.close()
+
+    def test_range_requests(self):
+        response = self.get("rasm.jpg", range="bytes=100-199")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], f"bytes 100-199/{len(self.body)}")
+        self.assertEqual(b"".join(response.streaming_content), self.body[100:200])
+
+        response = self.get("rasm.jpg", range="bytes=-10")
+        self.assertEqual(b"".join(response.streaming_content), self.body[-10:])
+
+        # Fayl o'zgargan bo'lsa (If-Range mos emas) to'liq javob qaytadi
+        response = self.get("rasm.jpg", range="bytes=0-9", if_range='"eski"')
+        self.assertEqual(response.status_code, 200)
+        response.close()
+
+        self.assertEqual(self.get("rasm.jpg", range=f"bytes={len(self.body)}-").status_code, 416)
+
+    def test_range_on_empty_file_is_unsatisfiable(self):
+        open(os.path.join(self.root, "bosh.txt"), "wb").close()
+        for header in ("bytes=-10", "bytes=0-"):
+            with self.subTest(range=header):
+                response = self.get("bosh.txt", range=header)
+                self.assertEqual(response.status_code, 416)
+                self.assertEqual(response["Content-Range"], "bytes */0")
+
+    def test_sendfile_offload(self):
+        with override_settings(SENDFILE_BACKEND="x-accel-redirect"):
+            response = self.get("rasm.jpg")
+        self.assertEqual(response["X-Accel-Redirect"], "/_protected/media/rasm.jpg")
+        self.assertEqual(response.content, b"")
+        self.assertIn("ETag", response)
+
+        with override_settings(SENDFILE_BACKEND="x-sendfile"):
+            response = self.get("rasm.jpg")
+        self.assertEqual(response["X-Sendfile"], os.path.join(self.root, "rasm.jpg"))
+
+    def test_path_traversal_is_rejected(self):
+        with self.assertRaises(Http404):
+            self.get("../../etc/passwd")
+
+
+@override_settings(REPLICA_DATABASE="replica", REPLICA_PIN_SECONDS=5)
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.router = PrimaryReplicaRouter()
+
+    def test_reads_use_replica_only_inside_block(self):
+        self.assertIsNone(self.router.db_for_read(Product))
+        with read_from_replica():
+            self.assertEqual(self.router.db_for_read(Product), "replica")
+        with override_settings(REPLICA_DATABASE=None), read_from_replica():
+            self.assertIsNone(self.router.db_for_read(Product))
+
+    def test_write_pins_rest_of_request(self):
+        with read_from_replica():
+            self.assertEqual(self.router.db_for_write(Category), "default")
+            self.assertIsNone(self.router.db_for_read(Product))
+        with read_from_replica():
+            self.assertEqual(self.router.db_for_read(Product), "replica")
+
+    def test_pinned_user_reads_primary(self):
+        pin_user(7)
+        with read_from_replica(user_id=7):
+            self.assertIsNone(self.router.db_for_read(Order))
+        with read_from_replica(user_id=8):
+            self.assertEqual(self.router.db_for_read(Order), "replica")
+
+
+class SharedCacheSettingsTests(SimpleTestCase):
+    def import_settings(self, **env):
+        env = {**{key: value for key, value in os.environ.items() if key != "REDIS_URL"}, **env}
+        return subprocess.run([sys.executable, "-c", "import config.settings"], env=env,
+                              cwd=settings.BASE_DIR, capture_output=True, text=True)
+
+    def test_production_without_redis_is_rejected(self):
+        for env in ({"DEBUG": "0"}, {"DEBUG": "1", "WEB_CONCURRENCY": "4"}):
+            with self.subTest(env=env):
+                result = self.import_settings(**env)
+                self.assertNotEqual(result.returncode, 0)
+                self.assertIn("REDIS_URL", result.stderr)
+        self.assertEqual(self.import_settings(DEBUG="0", REDIS_URL="redis://127.0.0.1:6379/0").returncode, 0)
+        self.assertEqual(self.import_settings(DEBUG="1").returncode, 0)
@@ -2,27 +2,53 @@ from django.urls import path
 from .views import UsersView, CreateUserView, UserGetView, GetUpdateUserView, CategoryView, OrderCreatView, \
     UserOrdersRetrieveView, ProductRetrieveAPIView, OrderItemCreatView, OrderItemUpdateView, \
     OrderDeleteView, UserOrderUpdateView, UserActiveOrdersView, MonthlyTopCustomersAPIView, \
-    CategoryToNameCategoryAPIView, NameCategoryToProductAPIView
+    CategoryToNameCategoryAPIView, NameCategoryToProductAPIView, OrderItemBulkUpsertView, CatalogView, \
+    DailySalesStatsView, CategorySalesStatsView, ProductSalesStatsView, OrdersExportView, UsersExportView, \
+    ProductTelegramFileView, ProductSearchView, AsyncUserGetView, AsyncCategoryView, AsyncCategoryToNameCategoryView, \
+    AsyncNameCategoryToProductView, AsyncOrderItemCreatView, AsyncUserOrderUpdateView, BootstrapView, \
+    UserUpsertView
 
 urlpatterns = [
     path('users/', UsersView.as_view(), name='users'),
     path('create_user/', CreateUserView.as_view(), name='create'),
+    path('users/upsert/', UserUpsertView.as_view(), name='user-upsert'),
     path('users/<str:telegram_id>/', UserGetView.as_view(), name='user'),
     path('user_update/<str:telegram_id>/', GetUpdateUserView.as_view(), name='user'),
+    path('bootstrap/<str:telegram_id>/', BootstrapView.as_view(), name='bootstrap'),
 
+    path('catalog/', CatalogView.as_view(), name='catalog'),
     path('cat_list/', CategoryView.as_view(), name='cat_list'),
     path('category_to_name/<int:category_id>/', CategoryToNameCategoryAPIView.as_view(), name='category_to_name'),
     path('namecat_to_product/<int:name_category_id>/', NameCategoryToProductAPIView.as_view(), name='name_to_product'),
+    path('products/search/', ProductSearchView.as_view(), name='product-search'),
     path('products/<int:id>/', ProductRetrieveAPIView.as_view(), name='product-detail'),
+    path('products/<int:id>/telegram_file_id/', ProductTelegramFileView.as_view(), name='product-telegram-file'),
 
     path('order_del/<int:id>/', OrderDeleteView.as_view(), name='order_del'),
     path('order_creat/', OrderCreatView.as_view(), name='order_creat'),
     path('user_orders/<int:user_id>/', UserOrdersRetrieveView.as_view(), name='user_orders'),
     path('order_item_creat/', OrderItemCreatView.as_view(), name='order_item_creat'),
+    path('order_items_bulk/', OrderItemBulkUpsertView.as_view(), name='order_items_bulk'),
     path('orderit_update/<int:id>/', OrderItemUpdateView.as_view(), name='orderitem_update'),
     path('user_order_update/<int:user_id>/', UserOrderUpdateView.as_view(), name='user_order_update'),
     path("orders_list/<int:user_id>/", UserActiveOrdersView.as_view(), name="user_active_orders"),
 
     path('top_monthly_customers/', MonthlyTopCustomersAPIView.as_view(), name='top-monthly-customers'),
+    path('stats/daily/', DailySalesStatsView.as_view(), name='stats-daily'),
+    path('stats/categories/', CategorySalesStatsView.as_view(), name='stats-categories'),
+    path('stats/products/', ProductSalesStatsView.as_view(), name='stats-products'),
+
+    path('export/orders/', OrdersExportView.as_view(), name='export-orders'),
+    path('export/users/', UsersExportView.as_view(), name='export-users'),
+
+    # Async variantlar (ASGI ostida thread band qilmaydi)
+    path('async/users/<str:telegram_id>/', AsyncUserGetView.as_view(), name='async-user'),
+    path('async/cat_list/', AsyncCategoryView.as_view(), name='async-cat-list'),
+    path('async/category_to_name/<int:category_id>/', AsyncCategoryToNameCategoryView.as_view(),
+         name='async-category-to-name'),
+    path('async/namecat_to_product/<int:name_category_id>/', AsyncNameCategoryToProductView.as_view(),
+         name='async-name-to-product'),
+    path('async/order_item_creat/', AsyncOrderItemCreatView.as_view(), name='async-order-item-creat'),
+    path('async/user_order_update/<int:user_id>/', AsyncUserOrderUpdateView.as_view(), name='async-user-order-update'),
 
 ]
@@ -1,18 +1,74 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, viewsets
-from .models import User, Product, Order, OrderItem, Category, ProductNameCategory
+from rest_framework.exceptions import ValidationError
+from .models import User, Product, Order, OrderItem, Category, ProductNameCategory, CustomerMonthlyStats
 from .serializers import UsersSerializer, ProductSerializer, OrderSerializer, OrderItemSerializer, CategorySerializer, \
-    OrderItemCreateSerializer, ProdNameCategorySerializer
+    OrderItemCreateSerializer, ProdNameCategorySerializer, OrderItemBulkSerializer, ProductTelegramFileSerializer, \
+    OrderItemAsyncCreateSerializer, UserUpsertSerializer
+from .services import bulk_upsert_order_items, upsert_user
+from .catalog import get_catalog, bump_catalog_version, CatalogResponseCacheMixin, AsyncCatalogResponseCacheMixin
+from .search import search_product_ids
+from .routers import ReplicaReadMixin
+from .conditional import conditional_on
+from .pagination import CreatedAtCursorPagination
+from .streaming import json_stream_response, export_response, FORMATS
+from .exports import order_item_rows, order_rows, user_rows, ORDER_ITEM_FIELDS, ORDER_FIELDS, USER_FIELDS
+from .analytics import month_start, sales_by_day, sales_by_category, sales_by_product
 from rest_framework import generics, permissions
-from django.utils import timezone
-from django.db.models import Sum, Count, Max
+from django.utils import timezone, translation
+from django.utils.http import parse_etags
+from django.db import transaction
+from django.db.models import Q, Subquery
+from django.db.models.functions import Now
+from datetime import datetime, timedelta
+import hashlib
+import json
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 
 
 class UsersView(generics.ListAPIView):
     queryset = User.objects.all()
     serializer_class = UsersSerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = CreatedAtCursorPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = self.get_requested_fields()
+        if fields:
+            # created_at kursor uchun doim kerak
+            queryset = queryset.only(*{*fields, 'created_at'})
+        return queryset
+
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), 'fields': self.get_requested_fields()}
+
+    def get_requested_fields(self):
+        """``?fields=id,telegram_id``; noma'lum maydon bo'lsa 400."""
+        value = self.request.query_params.get('fields')
+        if not value:
+            return None
+        requested = [name.strip() for name in value.split(',') if name.strip()]
+        unknown = [name for name in requested if name not in self.model_fields()]
+        if unknown:
+            raise ValidationError({"fields": [f"Noma‘lum maydon: {', '.join(unknown)}"]})
+        return requested or None
+
+    @staticmethod
+    def model_fields():
+        return [field.name for field in User._meta.concrete_fields]
+
+    def list(self, request, *args, **kwargs):
+        # ?stream=1 — katta eksportlar uchun paginatsiyasiz, doimiy xotirada JSON oqimi
+        if request.query_params.get("stream") in ("1", "true"):
+            fields = self.get_requested_fields() or self.model_fields()
+            return json_stream_response(User.objects.order_by('created_at', 'id'), fields)
+        return super().list(request, *args, **kwargs)
 
 
 class CreateUserView(generics.CreateAPIView):
@@ -21,6 +77,45 @@ class CreateUserView(generics.CreateAPIView):
     permission_classes = [permissions.AllowAny]
 
 
+class UserUpsertView(generics.GenericAPIView):
+    """telegram_id bo'yicha idempotent ro'yxatdan o'tish: yaratadi (201) yoki yangilaydi (200), kanonik qatorni qaytaradi.
+
+    ``Idempotency-Key`` bilan qayta yuborilgan so'rovga saqlangan javob bazaga tegmasdan qaytariladi.
+    Yozuvlar default keshda turadi — bir nechta worker'da REDIS_URL kerak (settings).
+    """
+    serializer_class = UserUpsertSerializer
+    permission_classes = [permissions.AllowAny]
+    idempotency_timeout = 60 * 60 * 24
+
+    def post(self, request, *args, **kwargs):
+        key = request.headers.get("Idempotency-Key", "").strip()
+        cache_key = None
+        digest = hashlib.sha256(json.dumps(request.data, sort_keys=True, default=str).encode()).hexdigest()
+        if key:
+            cache_key = f"idempotency:users-upsert:{hashlib.sha256(key.encode()).hexdigest()}"
+            cached = cache.get(cache_key)
+            if cached is not None:
+                if cached["digest"] != digest:
+                    return Response(
+                        {"detail": "Idempotency-Key boshqa so‘rov uchun ishlatilgan"},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                    )
+                response = Response(cached["data"], status=cached["status"])
+                response["Idempotent-Replayed"] = "true"
+                return response
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user, created = upsert_user(serializer.validated_data)
+
+        data = UsersSerializer(user).data
+        status_code = status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        if cache_key:
+            cache.set(cache_key, {"digest": digest, "status": status_code, "data": data},
+                      timeout=self.idempotency_timeout)
+        return Response(data, status=status_code)
+
+
 class GetUpdateUserView(generics.RetrieveUpdateAPIView):
     queryset = User.objects.all()
     serializer_class = UsersSerializer
@@ -60,6 +155,37 @@ class UserGetView(APIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+class BootstrapView(APIView):
+    """Bot ochilganda kerak bo'lgan hamma narsa bitta javobda (4 ta so'rov).
+
+    users/<telegram_id>/, user_orders/<user_id>/, orders_list/<user_id>/ va cat_list/ o'rniga.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, telegram_id):
+        user = User.objects.filter(telegram_id=telegram_id).first()
+        if user is None:
+            return Response({"detail": "User not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        # Oxirgi buyurtma va faol buyurtmalar bitta so'rovda (+ mahsulotlar uchun bitta prefetch)
+        latest = Order.objects.filter(user_id=user.pk).order_by('-created_at', '-id').values('pk')[:1]
+        orders = list(
+            Order.objects
+            .with_items()
+            .filter(user_id=user.pk)
+            .filter(Q(pk=Subquery(latest)) | Q(is_confirmed=True) & ~Q(status="completed"))
+            .order_by('-created_at', '-id')
+        )
+        active = [order for order in orders if order.is_confirmed and order.status != "completed"]
+
+        return Response({
+            "user": UsersSerializer(user, context={'request': request}).data,
+            "latest_order": OrderSerializer(orders[0]).data if orders else None,
+            "active_orders": OrderSerializer(active, many=True).data,
+            "categories": CategorySerializer(Category.objects.all(), many=True).data,
+        }, status=status.HTTP_200_OK)
+
+
 # //////////////////////////////////////////////////////////////////////////////////////////////////
 class OrderCreatView(generics.CreateAPIView):
     queryset = Order.objects.all()
@@ -67,13 +193,15 @@ class OrderCreatView(generics.CreateAPIView):
     permission_classes = [permissions.AllowAny]
 
 
-class UserOrdersRetrieveView(generics.RetrieveAPIView):
+class UserOrdersRetrieveView(ReplicaReadMixin, generics.RetrieveAPIView):
     serializer_class = OrderSerializer
     permission_classes = [permissions.AllowAny]
+    replica_pin_kwarg = "user_id"
 
     def get(self, request, user_id, *args, **kwargs):
         order = (
             Order.objects
+            .with_items()
             .filter(user_id=user_id)
             .order_by('-created_at')
             .first()
@@ -89,27 +217,30 @@ class UserOrdersRetrieveView(generics.RetrieveAPIView):
         return Response(serializer.data)
 
 
-class UserActiveOrdersView(generics.ListAPIView):
+class UserActiveOrdersView(ReplicaReadMixin, generics.ListAPIView):
     serializer_class = OrderSerializer
     permission_classes = [permissions.AllowAny]
+    replica_pin_kwarg = "user_id"
 
     def get_queryset(self):
         user_id = self.kwargs.get("user_id")
         return (
             Order.objects
+            .with_items()
             .filter(user_id=user_id, is_confirmed=True)
             .exclude(status="completed")
             .order_by("-created_at")
         )
 
     def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        if not queryset.exists():
+        # exists() + alohida SELECT o'rniga ro'yxatni bir marta yuklaymiz
+        orders = list(self.get_queryset())
+        if not orders:
             return Response(
                 {"detail": "Foydalanuvchining faol buyurtmalari topilmadi."},
                 status=status.HTTP_404_NOT_FOUND
             )
-        serializer = self.get_serializer(queryset, many=True)
+        serializer = self.get_serializer(orders, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
@@ -121,6 +252,8 @@ class UserOrderUpdateView(generics.UpdateAPIView):
     def patch(self, request, user_id, *args, **kwargs):
         order = (
             Order.objects
+            .with_items()
+            .select_related('user')
             .filter(user_id=user_id)
             .order_by('-created_at')
             .first()
@@ -139,15 +272,36 @@ class UserOrderUpdateView(generics.UpdateAPIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class CategoryView(generics.ListAPIView):
+class CategoryView(CatalogResponseCacheMixin, generics.ListAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [permissions.AllowAny]
 
+    @conditional_on(lambda **kwargs: Category.objects.all())
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
+class CatalogView(CatalogResponseCacheMixin, APIView):
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        language = translation.get_language()
+        version, tree = get_catalog(language)
+        etag = f'"catalog-{language}-{version}"'
+
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response({"version": version, "categories": tree}, status=status.HTTP_200_OK)
+        response["ETag"] = etag
+        return response
+
 
-class CategoryToNameCategoryAPIView(APIView):
+class CategoryToNameCategoryAPIView(CatalogResponseCacheMixin, APIView):
     permission_classes = [permissions.AllowAny]
 
+    @conditional_on(lambda category_id=None, **kwargs: ProductNameCategory.objects.filter(category_id=category_id))
     def get(self, request, category_id=None):
         if not category_id:
             return Response({"detail": "category_id berilishi kerak"}, status=status.HTTP_400_BAD_REQUEST)
@@ -162,9 +316,10 @@ class CategoryToNameCategoryAPIView(APIView):
         return Response(result, status=status.HTTP_200_OK)
 
 
-class NameCategoryToProductAPIView(APIView):
+class NameCategoryToProductAPIView(CatalogResponseCacheMixin, APIView):
     permission_classes = [permissions.AllowAny]
 
+    @conditional_on(lambda name_category_id=None, **kwargs: Product.objects.filter(name_category_id=name_category_id))
     def get(self, request, name_category_id=None):
         if not name_category_id:
             return Response({"detail": "name_category_id berilishi kerak"}, status=status.HTTP_400_BAD_REQUEST)
@@ -187,12 +342,66 @@ class NameCategoryToProductAPIView(APIView):
         return Response(result, status=status.HTTP_200_OK)
 
 
-class ProductRetrieveAPIView(generics.RetrieveAPIView):
+class ProductRetrieveAPIView(CatalogResponseCacheMixin, generics.RetrieveAPIView):
     permission_classes = [permissions.AllowAny]
-    queryset = Product.objects.all()
+    queryset = Product.objects.with_category()
     serializer_class = ProductSerializer
     lookup_field = 'id'
 
+    # Serializer kategoriya nomlarini ham qaytaradi, shuning uchun ularning vaqti ham hisobga olinadi
+    @conditional_on(
+        lambda id=None, **kwargs: Product.objects.filter(id=id),
+        'updated_at', 'name_category__updated_at', 'name_category__category__updated_at',
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
+class ProductSearchView(CatalogResponseCacheMixin, APIView):
+    """``?q=`` bo'yicha nom va tavsif (uz/ru) ichidan imlo xatolariga chidamli qidiruv."""
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({"detail": "q bo‘sh bo‘lmasligi kerak"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = int(request.query_params.get('limit', 20))
+        except ValueError:
+            return Response({"detail": "limit butun son bo‘lishi kerak"}, status=status.HTTP_400_BAD_REQUEST)
+        limit = min(max(limit, 1), 50)
+
+        ids = search_product_ids(query, limit=limit)
+        products = Product.objects.with_category().in_bulk(ids)
+        # Moslik tartibini saqlaymiz; FTS'da qolib ketgan o'chirilgan id'lar tushib qoladi
+        ordered = [products[pk] for pk in ids if pk in products]
+        return Response(ProductSerializer(ordered, many=True, context={'request': request}).data)
+
+
+class ProductTelegramFileView(generics.GenericAPIView):
+    """Rasm uchun Telegram file_id ni yozib qo'yadi, keyingi safar bot rasmni qayta yuklamaydi.
+
+    file_id faqat u yuklangan rasm hali ham joriy bo'lsa (image_hash mos kelsa) saqlanadi.
+    """
+    serializer_class = ProductTelegramFileSerializer
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request, id, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        updated = Product.objects.filter(id=id, image_hash=data["image_hash"]).exclude(image_hash="").update(
+            telegram_file_id=data["file_id"], updated_at=Now(),
+        )
+        if updated:
+            # update() signal chaqirmaydi; products/<id>/ keshlangan javobi ham yangilanishi kerak
+            transaction.on_commit(bump_catalog_version)
+            return Response({"id": id, "telegram_file_id": data["file_id"], "image_hash": data["image_hash"]})
+        if not Product.objects.filter(id=id).exists():
+            return Response({"detail": "Mahsulot topilmadi"}, status=status.HTTP_404_NOT_FOUND)
+        return Response({"detail": "Mahsulot rasmi o‘zgargan, file_id saqlanmadi"}, status=status.HTTP_409_CONFLICT)
+
 
 class OrderItemCreatView(generics.CreateAPIView):
     queryset = OrderItem.objects.all()
@@ -200,8 +409,23 @@ class OrderItemCreatView(generics.CreateAPIView):
     permission_classes = [permissions.AllowAny]
 
 
+class OrderItemBulkUpsertView(generics.GenericAPIView):
+    serializer_class = OrderItemBulkSerializer
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        order = serializer.validated_data["order"]
+        bulk_upsert_order_items(order, serializer.validated_data["items"])
+
+        order = Order.objects.with_items().get(pk=order.pk)
+        return Response(OrderSerializer(order).data, status=status.HTTP_200_OK)
+
+
 class OrderItemUpdateView(generics.UpdateAPIView):
-    queryset = OrderItem.objects.all()
+    queryset = OrderItem.objects.select_related('order')
     serializer_class = OrderItemCreateSerializer
     permission_classes = [permissions.AllowAny]
     lookup_field = 'id'
@@ -231,48 +455,257 @@ class OrderDeleteView(generics.DestroyAPIView):
 # /////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
 
 
-class MonthlyTopCustomersAPIView(APIView):
+class MonthlyTopCustomersAPIView(ReplicaReadMixin, APIView):
     permission_classes = [permissions.AllowAny]
+    DEFAULT_LIMIT = 5
+    MAX_LIMIT = 100
 
     def get(self, request):
-        now = timezone.now()
-        start_of_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-
-        orders = Order.objects.filter(created_at__gte=start_of_month, is_confirmed=True, status="completed")
-
-        if not orders.exists():
+        month_param = request.query_params.get("month")
+        try:
+            if month_param:
+                month = datetime.strptime(month_param, "%Y-%m").date()
+            else:
+                month = month_start(timezone.now())
+            limit = int(request.query_params.get("limit", self.DEFAULT_LIMIT))
+        except ValueError:
             return Response(
-                {"message": "Bu oyda hali hech kim buyurtma qilmagan."},
-                status=status.HTTP_200_OK
+                {"detail": "month YYYY-MM, limit esa butun son bo‘lishi kerak"},
+                status=status.HTTP_400_BAD_REQUEST
             )
+        limit = max(1, min(limit, self.MAX_LIMIT))
 
+        # Oldindan hisoblangan rollup jadvalidan (month, -total_spent) indeksi bo'yicha top-N
         stats = (
-            orders.values(
-                "user__id",
-                "user__first_name",
-                "user__user_name",
-                "user__phone_number",
-                "user__language",
-            )
-            .annotate(
-                total_spent=Sum("total_price"),
-                order_count=Count("id"),
-                last_order=Max("created_at"),
-            )
-            .order_by("-total_spent")[:5]
+            CustomerMonthlyStats.objects
+            .filter(month=month)
+            .select_related("user")
+            .order_by("-total_spent", "user_id")[:limit]
         )
 
         result = []
         for s in stats:
             result.append({
-                "user_id": s["user__id"],
-                "first_name": s["user__first_name"],
-                "username": s["user__user_name"],
-                "phone_number": s["user__phone_number"],
-                "language": s["user__language"],
-                "total_spent_this_month": float(s["total_spent"] or 0),
-                "total_orders_this_month": s["order_count"],
-                "last_order_date": s["last_order"].strftime("%Y-%m-%d %H:%M:%S"),
+                "user_id": s.user_id,
+                "first_name": s.user.first_name,
+                "username": s.user.user_name,
+                "phone_number": s.user.phone_number,
+                "language": s.user.language,
+                "total_spent_this_month": float(s.total_spent),
+                "total_orders_this_month": s.order_count,
+                "last_order_date": s.last_order.strftime("%Y-%m-%d %H:%M:%S"),
             })
 
+        if not result:
+            return Response(
+                {"message": "Bu oyda hali hech kim buyurtma qilmagan."},
+                status=status.HTTP_200_OK
+            )
+
         return Response(result, status=status.HTTP_200_OK)
+
+
+class SalesStatsView(ReplicaReadMixin, APIView):
+    """?from=YYYY-MM-DD&to=YYYY-MM-DD (ikkalasi ham kiradi, standart — oxirgi 30 kun)."""
+    permission_classes = [permissions.AllowAny]
+    DEFAULT_DAYS = 30
+
+    def get_range(self, request):
+        end = request.query_params.get("to")
+        start = request.query_params.get("from")
+        end = datetime.strptime(end, "%Y-%m-%d").date() if end else timezone.localdate()
+        start = datetime.strptime(start, "%Y-%m-%d").date() if start else end - timedelta(days=self.DEFAULT_DAYS - 1)
+        return start, end
+
+    def get(self, request):
+        try:
+            start, end = self.get_range(request)
+        except ValueError:
+            return Response(
+                {"detail": "from va to YYYY-MM-DD formatida bo‘lishi kerak"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if start > end:
+            return Response({"detail": "from to dan katta bo‘lmasligi kerak"}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = self.get_rows(request, start, end)
+        for row in rows:
+            row["revenue"] = float(row["revenue"] or 0)
+            row["units"] = float(row["units"] or 0)
+        return Response({"from": start, "to": end, "results": rows}, status=status.HTTP_200_OK)
+
+
+class DailySalesStatsView(SalesStatsView):
+    def get_rows(self, request, start, end):
+        return sales_by_day(start, end)
+
+
+class CategorySalesStatsView(SalesStatsView):
+    def get_rows(self, request, start, end):
+        return sales_by_category(start, end)
+
+
+class ProductSalesStatsView(SalesStatsView):
+    MAX_LIMIT = 100
+
+    def get_rows(self, request, start, end):
+        try:
+            limit = int(request.query_params.get("limit", 20))
+        except ValueError:
+            limit = 20
+        return sales_by_product(start, end, limit=max(1, min(limit, self.MAX_LIMIT)))
+
+
+class ExportView(APIView):
+    """Katta hajmdagi ma'lumotni doimiy xotirada oqim (CSV yoki JSONL) sifatida yuklab beradi.
+
+    ?output=csv|jsonl (standart csv), ?from=YYYY-MM-DD&to=YYYY-MM-DD — created_at bo'yicha.
+    """
+    permission_classes = [permissions.AllowAny]
+    filename = "export"
+
+    def get(self, request):
+        fmt = request.query_params.get("output", "csv")
+        if fmt not in FORMATS:
+            return Response({"detail": "output csv yoki jsonl bo‘lishi kerak"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            start = self.parse_date(request.query_params.get("from"))
+            end = self.parse_date(request.query_params.get("to"))
+        except ValueError:
+            return Response(
+                {"detail": "from va to YYYY-MM-DD formatida bo‘lishi kerak"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        rows, fields = self.get_rows(request, start, end)
+        return export_response(rows, fields, fmt, self.filename)
+
+    @staticmethod
+    def parse_date(value):
+        return datetime.strptime(value, "%Y-%m-%d").date() if value else None
+
+
+class OrdersExportView(ExportView):
+    """?level=items (standart, har bir mahsulot qatori) yoki ?level=orders."""
+    filename = "orders"
+
+    def get_rows(self, request, start, end):
+        if request.query_params.get("level") == "orders":
+            return order_rows(start, end), ORDER_FIELDS
+        return order_item_rows(start, end), ORDER_ITEM_FIELDS
+
+
+class UsersExportView(ExportView):
+    filename = "users"
+
+    def get_rows(self, request, start, end):
+        return user_rows(start, end), USER_FIELDS
+
+
+# /////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
+# Async variantlar: ASGI serverida (uvicorn/daphne) so'rov kutayotganda thread band qilinmaydi.
+# Javoblar sinxron endpointlar bilan bir xil; DRF view'lari async emas, shuning uchun oddiy Django View.
+
+
+class AsyncAPIView(View):
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # DRF APIView kabi: bot token/sessiya bilan emas, CSRF'siz ishlaydi
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    @staticmethod
+    def parse_json(request):
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+
+
+class AsyncUserGetView(AsyncAPIView):
+    async def get(self, request, telegram_id):
+        user = await User.objects.filter(telegram_id=telegram_id).afirst()
+        if user is None:
+            return JsonResponse({"detail": "User not found"}, status=status.HTTP_404_NOT_FOUND)
+        return JsonResponse(UsersSerializer(user).data)
+
+
+class AsyncCategoryView(AsyncCatalogResponseCacheMixin, AsyncAPIView):
+    async def get(self, request):
+        categories = [category async for category in Category.objects.all()]
+        return JsonResponse(CategorySerializer(categories, many=True).data, safe=False)
+
+
+class AsyncCategoryToNameCategoryView(AsyncCatalogResponseCacheMixin, AsyncAPIView):
+    async def get(self, request, category_id):
+        result = [
+            nc async for nc in ProductNameCategory.objects.filter(category_id=category_id).values("id", "name")
+        ]
+        return JsonResponse(result, safe=False)
+
+
+class AsyncNameCategoryToProductView(AsyncCatalogResponseCacheMixin, AsyncAPIView):
+    async def get(self, request, name_category_id):
+        result = [
+            {
+                "id": p.id,
+                "name": p.name,
+                "price": float(p.price),
+                "unit": p.unit,
+                "available": p.available
+            } async for p in Product.objects.filter(name_category_id=name_category_id)
+        ]
+        return JsonResponse(result, safe=False)
+
+
+class AsyncOrderItemCreatView(AsyncAPIView):
+    async def post(self, request):
+        data = self.parse_json(request)
+        if data is None:
+            return JsonResponse({"detail": "JSON obyekt kutilgan"}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = OrderItemAsyncCreateSerializer(data=data)
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = serializer.validated_data
+
+        order = await Order.objects.filter(pk=data["order"]).afirst()
+        if order is None:
+            return JsonResponse({"order": ["Buyurtma topilmadi"]}, status=status.HTTP_400_BAD_REQUEST)
+        product = await Product.objects.filter(pk=data["product"]).afirst()
+        if product is None:
+            return JsonResponse({"product": ["Mahsulot topilmadi"]}, status=status.HTTP_400_BAD_REQUEST)
+
+        item = OrderItem(order=order, product=product, quantity=data["quantity"])
+        await item.asave()
+        return JsonResponse(OrderItemCreateSerializer(item).data, status=status.HTTP_201_CREATED)
+
+
+class AsyncUserOrderUpdateView(AsyncAPIView):
+    async def patch(self, request, user_id):
+        data = self.parse_json(request)
+        if data is None:
+            return JsonResponse({"detail": "JSON obyekt kutilgan"}, status=status.HTTP_400_BAD_REQUEST)
+        order = await (
+            Order.objects
+            .with_items()
+            .select_related('user')
+            .filter(user_id=user_id)
+            .order_by('-created_at')
+            .afirst()
+        )
+        if not order:
+            return JsonResponse(
+                {"detail": "Bu foydalanuvchiga tegishli buyurtma topilmadi."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        # Order.save tranzaksiya ichida zaxira va statistikani yangilaydi; atomic async kodda
+        # ishlamaydi, shuning uchun validatsiya va saqlash bitta sync blokda bajariladi
+        return await sync_to_async(self.update)(order, data)
+
+    @staticmethod
+    def update(order, data):
+        serializer = OrderSerializer(order, data=data, partial=True)
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        serializer.save()
+        return JsonResponse(serializer.data, status=status.HTTP_200_OK)